@@ -0,0 +1,119 @@
+"""Compares the ORM and Core read paths of the menu accessors.
+
+Seeds a synthetic catalog into the test database, loads it repeatedly
+through both accessors and reports time and allocations per row.
+
+    python -m benchmarks.read_path --menus 20 --submenus 10 --dishes 25
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+import uuid
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.accessors import MenuAccessor, MenuCoreAccessor
+from src.core import config
+from src.models import MenuModel
+
+BENCH_PREFIX = "bench-read-path"
+
+
+def build_catalog(menus: int, submenus: int, dishes: int) -> list[dict]:
+    """Builds a nested catalog in the format of src/data/menu.json."""
+    catalog = []
+    for m in range(menus):
+        menu_id = str(uuid.uuid4())
+        menu = {
+            "id": menu_id,
+            "title": f"{BENCH_PREFIX} {m}",
+            "description": "Benchmark menu",
+            "submenus": [],
+        }
+        for s in range(submenus):
+            submenu_id = str(uuid.uuid4())
+            menu["submenus"].append(
+                {
+                    "id": submenu_id,
+                    "menu_id": menu_id,
+                    "title": f"Submenu {m}.{s}",
+                    "description": "Benchmark submenu",
+                    "dishes": [
+                        {
+                            "title": f"Dish {m}.{s}.{d}",
+                            "description": "Benchmark dish",
+                            "price": "10.50",
+                            "submenu_id": submenu_id,
+                        }
+                        for d in range(dishes)
+                    ],
+                }
+            )
+        catalog.append(menu)
+    return catalog
+
+
+async def seed(session_maker, catalog: list[dict]) -> None:
+    submenus = [submenu for menu in catalog for submenu in menu["submenus"]]
+    dishes = [dish for submenu in submenus for dish in submenu["dishes"]]
+    await MenuAccessor(session_maker()).menu_multiple_create(catalog)
+    await MenuAccessor(session_maker()).submenu_multiple_create(submenus)
+    await MenuAccessor(session_maker()).dish_multiple_create(dishes)
+
+
+async def cleanup(session_maker) -> None:
+    async with session_maker() as session:
+        async with session.begin():
+            await session.execute(
+                delete(MenuModel).where(MenuModel.title.startswith(BENCH_PREFIX))
+            )
+
+
+async def measure(session_maker, accessor_class, rounds: int) -> tuple[float, int]:
+    """Returns the mean load time and the allocated bytes of one load."""
+    await accessor_class(session_maker()).get_menus()  # warm up
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await accessor_class(session_maker()).get_menus()
+    elapsed = (time.perf_counter() - started) / rounds
+
+    tracemalloc.start()
+    await accessor_class(session_maker()).get_menus()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = create_async_engine(args.db_url, future=True)
+    session_maker = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    catalog = build_catalog(args.menus, args.submenus, args.dishes)
+    rows = args.menus * args.submenus * args.dishes
+
+    await seed(session_maker, catalog)
+    try:
+        print(f"{rows} rows, {args.rounds} rounds")
+        print(f"{'path':<6}{'ms/load':>10}{'us/row':>10}{'peak KiB':>12}{'B/row':>10}")
+        for name, accessor_class in (("orm", MenuAccessor), ("core", MenuCoreAccessor)):
+            elapsed, peak = await measure(session_maker, accessor_class, args.rounds)
+            print(
+                f"{name:<6}{elapsed * 1e3:>10.2f}{elapsed * 1e6 / rows:>10.2f}"
+                f"{peak / 1024:>12.1f}{peak / rows:>10.0f}"
+            )
+    finally:
+        await cleanup(session_maker)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db-url", default=config.TEST_DATABASE_URL)
+    parser.add_argument("--menus", type=int, default=20)
+    parser.add_argument("--submenus", type=int, default=10)
+    parser.add_argument("--dishes", type=int, default=25)
+    parser.add_argument("--rounds", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
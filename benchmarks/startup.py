@@ -0,0 +1,127 @@
+"""Measures the cold start of the API process.
+
+Imports main in fresh interpreters and reports the import time, the
+slowest modules it loads and whether any of the lazily loaded ones
+(Celery, aiofiles, uvicorn) came back. Then starts the server and
+reports the time until it answers its first request.
+
+    python -m benchmarks.startup --rounds 5 --max-import-ms 1500
+"""
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+# Loaded on first use only, see get_celery_app and generate_menus
+LAZY_MODULES = ("celery", "kombu", "aiofiles", "uvicorn")
+
+IMPORT_SCRIPT = """
+import sys, time
+started = time.perf_counter()
+import main
+print(time.perf_counter() - started)
+print(",".join(sorted({name.split(".")[0] for name in sys.modules})))
+"""
+
+
+def measure_import() -> tuple[float, set[str]]:
+    """Returns the time to import main and the top-level modules loaded."""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.splitlines()
+    return float(output[-2]), set(output[-1].split(","))
+
+
+def slowest_imports(count: int) -> list[tuple[int, str]]:
+    """Returns the modules with the highest cumulative import time, in us."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times = []
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)", line)
+        # Direct imports of main only, their times include their own imports
+        if match and len(match[2]) == 2:
+            times.append((int(match[1]), match[3]))
+    return sorted(times, reverse=True)[:count]
+
+
+def measure_ready(port: int, timeout: float) -> float:
+    """Returns the time from starting the server to its first answer."""
+    env = os.environ | {"SERVER_PORT": str(port), "SERVER_WORKERS": "1"}
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "src.server"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1):
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"server not ready after {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main(args: argparse.Namespace) -> int:
+    import_times = []
+    for _ in range(args.rounds):
+        elapsed, modules = measure_import()
+        import_times.append(elapsed)
+    import_ms = statistics.median(import_times) * 1e3
+    print(f"import main: {import_ms:.0f} ms median, {min(import_times) * 1e3:.0f} min")
+    for elapsed, name in slowest_imports(args.top):
+        print(f"  {elapsed / 1e3:>8.1f} ms  {name}")
+    eager = [name for name in LAZY_MODULES if name in modules]
+    if eager:
+        print(f"loaded on import: {', '.join(eager)}")
+
+    if not args.skip_ready:
+        ready_times = [
+            measure_ready(free_port(), args.timeout) for _ in range(args.rounds)
+        ]
+        print(f"start to ready: {statistics.median(ready_times) * 1e3:.0f} ms median")
+
+    if eager or (args.max_import_ms and import_ms > args.max_import_ms):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports shown")
+    parser.add_argument(
+        "--max-import-ms",
+        type=float,
+        default=0,
+        help="fail when the median import time exceeds it, 0 to only report",
+    )
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument(
+        "--skip-ready", action="store_true", help="only measure the import"
+    )
+    sys.exit(main(parser.parse_args()))
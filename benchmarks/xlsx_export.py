@@ -0,0 +1,97 @@
+"""Compares the in-memory, streaming and sharded Excel export modes.
+
+Renders a synthetic catalog with each writer and reports wall time
+and peak traced memory of the main process.
+
+    python -m benchmarks.xlsx_export --menus 10 --submenus 20 --dishes 500
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from src.celery import tasks
+from src.celery.tasks import (
+    iter_catalog_rows,
+    plan_catalog_shards,
+    write_sharded_workbook,
+    write_streaming_workbook,
+    write_workbook,
+)
+
+
+def build_catalog(menus: int, submenus: int, dishes: int) -> list[dict]:
+    """Builds a nested catalog in the format the export task receives."""
+    return [
+        {
+            "title": f"Menu {m}",
+            "description": "Benchmark menu",
+            "submenus": [
+                {
+                    "title": f"Submenu {m}.{s}",
+                    "description": "Benchmark submenu",
+                    "dishes": [
+                        {
+                            "title": f"Dish {m}.{s}.{d}",
+                            "description": "Benchmark dish description",
+                            "price": 10.5,
+                        }
+                        for d in range(dishes)
+                    ],
+                }
+                for s in range(submenus)
+            ],
+        }
+        for m in range(menus)
+    ]
+
+
+def write_memory(catalog: list[dict], path: str) -> None:
+    write_workbook(iter_catalog_rows(catalog), path)
+
+
+def write_stream(catalog: list[dict], path: str) -> None:
+    write_streaming_workbook(iter_catalog_rows(catalog), path)
+
+
+def write_sharded(catalog: list[dict], path: str) -> None:
+    titles = [menu["title"] for menu in catalog]
+    write_sharded_workbook(plan_catalog_shards(catalog), titles, path)
+
+
+def run(name: str, write, catalog: list[dict], directory: str) -> None:
+    path = os.path.join(directory, f"{name}.xlsx")
+
+    started = time.perf_counter()
+    write(catalog, path)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    write(catalog, path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    size = os.path.getsize(path)
+    print(f"{name:<8}{elapsed:>10.2f}{peak / 2**20:>12.1f}{size / 2**20:>12.1f}")
+
+
+def main(args: argparse.Namespace) -> None:
+    catalog = build_catalog(args.menus, args.submenus, args.dishes)
+    tasks.EXPORT_PROCESSES = args.processes
+    dishes = args.menus * args.submenus * args.dishes
+    print(f"{dishes} dishes, {args.processes} processes")
+    print(f"{'mode':<8}{'seconds':>10}{'peak MiB':>12}{'file MiB':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        run("memory", write_memory, catalog, directory)
+        run("stream", write_stream, catalog, directory)
+        run("sharded", write_sharded, catalog, directory)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--menus", type=int, default=10)
+    parser.add_argument("--submenus", type=int, default=20)
+    parser.add_argument("--dishes", type=int, default=500)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    main(parser.parse_args())
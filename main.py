@@ -1,10 +1,20 @@
+from contextlib import asynccontextmanager
+
 import aioredis
-import uvicorn
 from fastapi import FastAPI
 
+from src.api.concurrency import LoadShedMiddleware, concurrency_limit
+from src.api.deadlines import RequestDeadlineMiddleware
 from src.api.v1.routes import menus
+from src.cache import warm_up_cache
 from src.core import config
-from src.db import cache
+from src.db import async_session, cache
+from src.db.changes import change_feed
+from src.db.statements import prepared_statements
+from src.services.autocomplete import autocomplete
+from src.services.bloom import id_filters
+from src.services.events import task_events
+from src.services.invalidation import cache_invalidator
 
 app = FastAPI(
     title=config.PROJECT_NAME,
@@ -20,19 +30,67 @@ def root():
     return {"service": config.PROJECT_NAME, "version": config.VERSION}
 
 
-@app.on_event("startup")
-async def startup():
-    cache.cache = await aioredis.from_url(config.REDIS_URL)
+@app.get("/metrics")
+def metrics():
+    return {
+        "prepared_statements": prepared_statements.stats(),
+        "autocomplete": autocomplete.stats(),
+        "concurrency": concurrency_limit.stats(),
+        "cache": cache.cache.stats() if cache.cache else None,
+    }
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    redis = aioredis.Redis(connection_pool=cache.create_redis_pool())
+    cache.cache = cache.CircuitBreakerCache(
+        cache.RedisCache(redis), cache.cache_breaker
+    )
+    if config.CACHE_WARMUP:
+        await warm_up_cache(await cache.get_cache())
+    await task_events.start(config.CELERY_RESULT_BACKEND)
+    await change_feed.start(config.DATABASE_URL.replace("+asyncpg", ""))
+    await cache_invalidator.start(await cache.get_cache())
+    if config.ID_FILTER:
+        await id_filters.start(async_session)
+    try:
+        yield
+    finally:
+        await id_filters.stop()
+        await cache_invalidator.stop()
+        await change_feed.stop()
+        await task_events.stop()
+        await cache.cache.close()
 
-@app.on_event("shutdown")
-async def shutdown():
-    await cache.cache.close()
 
+app.router.lifespan_context = lifespan
 
 app.include_router(router=menus.router, prefix="/api/v1/menus")
+app.add_middleware(
+    RequestDeadlineMiddleware,
+    routes=app.router.routes,
+    read_timeout=config.READ_TIMEOUT,
+    write_timeout=config.WRITE_TIMEOUT,
+    route_timeouts=config.ROUTE_TIMEOUTS,
+    dsn=config.DATABASE_URL.replace("+asyncpg", ""),
+)
+if config.LOAD_SHEDDING:
+    app.add_middleware(
+        LoadShedMiddleware,
+        limit=concurrency_limit,
+        shares={
+            "read": 1,
+            "write": config.CONCURRENCY_WRITE_SHARE,
+            "bulk": config.CONCURRENCY_BULK_SHARE,
+            "degraded": config.CONCURRENCY_DEGRADED_READ_SHARE,
+        },
+        retry_after=config.LOAD_SHED_RETRY_AFTER,
+        degraded=cache.cache_breaker.is_open,
+    )
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
@@ -1,11 +1,71 @@
+import hashlib
 import json
+import time
+from datetime import timedelta
+from collections.abc import AsyncIterator, Iterable, Sequence
+from dataclasses import replace
+from itertools import combinations
 
-from sqlalchemy import select, update
+from sqlalchemy import (
+    Float,
+    Row,
+    Select,
+    any_,
+    bindparam,
+    cast,
+    desc,
+    func,
+    literal,
+    null,
+    select,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, REGCLASS, UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
+from src.core import config
 from src.db.cache import AbstractCache
-from src.models import Dish, DishModel, Menu, MenuModel, SubMenu, SubMenuModel
+from src.db.statements import prepared_statements
+from src.models import (
+    CatalogVersionModel,
+    ChangeLogModel,
+    Dish,
+    DishModel,
+    Menu,
+    MenuModel,
+    SubMenu,
+    SubMenuModel,
+)
+
+# Keys of the cached catalog items and lists by type, see MenuService
+CACHE_KEY_PATTERNS = {
+    "menu": ("menu:*", "menus", "menus|*"),
+    "submenu": ("submenu:*", "submenus:*"),
+    "dish": ("dish:*", "dishes:*"),
+    "search": ("search:*",),
+}
+
+# Fields of the answers by type, the first one is always returned
+ANSWER_FIELDS = {
+    "menu": ("id", "title", "description", "submenus_count", "dishes_count"),
+    "submenu": ("id", "title", "description", "dishes_count"),
+    "dish": ("id", "title", "description", "price"),
+    "menu_dish": ("id", "title", "description", "price", "submenu_id"),
+}
+# Types of the answers cached by key prefix
+KEY_TYPES = {
+    "menu": "menu",
+    "menus": "menu",
+    "submenu": "submenu",
+    "submenus": "submenu",
+    "dish": "dish",
+    "dishes": "dish",
+}
+
+# Cached in place of the items that do not exist, read back as an empty dict
+MISSING = "{}"
 
 
 class MenuCacheAccessor:
@@ -19,11 +79,26 @@ class MenuCacheAccessor:
         await self.cache.set(key, json.dumps(item))
 
     async def get_item(self, type_: str, id_: str) -> dict | None:
-        """Generates a key and gets an item from the cache."""
+        """Generates a key and gets an item from the cache.
+
+        An empty dict means the item is known not to exist.
+        """
         key = f"{type_}:{id_}"
         item = await self.cache.get(key)
         return json.loads(item) if item else None
 
+    async def get_items(self, type_: str, ids: list[str]) -> list[dict | None]:
+        """Gets the items with the given ids at once, None for misses."""
+        items = await self.cache.get_many([f"{type_}:{id_}" for id_ in ids])
+        return [json.loads(item) if item else None for item in items]
+
+    async def set_items(self, type_: str, items: list[dict]) -> None:
+        """Sets the items in the cache at once."""
+        if items:
+            await self.cache.set_many(
+                {f"{type_}:{item['id']}": json.dumps(item) for item in items}
+            )
+
     async def set_list(self, key: str, items: list):
         """Sets items to the cache by the given key."""
         await self.cache.set(key, json.dumps(items))
@@ -33,19 +108,327 @@ class MenuCacheAccessor:
         items = await self.cache.get(key)
         return json.loads(items) if items else None
 
+    async def get_fields(self, key: str, fields: Sequence[str]) -> list | None:
+        """Gets the items cached with only the given fields."""
+        items = await self.cache.get(self.fields_key(key, fields))
+        return json.loads(items) if items else None
+
+    async def set_fields(self, key: str, fields: Sequence[str], items: list) -> None:
+        """Caches the items with only the given fields."""
+        await self.cache.set(self.fields_key(key, fields), json.dumps(items))
+
+    @staticmethod
+    def fields_key(key: str, fields: Sequence[str]) -> str:
+        return f"{key}|{','.join(fields)}"
+
+    @staticmethod
+    def field_keys(keys: Iterable[str]) -> list[str]:
+        """Adds to the keys the ones of every field set they may be
+        cached with, so that the variants are deleted together."""
+        expanded = []
+        for key in keys:
+            expanded.append(key)
+            type_ = KEY_TYPES.get(key.split(":", 1)[0])
+            if type_ is None:
+                continue
+            id_field, *fields = ANSWER_FIELDS[type_]
+            for size in range(len(fields)):
+                for subset in combinations(fields, size):
+                    expanded.append(
+                        MenuCacheAccessor.fields_key(key, (id_field, *subset))
+                    )
+        return expanded
+
     async def delete(self, type_: str, id_: str) -> None:
         """Generates a key and deletes the item from the cache."""
-        await self.cache.remove(f"{type_}:{id_}")
+        await self.cache.remove_many(self.field_keys([f"{type_}:{id_}"]))
 
     async def delete_list(self, key: str) -> None:
         """Deletes items from the cache by the given key."""
-        await self.cache.remove(key)
+        await self.cache.remove_many(self.field_keys([key]))
+
+    async def delete_keys(self, keys: Iterable[str]) -> None:
+        """Deletes the given keys from the cache at once."""
+        await self.cache.remove_many(self.field_keys(keys))
+
+    async def delete_type(self, type_: str) -> None:
+        """Deletes the cached items and lists of the given type."""
+        for pattern in CACHE_KEY_PATTERNS[type_]:
+            await self.cache.remove_matching(pattern)
+
+    async def delete_all(self) -> None:
+        """Deletes every cached catalog item and list, keeping the exports."""
+        for type_ in CACHE_KEY_PATTERNS:
+            await self.delete_type(type_)
+
+    async def count_keys(self) -> dict[str, int]:
+        """Counts the cached catalog keys by type."""
+        counts = {}
+        for type_, patterns in CACHE_KEY_PATTERNS.items():
+            counts[type_] = 0
+            for pattern in patterns:
+                counts[type_] += await self.cache.count_matching(pattern)
+        return counts
+
+    @staticmethod
+    def change_keys(change: dict) -> set[str] | None:
+        """Gets the keys made stale by a logged catalog change.
+
+        Returns None when the whole catalog has to be dropped.
+        """
+        if change["op"] == "TRUNCATE":
+            return None
+        table, row_id = change["table"], change["row_id"]
+        menu_id, submenu_id = change["menu_id"], change["submenu_id"]
+        keys = {f"{table}:{row_id}", "menus"}
+        if table == "menu":
+            keys.add(f"submenus:{row_id}")
+        elif table == "submenu":
+            keys |= {f"menu:{menu_id}", f"submenus:{menu_id}", f"dishes:{row_id}"}
+        else:
+            keys |= {f"submenu:{submenu_id}", f"dishes:{submenu_id}"}
+            # Unknown when the delete cascades from the submenu,
+            # whose own change covers the menu then
+            if menu_id:
+                keys |= {f"menu:{menu_id}", f"submenus:{menu_id}"}
+        return keys
+
+    async def set_missing(self, type_: str, id_: str) -> None:
+        """Caches that there is no item with the given id, unless the item
+        has been cached meanwhile."""
+        await self.cache.add(
+            f"{type_}:{id_}", MISSING, expire=config.CACHE_MISS_EXPIRE_IN_SECONDS
+        )
+
+    async def get_search(self, version: int, *query) -> list | None:
+        """Gets the cached results of a search on the catalog version."""
+        results = await self.cache.get(self.search_key(version, *query))
+        return json.loads(results) if results is not None else None
+
+    async def set_search(self, version: int, *query, results: list) -> None:
+        """Caches the results of a search on the catalog version."""
+        await self.cache.set(
+            self.search_key(version, *query),
+            json.dumps(results),
+            expire=config.SEARCH_CACHE_EXPIRE_IN_SECONDS,
+        )
+
+    @staticmethod
+    def search_key(version: int, *query) -> str:
+        # Searches are case-insensitive, the digest bounds the key length
+        digest = hashlib.sha1(repr(query).lower().encode()).hexdigest()
+        return f"search:{version}:{digest}"
+
+    async def get_export(self, version: int) -> dict | None:
+        """Gets the export task claimed for the catalog version, with the
+        time it was claimed at."""
+        claim = await self.cache.get(f"export:{version}")
+        if claim is None:
+            return None
+        try:
+            return json.loads(claim)
+        except ValueError:
+            # Claimed before the claim time was kept
+            claim = claim.decode() if isinstance(claim, bytes) else claim
+            return {"task_id": claim, "claimed_at": 0}
+
+    async def claim_export(self, version: int, task_id: str) -> bool:
+        """Registers the export task for the catalog version unless
+        another one has already been registered."""
+        claim = {"task_id": task_id, "claimed_at": time.time()}
+        return await self.cache.add(
+            f"export:{version}", json.dumps(claim), expire=config.EXPORT_CLAIM_TTL
+        )
+
+    async def release_export(self, version: int, task_id: str) -> None:
+        """Removes the claim of the export task, unless another task has
+        claimed the version meanwhile."""
+        claim = await self.get_export(version)
+        if claim and claim["task_id"] == task_id:
+            await self.cache.remove(f"export:{version}")
+
+
+ID_MODELS = {"menu": MenuModel, "submenu": SubMenuModel, "dish": DishModel}
+
+
+def any_id(ids: list[str]):
+    """Matches any of the ids with a single array parameter,
+    so that the statement is the same for any number of ids."""
+    return any_(bindparam("ids", ids, type_=ARRAY(UUID(as_uuid=False))))
 
 
 class MenuAccessor:
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    async def get_ids(self, type_: str) -> list[str]:
+        """Gets the ids of all the entries of the given type."""
+        model = ID_MODELS[type_]
+        async with self.session as db_session:
+            async with db_session.begin():
+                ids = await self.session.scalars(select(model.id))
+                return [str(id_) for id_ in ids]
+
+    async def get_fields(
+        self,
+        type_: str,
+        fields: Sequence[str],
+        id_: str | None = None,
+        parent_id: str | None = None,
+    ) -> list[dict]:
+        """Gets only the given answer fields of the items, by id or parent,
+        counting the children only when the counts are among the fields."""
+        columns = ANSWER_COLUMNS[type_]
+        table = columns["id"].table
+        statement = select(*(columns[field] for field in fields)).select_from(table)
+        if id_ is not None:
+            statement = statement.where(table.c.id == id_)
+        if parent_id is not None:
+            statement = statement.where(PARENT_COLUMNS[type_] == parent_id)
+        async with self.session as db_session:
+            async with db_session.begin():
+                rows = (await self.session.execute(statement)).all()
+        return [dict(zip(fields, row), id=str(row[0])) for row in rows]
+
+    async def get_catalog_version(self) -> int:
+        """Gets the version bumped by every write to the catalog tables."""
+        async with self.session as db_session:
+            async with db_session.begin():
+                version = await self.session.scalar(select(CatalogVersionModel.version))
+        return version or 0
+
+    async def get_changes(self, after_id: int, limit: int) -> list[dict]:
+        """Gets the logged catalog changes following the given one."""
+        async with self.session as db_session:
+            async with db_session.begin():
+                changes = await self.session.scalars(
+                    select(ChangeLogModel)
+                    .where(ChangeLogModel.id > after_id)
+                    .order_by(ChangeLogModel.id)
+                    .limit(limit)
+                )
+        return [
+            {
+                "id": change.id,
+                "table": change.table_name,
+                "op": change.operation,
+                "row_id": str(change.row_id) if change.row_id else None,
+                "menu_id": str(change.menu_id) if change.menu_id else None,
+                "submenu_id": str(change.submenu_id) if change.submenu_id else None,
+            }
+            for change in changes
+        ]
+
+    async def search_catalog(
+        self, query: str, limit: int = 20, offset: int = 0
+    ) -> list[dict]:
+        """Finds the dishes and submenus matching a web-search style query,
+        best matches first. Each table is searched through its own index."""
+        tsquery = func.websearch_to_tsquery("russian", query)
+        dishes = (
+            select(
+                literal("dish").label("type"),
+                dish_table.c.id,
+                dish_table.c.title,
+                dish_table.c.description,
+                dish_table.c.price,
+                submenu_table.c.menu_id,
+                dish_table.c.submenu_id,
+                func.ts_rank_cd(dish_table.c.search_vector, tsquery).label("rank"),
+            )
+            .join(submenu_table, submenu_table.c.id == dish_table.c.submenu_id)
+            .where(dish_table.c.search_vector.op("@@")(tsquery))
+        )
+        submenus = select(
+            literal("submenu"),
+            submenu_table.c.id,
+            submenu_table.c.title,
+            submenu_table.c.description,
+            cast(null(), Float),
+            submenu_table.c.menu_id,
+            cast(null(), UUID),
+            func.ts_rank_cd(submenu_table.c.search_vector, tsquery),
+        ).where(submenu_table.c.search_vector.op("@@")(tsquery))
+        statement = (
+            union_all(dishes, submenus)
+            .order_by(desc("rank"), "id")
+            .limit(limit)
+            .offset(offset)
+        )
+        async with self.session as db_session:
+            async with db_session.begin():
+                rows = (await self.session.execute(statement)).all()
+        return [
+            {
+                "type": row.type,
+                "id": str(row.id),
+                "title": row.title,
+                "description": row.description,
+                "price": str(row.price) if row.price is not None else None,
+                "menu_id": str(row.menu_id),
+                "submenu_id": str(row.submenu_id) if row.submenu_id else None,
+                "rank": row.rank,
+            }
+            for row in rows
+        ]
+
+    async def get_first_change_id(self) -> int:
+        """Gets the id of the oldest change kept in the log, or of the next
+        one logged when all of them have been pruned."""
+        last_id = func.pg_sequence_last_value(
+            cast(func.pg_get_serial_sequence("change_log", "id"), REGCLASS)
+        )
+        async with self.session as db_session:
+            async with db_session.begin():
+                return await self.session.scalar(
+                    select(
+                        func.coalesce(
+                            func.min(ChangeLogModel.id), func.coalesce(last_id, 0) + 1
+                        )
+                    )
+                )
+
+    async def get_replay_start(self, after_id: int, window: float) -> int:
+        """Gets the id to read the changes after so that the ones logged by
+        the transactions started up to `window` seconds before the given
+        change are read again, they may have committed after it."""
+        logged_at = (
+            select(ChangeLogModel.created_at)
+            .where(ChangeLogModel.id == after_id)
+            .scalar_subquery()
+        )
+        async with self.session as db_session:
+            async with db_session.begin():
+                start = await self.session.scalar(
+                    select(func.min(ChangeLogModel.id) - 1).where(
+                        ChangeLogModel.id <= after_id,
+                        ChangeLogModel.created_at
+                        > logged_at - timedelta(seconds=window),
+                    )
+                )
+        return after_id if start is None else start
+
+    async def stream_catalog(self) -> AsyncIterator[Sequence[Row]]:
+        """Streams the flattened catalog from a server-side cursor in batches.
+
+        The rows are read in one repeatable-read transaction, so the dump is
+        a consistent snapshot however long the client takes to receive it.
+        """
+        async with self.session as db_session:
+            connection = await db_session.connection(
+                execution_options={
+                    "isolation_level": "REPEATABLE READ",
+                    "postgresql_readonly": True,
+                }
+            )
+            result = await connection.stream(
+                catalog_query().execution_options(
+                    yield_per=config.EXPORT_STREAM_BATCH_SIZE
+                )
+            )
+            async for rows in result.partitions():
+                yield rows
+
     async def menu_multiple_create(self, menus_list: list[dict]) -> None:
         """Creates all menus from list"""
         menus = [
@@ -200,6 +583,18 @@ class MenuAccessor:
 
         return [submenu.to_dataclass() for submenu in submenus.unique()]
 
+    async def get_submenus_by_ids(self, ids: list[str]) -> list[SubMenu]:
+        """Gets the submenus with the given ids in one query."""
+        async with self.session as db_session:
+            async with db_session.begin():
+                submenus = await self.session.scalars(
+                    select(SubMenuModel)
+                    .where(SubMenuModel.id == any_id(ids))
+                    .options(joinedload(SubMenuModel.dishes)),
+                )
+
+        return [submenu.to_dataclass() for submenu in submenus.unique()]
+
     async def update_submenu(
         self, id_: str, title: str, description: str
     ) -> SubMenu | None:
@@ -263,15 +658,60 @@ class MenuAccessor:
                 ).first()
         return dish.to_dataclass() if dish else None
 
-    async def get_dishes(self, submenu_id: str) -> list[Dish]:
+    async def get_dishes_by_ids(self, ids: list[str]) -> list[Dish]:
+        """Gets the dishes with the given ids in one query."""
+        async with self.session as db_session:
+            async with db_session.begin():
+                dishes = await self.session.scalars(
+                    select(DishModel).where(DishModel.id == any_id(ids)),
+                )
+                return [dish.to_dataclass() for dish in dishes]
+
+    async def get_dishes(
+        self,
+        submenu_id: str,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        sort: str | None = None,
+    ) -> list[Dish]:
         """Gets a list of dishes from the database."""
         async with self.session as db_session:
             async with db_session.begin():
                 dishes = await self.session.scalars(
-                    select(DishModel).where(DishModel.submenu_id == submenu_id),
+                    filter_dishes(
+                        select(DishModel).where(DishModel.submenu_id == submenu_id),
+                        min_price,
+                        max_price,
+                        sort,
+                    ),
                 )
         return [dish.to_dataclass() for dish in dishes.unique()]
 
+    async def get_menu_dishes(
+        self,
+        menu_id: str,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        sort: str | None = None,
+    ) -> list[Dish]:
+        """Gets the dishes of all the submenus of a menu."""
+        async with self.session as db_session:
+            async with db_session.begin():
+                dishes = await self.session.scalars(
+                    filter_dishes(
+                        select(DishModel)
+                        .join(DishModel.submenu)
+                        .where(SubMenuModel.menu_id == menu_id),
+                        min_price,
+                        max_price,
+                        sort,
+                    ),
+                )
+                return [
+                    replace(dish.to_dataclass(), submenu_id=str(dish.submenu_id))
+                    for dish in dishes
+                ]
+
     async def update_dish(
         self, dish_id: str, title: str, description: str, price: str
     ) -> Dish | None:
@@ -306,3 +746,316 @@ class MenuAccessor:
                     await self.session.commit()
                     return True
         return False
+
+
+menu_table = MenuModel.__table__
+submenu_table = SubMenuModel.__table__
+dish_table = DishModel.__table__
+
+DISH_COLUMNS = (
+    dish_table.c.id,
+    dish_table.c.title,
+    dish_table.c.description,
+    dish_table.c.price,
+)
+SUBMENU_TREE_COLUMNS = (
+    submenu_table.c.id,
+    submenu_table.c.title,
+    submenu_table.c.description,
+) + DISH_COLUMNS
+MENU_TREE_COLUMNS = (
+    menu_table.c.id,
+    menu_table.c.title,
+    menu_table.c.description,
+) + SUBMENU_TREE_COLUMNS
+
+# Columns of the answer fields, the counts as correlated subqueries
+ANSWER_COLUMNS = {
+    "menu": {
+        "id": menu_table.c.id,
+        "title": menu_table.c.title,
+        "description": menu_table.c.description,
+        "submenus_count": select(func.count())
+        .where(submenu_table.c.menu_id == menu_table.c.id)
+        .scalar_subquery(),
+        "dishes_count": select(func.count())
+        .select_from(dish_table.join(submenu_table))
+        .where(submenu_table.c.menu_id == menu_table.c.id)
+        .scalar_subquery(),
+    },
+    "submenu": {
+        "id": submenu_table.c.id,
+        "title": submenu_table.c.title,
+        "description": submenu_table.c.description,
+        "dishes_count": select(func.count())
+        .where(dish_table.c.submenu_id == submenu_table.c.id)
+        .scalar_subquery(),
+    },
+    "dish": dict(zip(ANSWER_FIELDS["dish"], DISH_COLUMNS)),
+}
+PARENT_COLUMNS = {
+    "submenu": submenu_table.c.menu_id,
+    "dish": dish_table.c.submenu_id,
+}
+
+
+def menu_tree_query() -> Select:
+    """Builds a query returning menus joined with their submenus and dishes."""
+    return select(*MENU_TREE_COLUMNS).select_from(
+        menu_table.outerjoin(
+            submenu_table, submenu_table.c.menu_id == menu_table.c.id
+        ).outerjoin(dish_table, dish_table.c.submenu_id == submenu_table.c.id)
+    )
+
+
+def catalog_query() -> Select:
+    """Builds a query returning the whole catalog in export order."""
+    return menu_tree_query().order_by(
+        menu_table.c.title,
+        menu_table.c.id,
+        submenu_table.c.title,
+        submenu_table.c.id,
+        dish_table.c.title,
+        dish_table.c.id,
+    )
+
+
+def submenu_tree_query() -> Select:
+    """Builds a query returning submenus joined with their dishes."""
+    return select(*SUBMENU_TREE_COLUMNS).select_from(
+        submenu_table.outerjoin(
+            dish_table, dish_table.c.submenu_id == submenu_table.c.id
+        )
+    )
+
+
+def dish_query() -> Select:
+    """Builds a query returning dishes."""
+    return select(*DISH_COLUMNS)
+
+
+# Orderings of the dish lists, ties broken by id for a stable order
+DISH_ORDERS = {
+    "price": (dish_table.c.price, dish_table.c.id),
+    "title": (dish_table.c.title, dish_table.c.id),
+}
+
+
+def filter_dishes(
+    statement: Select,
+    min_price: float | None,
+    max_price: float | None,
+    sort: str | None,
+) -> Select:
+    """Narrows a dish query to a price range and orders it.
+
+    The bounds are cast to the column type: compared as double precision
+    a price of 9.99 would fall outside of [9.99, ...]."""
+    if min_price is not None:
+        statement = statement.where(
+            dish_table.c.price >= cast(min_price, dish_table.c.price.type)
+        )
+    if max_price is not None:
+        statement = statement.where(
+            dish_table.c.price <= cast(max_price, dish_table.c.price.type)
+        )
+    if sort is not None:
+        statement = statement.order_by(*DISH_ORDERS[sort])
+    return statement
+
+
+MENU_TREE_SQL = """
+SELECT menu.id, menu.title, menu.description,
+       submenu.id, submenu.title, submenu.description,
+       dish.id, dish.title, dish.description, dish.price
+FROM menu
+LEFT OUTER JOIN submenu ON submenu.menu_id = menu.id
+LEFT OUTER JOIN dish ON dish.submenu_id = submenu.id
+"""
+SUBMENU_TREE_SQL = """
+SELECT submenu.id, submenu.title, submenu.description,
+       dish.id, dish.title, dish.description, dish.price
+FROM submenu
+LEFT OUTER JOIN dish ON dish.submenu_id = submenu.id
+"""
+DISH_SQL = """
+SELECT dish.id, dish.title, dish.description, dish.price
+FROM dish
+"""
+
+prepared_statements.register("menu_by_id", MENU_TREE_SQL + "WHERE menu.id = $1")
+prepared_statements.register(
+    "submenu_by_id", SUBMENU_TREE_SQL + "WHERE submenu.id = $1"
+)
+prepared_statements.register(
+    "submenus_by_menu_id", SUBMENU_TREE_SQL + "WHERE submenu.menu_id = $1"
+)
+prepared_statements.register("dish_by_id", DISH_SQL + "WHERE dish.id = $1")
+prepared_statements.register(
+    "dishes_by_submenu_id", DISH_SQL + "WHERE dish.submenu_id = $1"
+)
+
+
+def rows_to_dishes(rows: Iterable[Sequence]) -> list[Dish]:
+    """Maps dish rows into records."""
+    return [Dish(str(row[0]), row[1], row[2], row[3]) for row in rows]
+
+
+def rows_to_submenus(rows: Iterable[Sequence]) -> list[SubMenu]:
+    """Maps joined submenu/dish rows into records."""
+    submenus: dict = {}
+    for row in rows:
+        submenu = submenus.get(row[0])
+        if submenu is None:
+            submenu = submenus[row[0]] = SubMenu(str(row[0]), row[1], row[2], [])
+        if row[3] is not None:
+            submenu.dishes.append(Dish(str(row[3]), row[4], row[5], row[6]))
+    return list(submenus.values())
+
+
+def rows_to_menus(rows: Iterable[Sequence]) -> list[Menu]:
+    """Maps joined menu/submenu/dish rows into records."""
+    menus: dict = {}
+    submenus: dict = {}
+    for row in rows:
+        menu = menus.get(row[0])
+        if menu is None:
+            menu = menus[row[0]] = Menu(str(row[0]), row[1], row[2], [])
+        if row[3] is None:
+            continue
+        submenu = submenus.get(row[3])
+        if submenu is None:
+            submenu = submenus[row[3]] = SubMenu(str(row[3]), row[4], row[5], [])
+            menu.submenus.append(submenu)
+        if row[6] is not None:
+            submenu.dishes.append(Dish(str(row[6]), row[7], row[8], row[9]))
+    return list(menus.values())
+
+
+class MenuCoreAccessor(MenuAccessor):
+    """Reads rows with SQLAlchemy Core and maps them straight into records,
+    skipping the ORM identity map and model instances.
+
+    With PREPARED_STATEMENTS enabled the hot single-key lookups run
+    as statements prepared once per pooled connection."""
+
+    use_prepared: bool = config.PREPARED_STATEMENTS
+
+    async def fetch(self, statement: Select) -> Sequence[Row]:
+        """Executes a Core statement and returns all rows."""
+        async with self.session as db_session:
+            async with db_session.begin():
+                connection = await db_session.connection()
+                result = await connection.execute(statement)
+                return result.all()
+
+    async def fetch_prepared(self, name: str, *args) -> list:
+        """Executes a registered prepared statement and returns all rows."""
+        async with self.session as db_session:
+            async with db_session.begin():
+                connection = await db_session.connection()
+                return await prepared_statements.fetch(connection, name, *args)
+
+    async def get_menu_by_id(self, id_: str) -> Menu | None:
+        """Gets a menu entry from the database if it exists."""
+        if self.use_prepared:
+            rows = await self.fetch_prepared("menu_by_id", id_)
+        else:
+            rows = await self.fetch(menu_tree_query().where(menu_table.c.id == id_))
+        menus = rows_to_menus(rows)
+        return menus[0] if menus else None
+
+    async def get_menus(self) -> list[Menu]:
+        """Gets a list of menus from the database."""
+        rows = await self.fetch(menu_tree_query())
+        return rows_to_menus(rows)
+
+    async def get_submenu_by_id(self, id_: str) -> SubMenu | None:
+        """Gets a submenu entry from the database if it exists."""
+        if self.use_prepared:
+            rows = await self.fetch_prepared("submenu_by_id", id_)
+        else:
+            rows = await self.fetch(
+                submenu_tree_query().where(submenu_table.c.id == id_)
+            )
+        submenus = rows_to_submenus(rows)
+        return submenus[0] if submenus else None
+
+    async def get_submenus(self, menu_id: str) -> list[SubMenu]:
+        """Gets a list of submenus from the database."""
+        if self.use_prepared:
+            rows = await self.fetch_prepared("submenus_by_menu_id", menu_id)
+        else:
+            rows = await self.fetch(
+                submenu_tree_query().where(submenu_table.c.menu_id == menu_id)
+            )
+        return rows_to_submenus(rows)
+
+    async def get_submenus_by_ids(self, ids: list[str]) -> list[SubMenu]:
+        """Gets the submenus with the given ids in one query."""
+        rows = await self.fetch(
+            submenu_tree_query().where(submenu_table.c.id == any_id(ids))
+        )
+        return rows_to_submenus(rows)
+
+    async def get_dish_by_id(self, dish_id: str) -> Dish | None:
+        """Gets a dish entry from the database if it exists."""
+        if self.use_prepared:
+            rows = await self.fetch_prepared("dish_by_id", dish_id)
+        else:
+            rows = await self.fetch(dish_query().where(dish_table.c.id == dish_id))
+        dishes = rows_to_dishes(rows)
+        return dishes[0] if dishes else None
+
+    async def get_dishes(
+        self,
+        submenu_id: str,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        sort: str | None = None,
+    ) -> list[Dish]:
+        """Gets a list of dishes from the database."""
+        filtered = (min_price, max_price, sort) != (None, None, None)
+        if self.use_prepared and not filtered:
+            rows = await self.fetch_prepared("dishes_by_submenu_id", submenu_id)
+        else:
+            rows = await self.fetch(
+                filter_dishes(
+                    dish_query().where(dish_table.c.submenu_id == submenu_id),
+                    min_price,
+                    max_price,
+                    sort,
+                )
+            )
+        return rows_to_dishes(rows)
+
+    async def get_menu_dishes(
+        self,
+        menu_id: str,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        sort: str | None = None,
+    ) -> list[Dish]:
+        """Gets the dishes of all the submenus of a menu."""
+        rows = await self.fetch(
+            filter_dishes(
+                select(*DISH_COLUMNS, dish_table.c.submenu_id)
+                .join(submenu_table, submenu_table.c.id == dish_table.c.submenu_id)
+                .where(submenu_table.c.menu_id == menu_id),
+                min_price,
+                max_price,
+                sort,
+            )
+        )
+        return [Dish(str(row[0]), row[1], row[2], row[3], str(row[4])) for row in rows]
+
+    async def get_dishes_by_ids(self, ids: list[str]) -> list[Dish]:
+        """Gets the dishes with the given ids in one query."""
+        rows = await self.fetch(dish_query().where(dish_table.c.id == any_id(ids)))
+        return rows_to_dishes(rows)
+
+
+ACCESSOR_BACKENDS: dict[str, type[MenuAccessor]] = {
+    "orm": MenuAccessor,
+    "core": MenuCoreAccessor,
+}
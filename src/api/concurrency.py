@@ -0,0 +1,168 @@
+import asyncio
+import json
+from collections.abc import Callable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core import config
+
+# Long-running jobs, they hold a slot but say nothing about the latency
+BULK_PATHS = ("/generate", "/make-xl-file", "/export.csv", "/export.ndjson")
+# Event streams stay open while mostly idle, they are not limited
+STREAM_PATHS = ("/changes", "/events")
+
+
+class AdaptiveLimit:
+    """Per-process limit on the requests in flight, adapted to their latency.
+
+    The limit grows by about one per round of requests served at the usual
+    latency and is cut by `backoff` once per round when the latency exceeds
+    `tolerance` times the baseline, the lowest latency seen lately, or when
+    requests fail. Requests of a priority are only admitted while the
+    requests in flight are under its share of the limit.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        tolerance: float,
+        backoff: float = 0.9,
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.in_flight = 0
+        self.baseline: float | None = None
+        self.decreased_at = 0.0
+        self.shed = 0
+
+    def acquire(self, share: float) -> bool:
+        """Takes a slot unless the requests in flight reach the share of the limit."""
+        if self.in_flight >= max(int(self.limit * share), 1):
+            self.shed += 1
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: float | None, failed: bool = False) -> None:
+        """Frees a slot and adapts the limit to the latency of the request."""
+        self.in_flight -= 1
+        if latency is None:
+            return
+        if self.baseline is None or latency < self.baseline:
+            self.baseline = latency
+        else:
+            # Drifts up, so that a lastingly slower database becomes the norm
+            self.baseline += (latency - self.baseline) * 0.01
+        now = asyncio.get_running_loop().time()
+        if failed or latency > self.baseline * self.tolerance:
+            # Requests started before the last decrease still see the old load
+            if now - self.decreased_at > latency:
+                self.limit = max(self.limit * self.backoff, self.min_limit)
+                self.decreased_at = now
+        elif self.in_flight + 1 >= self.limit / 2:
+            # Only grows while the limit is actually in use
+            self.limit = min(self.limit + 1 / self.limit, self.max_limit)
+
+    def stats(self) -> dict:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "baseline": self.baseline,
+            "shed": self.shed,
+        }
+
+
+class LoadShedMiddleware:
+    """Answers 503 with Retry-After to the API requests over the adaptive
+    limit, instead of queueing them on the connection pool.
+
+    Reads, mostly served from the cache, may use the whole limit, writes
+    and bulk jobs only their share of it, so they are shed first. While
+    `degraded` tells that the cache is down, reads get the "degraded"
+    share instead, as they all reach the database.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limit: AdaptiveLimit,
+        shares: dict[str, float],
+        retry_after: int,
+        degraded: Callable[[], bool] = lambda: False,
+        prefix: str = "/api/",
+    ):
+        self.app = app
+        self.limit = limit
+        self.shares = shares
+        self.degraded = degraded
+        self.retry_after = retry_after
+        self.prefix = prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "")
+        if (
+            scope["type"] != "http"
+            or not path.startswith(self.prefix)
+            or path.endswith(STREAM_PATHS)
+        ):
+            await self.app(scope, receive, send)
+            return
+        priority = self.classify(scope)
+        share = self.shares[priority]
+        if priority == "read" and self.degraded():
+            share = self.shares["degraded"]
+        if not self.limit.acquire(share):
+            await self.reject(send)
+            return
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        status = None
+
+        async def send_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            latency = loop.time() - started if priority != "bulk" else None
+            self.limit.release(latency, failed=status is None or status >= 500)
+
+    @staticmethod
+    def classify(scope: Scope) -> str:
+        if scope["path"].endswith(BULK_PATHS):
+            return "bulk"
+        if scope["method"] in ("GET", "HEAD"):
+            return "read"
+        return "write"
+
+    async def reject(self, send: Send) -> None:
+        body = json.dumps({"detail": "server is overloaded"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(self.retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+concurrency_limit = AdaptiveLimit(
+    initial=config.CONCURRENCY_INITIAL_LIMIT,
+    min_limit=config.CONCURRENCY_MIN_LIMIT,
+    max_limit=config.CONCURRENCY_MAX_LIMIT,
+    tolerance=config.CONCURRENCY_LATENCY_TOLERANCE,
+)
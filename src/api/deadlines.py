@@ -0,0 +1,149 @@
+import asyncio
+import json
+import logging
+from collections.abc import Sequence
+from contextlib import suppress
+
+from sqlalchemy.exc import DBAPIError
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.api.concurrency import STREAM_PATHS
+from src.db import cancel_backends, request_backends, request_timeout
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATE of the queries cancelled by statement_timeout
+QUERY_CANCELED = "57014"
+
+
+def query_canceled(error: DBAPIError) -> bool:
+    return getattr(error.orig, "sqlstate", None) == QUERY_CANCELED
+
+
+class RequestDeadlineMiddleware:
+    """Cancels the API requests whose client disconnected or whose
+    deadline passed, along with the queries they are running.
+
+    The deadline of a request is the one of its route by name, else the
+    read or write one. It is also the statement_timeout of its queries,
+    see get_session. Requests timed out before responding get a 504.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        routes: Sequence[BaseRoute],
+        read_timeout: float,
+        write_timeout: float,
+        route_timeouts: dict[str, float],
+        dsn: str,
+        prefix: str = "/api/",
+    ):
+        self.app = app
+        self.dsn = dsn
+        self.routes = routes
+        self.read_timeout = read_timeout
+        self.write_timeout = write_timeout
+        self.route_timeouts = route_timeouts
+        self.prefix = prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "")
+        if (
+            scope["type"] != "http"
+            or not path.startswith(self.prefix)
+            or path.endswith(STREAM_PATHS)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        timeout = self.timeout(scope)
+        messages: asyncio.Queue[Message] = asyncio.Queue()
+        started = False
+
+        async def send_started(message: Message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        # The handler task copies the context, the deadline included
+        backends: set[int] = set()
+        timeout_token = request_timeout.set(timeout)
+        backends_token = request_backends.set(backends)
+        try:
+            handler = asyncio.create_task(self.app(scope, messages.get, send_started))
+        finally:
+            request_backends.reset(backends_token)
+            request_timeout.reset(timeout_token)
+        listener = asyncio.create_task(self.listen(receive, messages))
+        try:
+            await asyncio.wait(
+                {handler, listener},
+                timeout=timeout or None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            disconnected = listener.done()
+            listener.cancel()
+
+        if not handler.done():
+            if backends:
+                try:
+                    await cancel_backends(self.dsn, backends)
+                except Exception:
+                    logger.exception("Failed to cancel the queries of a request")
+            handler.cancel()
+            # The query may fail from its cancel before the task is cancelled
+            with suppress(asyncio.CancelledError):
+                try:
+                    await handler
+                except DBAPIError as e:
+                    if not query_canceled(e):
+                        raise
+            if not disconnected and not started:
+                await self.respond_timeout(send)
+            return
+        try:
+            handler.result()
+        except DBAPIError as e:
+            if not query_canceled(e) or started:
+                raise
+            await self.respond_timeout(send)
+
+    @staticmethod
+    async def listen(receive: Receive, messages: asyncio.Queue) -> None:
+        """Passes the request messages on until the client disconnects."""
+        while True:
+            message = await receive()
+            messages.put_nowait(message)
+            if message["type"] == "http.disconnect":
+                return
+
+    def timeout(self, scope: Scope) -> float:
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                name = getattr(route, "name", None)
+                if name in self.route_timeouts:
+                    return self.route_timeouts[name]
+                break
+        if scope["method"] in ("GET", "HEAD"):
+            return self.read_timeout
+        return self.write_timeout
+
+    @staticmethod
+    async def respond_timeout(send: Send) -> None:
+        body = json.dumps({"detail": "request timed out"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 504,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
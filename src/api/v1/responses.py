@@ -0,0 +1,125 @@
+import hashlib
+import os
+from collections.abc import AsyncIterator
+from functools import lru_cache
+from http import HTTPStatus
+
+import anyio
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+@lru_cache(maxsize=1024)
+def file_hash(path: str, mtime_ns: int, size: int) -> str:
+    """Hashes the file content. Cached per file version, since exports
+    are never modified once written."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Checks an If-None-Match header against the ETag, weakly."""
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in tags
+
+
+def if_range_matches(header: str, etag: str) -> bool:
+    """Checks an If-Range header against the ETag. The comparison is
+    strong, a weak validator never matches; dates are not supported."""
+    return header.strip() == etag and not etag.startswith("W/")
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parses a single `bytes=` range into inclusive bounds.
+
+    Returns None for headers that are ignored, such as multiple ranges.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        raise RangeNotSatisfiable
+    return start, min(end, size - 1)
+
+
+async def iter_file_range(path: str, start: int, end: int) -> AsyncIterator[bytes]:
+    async with await anyio.open_file(path, "rb") as file:
+        await file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def conditional_file_response(
+    request: Request,
+    path: str,
+    media_type: str,
+    headers: dict | None = None,
+) -> Response:
+    """Serves a file with a content-hash ETag, answering conditional
+    requests with 304 and byte-range requests with 206."""
+    stat = os.stat(path)
+    digest = await run_in_threadpool(file_hash, path, stat.st_mtime_ns, stat.st_size)
+    etag = f'"{digest}"'
+    headers = {
+        **(headers or {}),
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "no-cache",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range_matches(if_range, etag)):
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except RangeNotSatisfiable:
+            return Response(
+                status_code=HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{stat.st_size}"},
+            )
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                iter_file_range(path, start, end),
+                status_code=HTTPStatus.PARTIAL_CONTENT,
+                media_type=media_type,
+                headers=headers,
+            )
+
+    return FileResponse(
+        path=path, media_type=media_type, headers=headers, stat_result=stat
+    )
@@ -1,34 +1,75 @@
 import os
+from collections.abc import Callable
 from http import HTTPStatus
+from typing import TYPE_CHECKING
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.exc import IntegrityError
 
-from celery.result import AsyncResult
+from src.accessors import ANSWER_FIELDS
+from src.api.v1.responses import conditional_file_response
 from src.api.v1.schemas import MenuCreate, MenuResponse, MenuUpdate
 from src.api.v1.schemas.menus import (
+    AutocompleteResponse,
+    BatchGetRequest,
+    DishBatchResponse,
     DishCreate,
     DishResponse,
+    DishSort,
     DishUpdate,
+    SearchResponse,
+    SubMenuBatchResponse,
     SubMenuCreate,
     SubMenuResponse,
     SubMenuUpdate,
 )
-from src.core.config import BASE_DIR, BASE_URL
+from src.core.config import BASE_URL
 from src.services import MenuService, get_menu_service
 
+if TYPE_CHECKING:
+    from celery.result import AsyncResult
+
 router = APIRouter()
 
 
+def field_set(type_: str) -> Callable:
+    """Builds the dependency reading the fields to return from the
+    comma-separated `fields` parameter, the id is always returned."""
+    allowed = ANSWER_FIELDS[type_]
+
+    def fields_dependency(
+        fields: str
+        | None = Query(default=None, description=f"Any of {', '.join(allowed)}"),
+    ) -> tuple[str, ...] | None:
+        if fields is None:
+            return None
+        requested = {field.strip() for field in fields.split(",")} - {""}
+        unknown = requested - set(allowed)
+        if unknown:
+            raise HTTPException(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail=f"unknown fields: {', '.join(sorted(unknown))}",
+            )
+        selected = tuple(
+            field for i, field in enumerate(allowed) if i == 0 or field in requested
+        )
+        return None if selected == allowed else selected
+
+    return fields_dependency
+
+
 @router.get(
     path="/",
     summary="Get menu list",
     status_code=HTTPStatus.OK,
     tags=["menus"],
 )
-async def menu_list(service: MenuService = Depends(get_menu_service)):
-    menus: list = await service.get_menu_list()
+async def menu_list(
+    fields: tuple[str, ...] | None = Depends(field_set("menu")),
+    service: MenuService = Depends(get_menu_service),
+):
+    menus: list = await service.get_menu_list(fields=fields)
     return menus
 
 
@@ -50,8 +91,10 @@ async def make_xl(service: MenuService = Depends(get_menu_service)):
     tags=["Excel"],
 )
 async def get_xl_status(task_id: str, service: MenuService = Depends(get_menu_service)):
-    result: AsyncResult = await service.get_xl_file_status(task_id)
-    if result.ready():
+    result: "AsyncResult" = await service.get_xl_file_status(task_id)
+    # Exports are shared between requests, so the file may come from a task
+    # whose state this process cannot see
+    if os.path.exists(service.get_xl_file_path(task_id)) or result.ready():
         return {
             "status": True,
             "message": f"Link to download file: {BASE_URL}/api/v1/menus/download/{task_id}",
@@ -62,6 +105,21 @@ async def get_xl_status(task_id: str, service: MenuService = Depends(get_menu_se
     }
 
 
+@router.get(
+    path="/get-xl-file/{task_id}/events",
+    status_code=HTTPStatus.OK,
+    summary="Stream the states of file preparation as server-sent events",
+    response_class=StreamingResponse,
+    tags=["Excel"],
+)
+async def get_xl_events(task_id: str, service: MenuService = Depends(get_menu_service)):
+    return StreamingResponse(
+        service.get_xl_file_events(task_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get(
     path="/download/{filename}",
     status_code=HTTPStatus.OK,
@@ -69,15 +127,136 @@ async def get_xl_status(task_id: str, service: MenuService = Depends(get_menu_se
     response_class=FileResponse,
     tags=["Excel"],
 )
-async def download_file(filename: str):
+async def download_file(filename: str, request: Request):
+    path = MenuService.get_xl_file_path(filename)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="file not found")
     headers = {"Content-Disposition": "attachment; filename=menu.xlsx"}
-    return FileResponse(
-        path=os.path.join(BASE_DIR.parent, "data", f"{filename}.xlsx"),
+    return await conditional_file_response(
+        request=request,
+        path=path,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers=headers,
     )
 
 
+@router.get(
+    path="/export.csv",
+    status_code=HTTPStatus.OK,
+    summary="Stream the whole catalog as CSV",
+    response_class=StreamingResponse,
+    tags=["export"],
+)
+async def export_csv(service: MenuService = Depends(get_menu_service)):
+    return StreamingResponse(
+        service.export_catalog_csv(),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=menu.csv"},
+    )
+
+
+@router.get(
+    path="/export.ndjson",
+    status_code=HTTPStatus.OK,
+    summary="Stream the whole catalog as newline-delimited JSON",
+    response_class=StreamingResponse,
+    tags=["export"],
+)
+async def export_ndjson(service: MenuService = Depends(get_menu_service)):
+    return StreamingResponse(
+        service.export_catalog_ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=menu.ndjson"},
+    )
+
+
+@router.get(
+    path="/changes",
+    status_code=HTTPStatus.OK,
+    summary="Stream catalog changes as server-sent events",
+    response_class=StreamingResponse,
+    tags=["changes"],
+)
+async def changes(
+    since: int | None = None,
+    follow: bool = True,
+    last_event_id: int | None = Header(default=None),
+    service: MenuService = Depends(get_menu_service),
+):
+    # EventSource sends the id of the last received event when it reconnects
+    after = last_event_id if last_event_id is not None else since
+    return StreamingResponse(
+        service.get_change_events(last_event_id=after, follow=follow),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    path="/search",
+    response_model=SearchResponse,
+    status_code=HTTPStatus.OK,
+    summary="Search dishes and submenus by title and description",
+    tags=["search"],
+)
+async def search(
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    service: MenuService = Depends(get_menu_service),
+) -> SearchResponse:
+    items = await service.search(query=q, limit=limit, offset=offset)
+    return SearchResponse(items=items)
+
+
+@router.get(
+    path="/autocomplete",
+    response_model=AutocompleteResponse,
+    status_code=HTTPStatus.OK,
+    summary="Suggest dishes and submenus by title prefix",
+    tags=["search"],
+)
+async def autocomplete(
+    q: str = Query(min_length=1, max_length=60),
+    limit: int = Query(default=10, ge=1, le=50),
+    service: MenuService = Depends(get_menu_service),
+) -> AutocompleteResponse:
+    items = await service.suggest(prefix=q, limit=limit)
+    return AutocompleteResponse(items=items)
+
+
+@router.post(
+    path="/submenus:batchGet",
+    response_model=SubMenuBatchResponse,
+    status_code=HTTPStatus.OK,
+    summary="Get many submenus by id",
+    tags=["submenus"],
+)
+async def submenu_batch_get(
+    request: BatchGetRequest,
+    service: MenuService = Depends(get_menu_service),
+) -> SubMenuBatchResponse:
+    items, missing = await service.get_submenus_by_ids(
+        [str(id_) for id_ in request.ids]
+    )
+    return SubMenuBatchResponse(items=items, missing=missing)
+
+
+@router.post(
+    path="/dishes:batchGet",
+    response_model=DishBatchResponse,
+    status_code=HTTPStatus.OK,
+    summary="Get many dishes by id",
+    tags=["dishes"],
+)
+async def dish_batch_get(
+    request: BatchGetRequest,
+    service: MenuService = Depends(get_menu_service),
+) -> DishBatchResponse:
+    items, missing = await service.get_dishes_by_ids([str(id_) for id_ in request.ids])
+    return DishBatchResponse(items=items, missing=missing)
+
+
 @router.post(
     path="/generate",
     status_code=HTTPStatus.OK,
@@ -97,19 +276,19 @@ async def generate_menu(service: MenuService = Depends(get_menu_service)):
 
 @router.get(
     path="/{menu_id}",
-    response_model=MenuResponse,
     summary="Get a specific menu",
     status_code=HTTPStatus.OK,
     tags=["menus"],
 )
 async def menu_detail(
     menu_id: str,
+    fields: tuple[str, ...] | None = Depends(field_set("menu")),
     service: MenuService = Depends(get_menu_service),
-) -> MenuResponse:
-    menu: dict | None = await service.get_menu(menu_id)
+) -> MenuResponse | dict:
+    menu: dict | None = await service.get_menu(menu_id, fields=fields)
     if not menu:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="menu not found")
-    return MenuResponse(**menu)
+    return MenuResponse(**menu) if fields is None else menu
 
 
 @router.post(
@@ -168,29 +347,32 @@ async def menu_delete(
 )
 async def submenu_list(
     menu_id: str,
+    fields: tuple[str, ...] | None = Depends(field_set("submenu")),
     service: MenuService = Depends(get_menu_service),
 ) -> list:
-    submenus: list = await service.get_submenus(menu_id=menu_id)
+    submenus: list = await service.get_submenus(menu_id=menu_id, fields=fields)
     return submenus
 
 
 @router.get(
     path="/{menu_id}/submenus/{submenu_id}",
-    response_model=SubMenuResponse,
     summary="Get a specific submenu",
     status_code=HTTPStatus.OK,
     tags=["submenus"],
 )
 async def submenu_detail(
     submenu_id: str,
+    fields: tuple[str, ...] | None = Depends(field_set("submenu")),
     service: MenuService = Depends(get_menu_service),
-) -> SubMenuResponse:
-    submenu: dict | None = await service.get_submenu(submenu_id=submenu_id)
+) -> SubMenuResponse | dict:
+    submenu: dict | None = await service.get_submenu(
+        submenu_id=submenu_id, fields=fields
+    )
     if not submenu:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail="submenu not found"
         )
-    return SubMenuResponse(**submenu)
+    return SubMenuResponse(**submenu) if fields is None else submenu
 
 
 @router.post(
@@ -221,12 +403,13 @@ async def submenu_create(
     tags=["submenus"],
 )
 async def submenu_update(
+    menu_id: str,
     submenu_id: str,
     new_data: SubMenuUpdate,
     service: MenuService = Depends(get_menu_service),
 ) -> SubMenuResponse:
     submenu: dict | None = await service.update_submenu(
-        submenu_id=submenu_id, new_data=new_data
+        menu_id=menu_id, submenu_id=submenu_id, new_data=new_data
     )
     if not submenu:
         raise HTTPException(
@@ -262,27 +445,53 @@ async def submenu_delete(
 )
 async def dish_list(
     submenu_id: str,
+    min_price: float | None = Query(default=None, ge=0),
+    max_price: float | None = Query(default=None, ge=0),
+    sort: DishSort | None = None,
+    fields: tuple[str, ...] | None = Depends(field_set("dish")),
     service: MenuService = Depends(get_menu_service),
 ) -> list:
-    dishes: list = await service.get_dishes(submenu_id)
+    dishes: list = await service.get_dishes(
+        submenu_id, min_price=min_price, max_price=max_price, sort=sort, fields=fields
+    )
+    return dishes
+
+
+@router.get(
+    path="/{menu_id}/dishes",
+    summary="Get the dishes of all the submenus of a menu",
+    status_code=HTTPStatus.OK,
+    tags=["dishes"],
+)
+async def menu_dish_list(
+    menu_id: str,
+    min_price: float | None = Query(default=None, ge=0),
+    max_price: float | None = Query(default=None, ge=0),
+    sort: DishSort | None = None,
+    fields: tuple[str, ...] | None = Depends(field_set("menu_dish")),
+    service: MenuService = Depends(get_menu_service),
+) -> list:
+    dishes: list = await service.get_menu_dishes(
+        menu_id, min_price=min_price, max_price=max_price, sort=sort, fields=fields
+    )
     return dishes
 
 
 @router.get(
     path="/{menu_id}/submenus/{submenu_id}/dishes/{dish_id}",
-    response_model=DishResponse,
     summary="Get a specific dish",
     status_code=HTTPStatus.OK,
     tags=["dishes"],
 )
 async def dish_detail(
     dish_id: str,
+    fields: tuple[str, ...] | None = Depends(field_set("dish")),
     service: MenuService = Depends(get_menu_service),
-) -> DishResponse:
-    dish: dict | None = await service.get_dish(dish_id)
+) -> DishResponse | dict:
+    dish: dict | None = await service.get_dish(dish_id, fields=fields)
     if not dish:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="dish not found")
-    return DishResponse(**dish)
+    return DishResponse(**dish) if fields is None else dish
 
 
 @router.patch(
@@ -293,11 +502,12 @@ async def dish_detail(
     tags=["dishes"],
 )
 async def dish_update(
+    submenu_id: str,
     dish_id: str,
     new_data: DishUpdate,
     service: MenuService = Depends(get_menu_service),
 ) -> DishResponse:
-    dish: dict | None = await service.update_dish(dish_id, new_data)
+    dish: dict | None = await service.update_dish(submenu_id, dish_id, new_data)
     if not dish:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="dish not found")
     return DishResponse(**dish)
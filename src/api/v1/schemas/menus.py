@@ -1,20 +1,32 @@
 import re
+from typing import Literal
 from uuid import UUID
 
 from pydantic import BaseModel, Field, validator
 
+from src.core import config
+
 __all__ = (
+    "BatchGetRequest",
+    "DishBatchResponse",
     "DishResponse",
     "DishCreate",
+    "DishSort",
     "DishUpdate",
     "MenuResponse",
     "MenuCreate",
     "MenuUpdate",
+    "AutocompleteResponse",
+    "SearchResponse",
     "SubMenuResponse",
     "SubMenuCreate",
     "SubMenuUpdate",
+    "SubMenuBatchResponse",
 )
 
+# Orderings of the dish lists
+DishSort = Literal["price", "title"]
+
 
 class DishBase(BaseModel):
     title: str = Field(max_length=60)
@@ -77,3 +89,44 @@ class SubMenuCreate(SubMenuBase):
 
 class SubMenuUpdate(SubMenuBase):
     ...
+
+
+class BatchGetRequest(BaseModel):
+    ids: list[UUID] = Field(max_items=config.BATCH_GET_MAX_IDS)
+
+
+class DishBatchResponse(BaseModel):
+    items: list[DishResponse]
+    missing: list[UUID]
+
+
+class SubMenuBatchResponse(BaseModel):
+    items: list[SubMenuResponse]
+    missing: list[UUID]
+
+
+class SearchHit(BaseModel):
+    type: str
+    id: UUID
+    title: str
+    description: str | None
+    price: str | None
+    menu_id: UUID
+    submenu_id: UUID | None
+    rank: float
+
+
+class SearchResponse(BaseModel):
+    items: list[SearchHit]
+
+
+class AutocompleteHit(BaseModel):
+    type: str
+    id: UUID
+    title: str
+    menu_id: UUID
+    submenu_id: UUID | None
+
+
+class AutocompleteResponse(BaseModel):
+    items: list[AutocompleteHit]
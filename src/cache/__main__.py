@@ -0,0 +1,53 @@
+"""Cache maintenance.
+
+    python -m src.cache warm
+    python -m src.cache flush [--type menu|submenu|dish ...]
+    python -m src.cache stats
+"""
+import argparse
+import asyncio
+
+import aioredis
+
+from src.accessors import CACHE_KEY_PATTERNS, MenuCacheAccessor
+from src.cache.warmup import CacheWarmer
+from src.core import config
+from src.db.cache import RedisCache
+
+
+async def main(args: argparse.Namespace) -> None:
+    cache = RedisCache(aioredis.from_url(config.REDIS_URL))
+    cache_accessor = MenuCacheAccessor(cache)
+    try:
+        if args.command == "warm":
+            warmer = CacheWarmer(cache, args.concurrency)
+            for type_, count in (await warmer.warm()).items():
+                print(f"{type_}: {count} cached")
+        elif args.command == "flush":
+            for type_ in args.types or CACHE_KEY_PATTERNS:
+                await cache_accessor.delete_type(type_)
+                print(f"{type_}: flushed")
+        else:
+            for type_, count in (await cache_accessor.count_keys()).items():
+                print(f"{type_}: {count} keys")
+    finally:
+        await cache.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m src.cache")
+    commands = parser.add_subparsers(dest="command", required=True)
+    warm = commands.add_parser("warm", help="preload the catalog into the cache")
+    warm.add_argument(
+        "--concurrency", type=int, default=config.CACHE_WARMUP_CONCURRENCY
+    )
+    flush = commands.add_parser("flush", help="delete cached entries by type")
+    flush.add_argument(
+        "--type",
+        dest="types",
+        action="append",
+        choices=list(CACHE_KEY_PATTERNS),
+        help="flush only this type, may be repeated",
+    )
+    commands.add_parser("stats", help="count cached keys by type")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from itertools import chain
+from typing import TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.accessors import ACCESSOR_BACKENDS, MenuCacheAccessor
+from src.core import config
+from src.db import async_session
+from src.db.cache import AbstractCache
+from src.services import MenuService
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CacheWarmer:
+    """Preloads the catalog lists and items into the cache, so that the
+    first requests after a deploy or a cache restart do not all go to
+    the database.
+
+    Each step runs in its own session, at most `concurrency` at a time.
+    """
+
+    def __init__(
+        self,
+        cache: AbstractCache,
+        concurrency: int,
+        session_factory: Callable[[], AsyncSession] = async_session,
+    ):
+        self.cache = cache
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.session_factory = session_factory
+
+    def make_service(self) -> MenuService:
+        return MenuService(
+            accessor=ACCESSOR_BACKENDS[config.ACCESSOR_BACKEND](self.session_factory()),
+            cache_accessor=MenuCacheAccessor(self.cache),
+        )
+
+    async def run(self, step: Callable[[MenuService], Awaitable[T]]) -> T:
+        async with self.semaphore:
+            return await step(self.make_service())
+
+    async def warm(self) -> dict[str, int]:
+        """Caches the menus, then the submenus and dishes under them.
+
+        Returns the number of cached items by type.
+        """
+        menu_ids = await self.run(lambda service: service.warm_menus())
+        submenu_ids = list(
+            chain.from_iterable(
+                await asyncio.gather(
+                    *(
+                        self.run(lambda service, id_=id_: service.warm_submenus(id_))
+                        for id_ in menu_ids
+                    )
+                )
+            )
+        )
+        dish_counts = await asyncio.gather(
+            *(
+                self.run(lambda service, id_=id_: service.warm_dishes(id_))
+                for id_ in submenu_ids
+            )
+        )
+        return {
+            "menu": len(menu_ids),
+            "submenu": len(submenu_ids),
+            "dish": sum(dish_counts),
+        }
+
+
+async def warm_up_cache(cache: AbstractCache) -> None:
+    """Warms the cache up, logging instead of failing on errors."""
+    try:
+        counts = await CacheWarmer(cache, config.CACHE_WARMUP_CONCURRENCY).warm()
+    except Exception:
+        logger.exception("Cache warm-up failed")
+    else:
+        logger.info("Cache warmed up: %s", counts)
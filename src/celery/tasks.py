@@ -1,9 +1,19 @@
 import json
+import multiprocessing
 import os
+import shutil
+import tempfile
+import time
+import zipfile
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from xml.sax.saxutils import escape
 
+import psycopg2
 from dotenv import load_dotenv
 from openpyxl import Workbook
-from openpyxl.styles import Border, Font, PatternFill, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Border, Font, NamedStyle, PatternFill, Side
 from openpyxl.worksheet.worksheet import Worksheet
 
 from celery import Celery
@@ -15,138 +25,582 @@ RABBITMQ_PASS: str = os.getenv("RABBITMQ_PASS", "mypass")
 
 RABBITMQ_URL = f"amqp://{RABBITMQ_USER}:{RABBITMQ_PASS}@{RABBITMQ_HOST}:5672"
 
-app = Celery("tasks", broker=RABBITMQ_URL, backend="rpc://")
+REDIS_HOST: str = os.getenv("REDIS_HOST", "redis-cache")
+REDIS_PORT: int = int(os.getenv("REDIS_PORT", 6379))
+# Results are kept in Redis, which also publishes every state change
+CELERY_RESULT_BACKEND: str = os.getenv(
+    "CELERY_RESULT_BACKEND", f"redis://{REDIS_HOST}:{REDIS_PORT}/1"
+)
+
+POSTGRES_HOST: str = os.getenv("DBHOST", "localhost")
+POSTGRES_PORT: int = int(os.getenv("DBPORT", 5432))
+POSTGRES_DB: str = os.getenv("DBNAME", "postgres")
+POSTGRES_USER: str = os.getenv("DBUSER", "postgres")
+POSTGRES_PASSWORD: str = os.getenv("DBPASSWORD", "postgres")
+
+DATABASE_URL: str = (
+    f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}"
+    f"@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+)
+# Rows fetched from the server-side cursor per round trip
+EXPORT_FETCH_SIZE: int = int(os.getenv("EXPORT_FETCH_SIZE", 2000))
+
+# "stream" appends rows to a write-only workbook, "memory" builds it cell by cell,
+# "sharded" renders menus to their own sheets in parallel processes
+EXPORT_MODE: str = os.getenv("EXPORT_MODE", "stream")
+# Processes rendering the shards of a sharded export
+EXPORT_PROCESSES: int = int(os.getenv("EXPORT_PROCESSES", os.cpu_count() or 1))
+# Shards per process, more shards even out menus of different sizes
+EXPORT_SHARDS_PER_PROCESS: int = int(os.getenv("EXPORT_SHARDS_PER_PROCESS", 4))
+# Rows written between two progress states of an export
+EXPORT_PROGRESS_EVERY: int = int(os.getenv("EXPORT_PROGRESS_EVERY", 10000))
+
+EXPORT_DIR: str = os.getenv("EXPORT_DIR", "data")
+# Export files older than this are removed, in seconds
+EXPORT_MAX_AGE: int = int(os.getenv("EXPORT_MAX_AGE", 7 * 86400))
+# Total size of kept exports, the oldest files go first when it is exceeded
+EXPORT_MAX_BYTES: int = int(os.getenv("EXPORT_MAX_BYTES", 1024**3))
+# Seconds between two evictions, which also run after every export
+EXPORT_EVICT_INTERVAL: int = int(os.getenv("EXPORT_EVICT_INTERVAL", 3600))
+
+SHEET_TITLE = "Меню"
+COLUMN_WIDTHS = {"A": 4, "B": 20, "C": 30, "D": 40, "E": 210, "F": 10}
+# Column of the first cell of a row for every level of the tree
+ROW_OFFSETS = {"menu": 0, "submenu": 1, "dish": 2}
+
+CATALOG_SELECT = """
+SELECT menu.id, menu.title, menu.description,
+       submenu.id, submenu.title, submenu.description,
+       dish.id, dish.title, dish.description, dish.price
+FROM menu
+LEFT OUTER JOIN submenu ON submenu.menu_id = menu.id
+LEFT OUTER JOIN dish ON dish.submenu_id = submenu.id
+"""
+CATALOG_ORDER = """
+ORDER BY menu.title, menu.id, submenu.title, submenu.id, dish.title, dish.id
+"""
+CATALOG_QUERY = CATALOG_SELECT + CATALOG_ORDER
+SHARD_QUERY = CATALOG_SELECT + "WHERE menu.id = ANY(%s::uuid[])" + CATALOG_ORDER
+# Menus in export order with the number of sheet rows each one takes
+MENU_SIZES_QUERY = """
+SELECT menu.id, menu.title, 1 + count(DISTINCT submenu.id) + count(dish.id)
+FROM menu
+LEFT OUTER JOIN submenu ON submenu.menu_id = menu.id
+LEFT OUTER JOIN dish ON dish.submenu_id = submenu.id
+GROUP BY menu.id
+ORDER BY menu.title, menu.id
+"""
+
+# Parts shared by all shard workbooks, copied from the first one
+WORKBOOK_COMMON_PARTS = (
+    "_rels/.rels",
+    "docProps/app.xml",
+    "docProps/core.xml",
+    "xl/styles.xml",
+    "xl/theme/theme1.xml",
+)
+SPREADSHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+RELATIONSHIPS_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PACKAGE_RELATIONSHIPS_NS = (
+    "http://schemas.openxmlformats.org/package/2006/relationships"
+)
+CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+OFFICE_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument"
+
+app = Celery("tasks", broker=RABBITMQ_URL, backend=CELERY_RESULT_BACKEND)
+# Run by the beat embedded in the worker (celery worker -B)
+app.conf.beat_schedule = {
+    "evict-exports": {"task": "tasks.evict_exports", "schedule": EXPORT_EVICT_INTERVAL}
+}
+
+
+class ExportRetention:
+    """Keeps the export directory within an age limit and a disk budget."""
+
+    def __init__(self, directory: str, max_age: int, max_bytes: int):
+        self.directory = directory
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+
+    def evict(self, keep: str | None = None) -> list[str]:
+        """Removes expired exports, then the oldest ones over the budget.
+
+        Partial files may belong to exports in progress, so they are only
+        removed once expired. Returns the removed paths.
+        """
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith((".xlsx", ".partial")):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+
+        now = time.time()
+        total = sum(size for _, size, _ in files)
+        removed = []
+        for mtime, size, path in files:
+            if keep and os.path.samefile(path, keep):
+                continue
+            expired = now - mtime > self.max_age
+            over_budget = total > self.max_bytes and not path.endswith(".partial")
+            if not (expired or over_budget):
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed.append(path)
+        return removed
+
+
+retention = ExportRetention(EXPORT_DIR, EXPORT_MAX_AGE, EXPORT_MAX_BYTES)
+
+
+@app.task
+def evict_exports() -> list[str]:
+    """Removes the exports past the retention limits, even while no new
+    export is made."""
+    return retention.evict()
 
 
 @app.task(track_started=True)
-def create_xlsx_file(data: str):
-    """Creates an Excel table with a menu based on json."""
-    menus = json.loads(data)
+def create_xlsx_file(
+    version: int | None = None,
+    data: str | None = None,
+):
+    """Creates an Excel table with a menu read from the database.
+
+    The catalog is streamed from Postgres inside a repeatable-read
+    transaction. `version` is the catalog version the export was requested
+    for. `data` is only accepted for tasks queued with the catalog as json
+    by older clients.
+    """
     id_ = app.current_task.request.id
+    path = os.path.join(EXPORT_DIR, f"{id_}.xlsx")
+    # The file appears under its final name only once it is complete
+    partial_path = f"{path}.partial"
+
+    if EXPORT_MODE == "sharded":
+        if data is not None:
+            menus = json.loads(data)
+            menu_titles = [menu["title"] for menu in menus]
+            write_sharded_workbook(
+                plan_catalog_shards(menus), menu_titles, partial_path
+            )
+        else:
+            export_sharded_database(partial_path)
+    else:
+        if data is not None:
+            rows = iter_catalog_rows(json.loads(data))
+        else:
+            rows = iter_database_rows()
+        rows = report_progress(rows)
+        if EXPORT_MODE == "stream":
+            write_streaming_workbook(rows, partial_path)
+        else:
+            write_workbook(rows, partial_path)
+    os.replace(partial_path, path)
+    retention.evict(keep=path)
+    return {"version": version, "file": f"{id_}.xlsx"}
+
+
+def report_progress(rows: Iterable[tuple]) -> Iterator[tuple]:
+    """Passes the rows through, storing the number written so far
+    as the task progress."""
+    task = app.current_task
+    for count, row in enumerate(rows, start=1):
+        if count % EXPORT_PROGRESS_EVERY == 0:
+            task.update_state(state="PROGRESS", meta={"rows": count})
+        yield row
+
+
+def iter_database_rows(
+    snapshot: str | None = None,
+    menu_ids: list[str] | None = None,
+    first_menu_index: int = 1,
+) -> Iterator[tuple]:
+    """Streams the catalog, or only the given menus, from a server-side
+    cursor as sheet rows."""
+    connection = psycopg2.connect(DATABASE_URL)
+    try:
+        connection.set_session(isolation_level="REPEATABLE READ", readonly=True)
+        if snapshot:
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION SNAPSHOT %s", (snapshot,))
+        with connection.cursor(name="catalog_export") as cursor:
+            cursor.itersize = EXPORT_FETCH_SIZE
+            if menu_ids is None:
+                cursor.execute(CATALOG_QUERY)
+            else:
+                cursor.execute(SHARD_QUERY, (menu_ids,))
+            yield from group_catalog_rows(cursor, first_menu_index)
+        connection.rollback()
+    finally:
+        connection.close()
+
+
+def export_sharded_database(path: str) -> None:
+    """Renders the catalog in parallel shards that all read the same snapshot."""
+    connection = psycopg2.connect(DATABASE_URL)
+    try:
+        connection.set_session(isolation_level="REPEATABLE READ", readonly=True)
+        with connection.cursor() as cursor:
+            # The snapshot can be imported while this transaction is open
+            cursor.execute("SELECT pg_export_snapshot()")
+            snapshot = cursor.fetchone()[0]
+            cursor.execute(MENU_SIZES_QUERY)
+            menus = cursor.fetchall()
+        shards = [
+            {"snapshot": snapshot, "menu_ids": [menu[0] for menu in part], **shard}
+            for part, shard in split_shards(menus, [menu[2] for menu in menus])
+        ]
+        write_sharded_workbook(shards, [menu[1] for menu in menus], path)
+        connection.rollback()
+    finally:
+        connection.close()
+
+
+def plan_catalog_shards(menus: list[dict]) -> list[dict]:
+    """Splits a catalog received as json into shards."""
+    sizes = [
+        1 + sum(1 + len(submenu["dishes"]) for submenu in menu["submenus"])
+        for menu in menus
+    ]
+    return [{"menus": part, **shard} for part, shard in split_shards(menus, sizes)]
+
+
+def split_shards(items: list, sizes: list[int]) -> Iterator[tuple[list, dict]]:
+    """Splits menus into contiguous parts of about the same number of rows.
+
+    Yields every part with the index of its first menu.
+    """
+    count = max(EXPORT_PROCESSES * EXPORT_SHARDS_PER_PROCESS, 1)
+    target = sum(sizes) / count
+    start = filled = 0
+    for position, size in enumerate(sizes):
+        filled += size
+        if filled >= target or position == len(sizes) - 1:
+            end = position + 1
+            yield items[start:end], {"first_menu_index": start + 1}
+            start, filled = end, 0
+
+
+def render_shard(
+    path: str,
+    first_menu_index: int,
+    snapshot: str | None = None,
+    menu_ids: list[str] | None = None,
+    menus: list[dict] | None = None,
+) -> str:
+    """Renders the menus of a shard to a workbook with a sheet per menu."""
+    if menus is not None:
+        rows = iter_catalog_rows(menus, first_menu_index)
+    else:
+        rows = iter_database_rows(snapshot, menu_ids, first_menu_index)
+    write_streaming_workbook(rows, path, sheet_per_menu=True)
+    return path
+
+
+def write_sharded_workbook(shards: list[dict], menu_titles: list[str], path: str):
+    """Renders shards in a process pool and merges them into one workbook."""
+    if not shards:
+        write_streaming_workbook(iter(()), path)
+        return
+
+    directory = os.path.dirname(path) or "."
+    with tempfile.TemporaryDirectory(dir=directory) as shard_dir:
+        # Spawned processes do not inherit the open database and broker connections
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(EXPORT_PROCESSES, mp_context=context) as pool:
+            futures = [
+                pool.submit(
+                    render_shard,
+                    path=os.path.join(shard_dir, f"{number}.xlsx"),
+                    **shard,
+                )
+                for number, shard in enumerate(shards)
+            ]
+            task = app.current_task
+            for done, future in enumerate(as_completed(futures), start=1):
+                future.result()
+                if task:
+                    meta = {"shards": done, "total": len(futures)}
+                    task.update_state(state="PROGRESS", meta=meta)
+            shard_paths = [future.result() for future in futures]
+        sheet_titles = [
+            sheet_title(index, title)
+            for index, title in enumerate(menu_titles, start=1)
+        ]
+        merge_workbooks(shard_paths, sheet_titles, path)
+
+
+def sheet_title(index: int, title: str) -> str:
+    """Makes a unique sheet title that Excel accepts."""
+    title = title.translate(str.maketrans("[]:*?/\\", "       "))
+    return f"{index}. {title}"[:31].strip().strip("'")
+
+
+def merge_workbooks(paths: list[str], sheet_titles: list[str], path: str) -> None:
+    """Merges shard workbooks into one, keeping the order of their sheets.
+
+    Shards register the same named and cell styles in the same order and
+    write strings inline, so sheets are copied into the result without
+    rewriting.
+    """
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as target:
+        with zipfile.ZipFile(paths[0]) as first:
+            for name in WORKBOOK_COMMON_PARTS:
+                target.writestr(name, first.read(name))
+
+        sheets = 0
+        for shard_path in paths:
+            with zipfile.ZipFile(shard_path) as shard:
+                names = [
+                    name
+                    for name in shard.namelist()
+                    if name.startswith("xl/worksheets/sheet")
+                ]
+                names.sort(key=lambda name: int(name[19:-4]))
+                for name in names:
+                    sheets += 1
+                    part = f"xl/worksheets/sheet{sheets}.xml"
+                    with shard.open(name) as source, target.open(part, "w") as sink:
+                        shutil.copyfileobj(source, sink, 1024 * 1024)
+        if sheets != len(sheet_titles):
+            raise ValueError(f"{sheets} sheets rendered for {len(sheet_titles)} menus")
+
+        target.writestr("xl/workbook.xml", workbook_xml(sheet_titles))
+        target.writestr("xl/_rels/workbook.xml.rels", workbook_rels_xml(sheets))
+        target.writestr("[Content_Types].xml", content_types_xml(sheets))
+
+
+def workbook_xml(sheet_titles: list[str]) -> str:
+    sheets = "".join(
+        f'<sheet name="{escape(title, {chr(34): "&quot;"})}" '
+        f'sheetId="{number}" r:id="rId{number}"/>'
+        for number, title in enumerate(sheet_titles, start=1)
+    )
+    return (
+        f'<workbook xmlns="{SPREADSHEET_NS}" xmlns:r="{RELATIONSHIPS_NS}">'
+        '<workbookPr/><bookViews><workbookView activeTab="0"/></bookViews>'
+        f"<sheets>{sheets}</sheets>"
+        '<calcPr calcId="124519" fullCalcOnLoad="1"/></workbook>'
+    )
+
+
+def workbook_rels_xml(sheets: int) -> str:
+    relationships = [
+        (f"rId{number}", "worksheet", f"/xl/worksheets/sheet{number}.xml")
+        for number in range(1, sheets + 1)
+    ]
+    relationships.append((f"rId{sheets + 1}", "styles", "styles.xml"))
+    relationships.append((f"rId{sheets + 2}", "theme", "theme/theme1.xml"))
+    return (
+        f'<Relationships xmlns="{PACKAGE_RELATIONSHIPS_NS}">'
+        + "".join(
+            f'<Relationship Type="{RELATIONSHIPS_NS}/{type_}" '
+            f'Target="{target}" Id="{id_}"/>'
+            for id_, type_, target in relationships
+        )
+        + "</Relationships>"
+    )
+
+
+def content_types_xml(sheets: int) -> str:
+    overrides = [
+        ("/xl/workbook.xml", f"{OFFICE_CONTENT_TYPE}.spreadsheetml.sheet.main+xml"),
+        ("/xl/styles.xml", f"{OFFICE_CONTENT_TYPE}.spreadsheetml.styles+xml"),
+        ("/xl/theme/theme1.xml", f"{OFFICE_CONTENT_TYPE}.theme+xml"),
+        (
+            "/docProps/core.xml",
+            "application/vnd.openxmlformats-package.core-properties+xml",
+        ),
+        ("/docProps/app.xml", f"{OFFICE_CONTENT_TYPE}.extended-properties+xml"),
+    ]
+    overrides.extend(
+        (
+            f"/xl/worksheets/sheet{number}.xml",
+            f"{OFFICE_CONTENT_TYPE}.spreadsheetml.worksheet+xml",
+        )
+        for number in range(1, sheets + 1)
+    )
+    return (
+        f'<Types xmlns="{CONTENT_TYPES_NS}">'
+        '<Default Extension="rels" '
+        'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        + "".join(
+            f'<Override PartName="{name}" ContentType="{type_}"/>'
+            for name, type_ in overrides
+        )
+        + "</Types>"
+    )
+
 
+def group_catalog_rows(
+    records: Iterable[tuple], first_menu_index: int = 1
+) -> Iterator[tuple]:
+    """Turns joined menu/submenu/dish records ordered by menu and submenu
+    into (style, index, *values) rows."""
+    menu_id = submenu_id = None
+    menu_index = first_menu_index - 1
+    sub_index = dish_index = 0
+    for record in records:
+        if record[0] != menu_id:
+            menu_id, submenu_id = record[0], None
+            menu_index += 1
+            sub_index = 0
+            yield "menu", menu_index, record[1], record[2]
+        if record[3] is None:
+            continue
+        if record[3] != submenu_id:
+            submenu_id = record[3]
+            sub_index += 1
+            dish_index = 0
+            yield "submenu", sub_index, record[4], record[5]
+        if record[6] is None:
+            continue
+        dish_index += 1
+        yield "dish", dish_index, record[7], record[8], f"{record[9]:.2f}"
+
+
+def iter_catalog_rows(
+    menus: Iterable[dict], first_menu_index: int = 1
+) -> Iterator[tuple]:
+    """Flattens the menu tree into (style, index, *values) rows in sheet order."""
+    for menu_index, menu in enumerate(menus, start=first_menu_index):
+        yield "menu", menu_index, menu["title"], menu["description"]
+        for sub_index, submenu in enumerate(menu["submenus"], start=1):
+            yield "submenu", sub_index, submenu["title"], submenu["description"]
+            for dish_index, dish in enumerate(submenu["dishes"], start=1):
+                yield (
+                    "dish",
+                    dish_index,
+                    dish["title"],
+                    dish["description"],
+                    f"{dish['price']:.2f}",
+                )
+
+
+def make_named_styles() -> list[NamedStyle]:
+    """Creates the styles shared by all cells of a level."""
+    thin = Side(border_style="thin", color="00000000")
+    double = Side(border_style="double", color="000000FF")
+    border = Border(left=thin, right=thin, top=double, bottom=double)
+    fills = {
+        "menu": PatternFill("solid", fgColor="00FF9900"),
+        "submenu": PatternFill("solid", fgColor="0099CC00"),
+        "dish": PatternFill("solid", fgColor="00FFFF99"),
+    }
+    return [
+        NamedStyle(name=name, font=Font(bold=True), fill=fill, border=border)
+        for name, fill in fills.items()
+    ]
+
+
+def write_streaming_workbook(
+    rows: Iterable[tuple], path: str, sheet_per_menu: bool = False
+) -> None:
+    """Writes rows to a write-only workbook, keeping memory flat."""
+    wb = Workbook(write_only=True)
+    for style in make_named_styles():
+        wb.add_named_style(style)
+
+    ws = None if sheet_per_menu else create_streaming_sheet(wb, SHEET_TITLE)
+
+    # append() serializes a row right away, so every level reuses its styled cells
+    levels: dict[str, list] = {}
+    for style, *values in rows:
+        if sheet_per_menu and style == "menu":
+            ws = create_streaming_sheet(wb, f"{values[0]}")
+        offset = ROW_OFFSETS[style]
+        cells = levels.get(style)
+        if cells is None:
+            cells = levels[style] = [None] * offset
+            for _ in values:
+                cell = WriteOnlyCell(ws)
+                cell.style = style
+                cells.append(cell)
+        for cell, value in zip(cells[offset:], values):
+            cell.value = value
+        ws.append(cells)
+
+    if ws is None:
+        create_streaming_sheet(wb, SHEET_TITLE)
+    wb.save(path)
+    wb.close()
+
+
+def create_streaming_sheet(wb: Workbook, title: str):
+    ws = wb.create_sheet(title)
+    for column, width in COLUMN_WIDTHS.items():
+        ws.column_dimensions[column].width = width
+    register_level_styles(ws)
+    return ws
+
+
+def register_level_styles(ws) -> list[int]:
+    """Registers the cell styles of all the levels up front, so that their
+    ids are the same in every workbook whatever rows it holds: merged
+    shards all use the styles of the first one."""
+    style_ids = []
+    for style in ROW_OFFSETS:
+        cell = WriteOnlyCell(ws)
+        cell.style = style
+        style_ids.append(cell.style_id)
+    return style_ids
+
+
+def write_workbook(rows: Iterable[tuple], path: str) -> None:
+    """Builds the whole workbook in memory and saves it."""
     wb = Workbook()
     wb.remove(wb.active)
 
-    wb.create_sheet("Меню")
+    wb.create_sheet(SHEET_TITLE)
     ws = wb.active
-    ws.column_dimensions["A"].width = 4
-    ws.column_dimensions["B"].width = 20
-    ws.column_dimensions["C"].width = 30
-    ws.column_dimensions["D"].width = 40
-    ws.column_dimensions["E"].width = 210
-    ws.column_dimensions["F"].width = 10
-
-    row = 0
+    for column, width in COLUMN_WIDTHS.items():
+        ws.column_dimensions[column].width = width
+
     thin = Side(border_style="thin", color="00000000")
     double = Side(border_style="double", color="000000FF")
     border = Border(left=thin, right=thin, top=double, bottom=double)
     font = Font(bold=True)
 
-    menu_fill = PatternFill("solid", fgColor="00FF9900")
-    submenu_fill = PatternFill("solid", fgColor="0099CC00")
-    dish_fill = PatternFill("solid", fgColor="00FFFF99")
+    fills = {
+        "menu": PatternFill("solid", fgColor="00FF9900"),
+        "submenu": PatternFill("solid", fgColor="0099CC00"),
+        "dish": PatternFill("solid", fgColor="00FFFF99"),
+    }
 
-    for menu_index, menu in enumerate(menus, start=1):
-        row += 1
-        construct_menu_cells(
+    for row, (style, *values) in enumerate(rows, start=1):
+        construct_cells(
             sheet=ws,
-            index=menu_index,
-            menu=menu,
             row=row,
+            column=ROW_OFFSETS[style] + 1,
+            values=values,
             font=font,
-            fill=menu_fill,
+            fill=fills[style],
             border=border,
         )
 
-        for sub_index, submenu in enumerate(menu["submenus"], start=1):
-            row += 1
-            construct_submenu_cells(
-                sheet=ws,
-                index=sub_index,
-                submenu=submenu,
-                row=row,
-                font=font,
-                fill=submenu_fill,
-                border=border,
-            )
-
-            for dish_index, dish in enumerate(submenu["dishes"], start=1):
-                row += 1
-                construct_dish_cells(
-                    sheet=ws,
-                    index=dish_index,
-                    dish=dish,
-                    row=row,
-                    font=font,
-                    fill=dish_fill,
-                    border=border,
-                )
-
-    wb.save(os.path.join("data", f"{id_}.xlsx"))
+    wb.save(path)
     wb.close()
 
 
-def construct_menu_cells(
-    sheet: Worksheet,
-    index: int,
-    menu: dict,
-    row: int,
-    font: Font,
-    fill: PatternFill,
-    border: Border,
-) -> None:
-    """Fills menu cells with values and formats them."""
-    menu_cells = [
-        sheet.cell(row, 1, index),
-        sheet.cell(row, 2, menu["title"]),
-        sheet.cell(row, 3, menu["description"]),
-    ]
-    for cell in menu_cells:
-        cell.font = font
-        cell.fill = fill
-        cell.border = border
-    return None
-
-
-def construct_submenu_cells(
+def construct_cells(
     sheet: Worksheet,
-    index: int,
-    submenu: dict,
     row: int,
+    column: int,
+    values: list,
     font: Font,
     fill: PatternFill,
     border: Border,
 ) -> None:
-    """Fills submenu cells with values and formats them."""
-    submenu_cells = [
-        sheet.cell(row, 2, index),
-        sheet.cell(row, 3, submenu["title"]),
-        sheet.cell(row, 4, submenu["description"]),
-    ]
-    for cell in submenu_cells:
-        cell.font = font
-        cell.fill = fill
-        cell.border = border
-    return None
-
-
-def construct_dish_cells(
-    sheet: Worksheet,
-    index: int,
-    dish: dict,
-    row: int,
-    font: Font,
-    fill: PatternFill,
-    border: Border,
-) -> None:
-    """Fills dish cells with values and formats them."""
-    dish_cells = [
-        sheet.cell(row, 3, index),
-        sheet.cell(row, 4, dish["title"]),
-        sheet.cell(row, 5, dish["description"]),
-        sheet.cell(row, 6, f"{dish['price']:.2f}"),
-    ]
-    for cell in dish_cells:
+    """Fills row cells starting at the given column with values and formats them."""
+    for offset, value in enumerate(values):
+        cell = sheet.cell(row, column + offset, value)
         cell.font = font
         cell.fill = fill
         cell.border = border
@@ -1,3 +1,4 @@
+import json
 import os
 from pathlib import Path
 
@@ -20,6 +21,94 @@ DATABASE_URL: str = (
     f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}"
     f"@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 )
+# Read path: "orm" loads rows through the models, "core" maps them into records
+ACCESSOR_BACKEND: str = os.getenv("ACCESSOR_BACKEND", "orm")
+# Prepare the hot "core" queries once per pooled connection
+PREPARED_STATEMENTS: bool = bool(int(os.getenv("PREPARED_STATEMENTS", 1)))
+
+# Seconds search results are cached for, they are keyed by catalog version
+SEARCH_CACHE_EXPIRE_IN_SECONDS: int = int(
+    os.getenv("SEARCH_CACHE_EXPIRE_IN_SECONDS", 300)
+)
+# Seconds before the autocomplete index is rebuilt to pick up writes
+# made by other processes
+AUTOCOMPLETE_MAX_AGE: float = float(os.getenv("AUTOCOMPLETE_MAX_AGE", 300))
+# Most ids resolved by one batchGet request
+BATCH_GET_MAX_IDS: int = int(os.getenv("BATCH_GET_MAX_IDS", 100))
+# Answer lookups of unknown ids from in-process Bloom filters of the ids
+ID_FILTER: bool = bool(int(os.getenv("ID_FILTER", 0)))
+# False positive rate of the id filters
+ID_FILTER_ERROR_RATE: float = float(os.getenv("ID_FILTER_ERROR_RATE", 0.01))
+# Smallest number of ids an id filter is sized for
+ID_FILTER_MIN_CAPACITY: int = int(os.getenv("ID_FILTER_MIN_CAPACITY", 10000))
+
+# Catalog change feed
+# Changes queued per client before it has to catch up from the change log
+CHANGE_FEED_QUEUE_SIZE: int = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", 1000))
+# Changes read from the change log per query when a client catches up
+CHANGE_FEED_PAGE_SIZE: int = int(os.getenv("CHANGE_FEED_PAGE_SIZE", 500))
+# Seconds between keep-alive comments of the change stream
+CHANGE_FEED_KEEPALIVE: float = float(os.getenv("CHANGE_FEED_KEEPALIVE", 15))
+# Seconds before a change whose changes are read again when catching up
+# after it, ids are taken before commit so lower ids may commit later
+CHANGE_FEED_REPLAY_WINDOW: float = float(os.getenv("CHANGE_FEED_REPLAY_WINDOW", 60))
+# Ids of the changes delivered that are remembered to skip the replayed ones
+CHANGE_FEED_RECENT_IDS: int = int(os.getenv("CHANGE_FEED_RECENT_IDS", 10000))
+# Seconds changes are kept for clients resuming the stream
+CHANGE_LOG_RETENTION: int = int(os.getenv("CHANGE_LOG_RETENTION", 7 * 86400))
+# Seconds the cache invalidator collects changes before deleting their keys
+CACHE_INVALIDATION_WINDOW: float = float(os.getenv("CACHE_INVALIDATION_WINDOW", 0.05))
+# Most keys deleted by the cache invalidator at once
+CACHE_INVALIDATION_BATCH: int = int(os.getenv("CACHE_INVALIDATION_BATCH", 500))
+
+# Load shedding
+# Answer 503 to the API requests over the adaptive concurrency limit
+LOAD_SHEDDING: bool = bool(int(os.getenv("LOAD_SHEDDING", 1)))
+# Requests in flight per process the limit starts at and stays within
+CONCURRENCY_INITIAL_LIMIT: int = int(os.getenv("CONCURRENCY_INITIAL_LIMIT", 20))
+CONCURRENCY_MIN_LIMIT: int = int(os.getenv("CONCURRENCY_MIN_LIMIT", 4))
+CONCURRENCY_MAX_LIMIT: int = int(os.getenv("CONCURRENCY_MAX_LIMIT", 200))
+# Latency, relative to the lowest one seen lately, that lowers the limit
+CONCURRENCY_LATENCY_TOLERANCE: float = float(
+    os.getenv("CONCURRENCY_LATENCY_TOLERANCE", 2)
+)
+# Shares of the limit writes and bulk jobs may use, reads may use all of it
+CONCURRENCY_WRITE_SHARE: float = float(os.getenv("CONCURRENCY_WRITE_SHARE", 0.75))
+CONCURRENCY_BULK_SHARE: float = float(os.getenv("CONCURRENCY_BULK_SHARE", 0.25))
+# Share of the reads while the cache is down and they all reach Postgres
+CONCURRENCY_DEGRADED_READ_SHARE: float = float(
+    os.getenv("CONCURRENCY_DEGRADED_READ_SHARE", 0.5)
+)
+# Seconds shed clients are told to wait before retrying
+LOAD_SHED_RETRY_AFTER: int = int(os.getenv("LOAD_SHED_RETRY_AFTER", 1))
+
+# Request deadlines
+# Seconds reads and writes may take before they are cancelled with a 504,
+# also set as the statement_timeout of their queries, 0 for no deadline
+READ_TIMEOUT: float = float(os.getenv("READ_TIMEOUT", 10))
+WRITE_TIMEOUT: float = float(os.getenv("WRITE_TIMEOUT", 30))
+# Deadlines of the routes by name, e.g. {"menu_list": 2}, over the ones above
+ROUTE_TIMEOUTS: dict[str, float] = {
+    "generate_menu": 300,
+    "export_csv": 0,
+    "export_ndjson": 0,
+} | json.loads(os.getenv("ROUTE_TIMEOUTS", "{}"))
+
+# Production server, see src/server.py
+SERVER_HOST: str = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT: int = int(os.getenv("SERVER_PORT", 8000))
+# Worker processes, 0 for one per CPU
+SERVER_WORKERS: int = int(os.getenv("SERVER_WORKERS", 0))
+# Pending connections the listening socket queues before refusing them
+SERVER_BACKLOG: int = int(os.getenv("SERVER_BACKLOG", 2048))
+# Seconds idle keep-alive connections stay open, keep it above the one
+# of the load balancer so that it never reuses a connection being closed
+SERVER_KEEP_ALIVE: int = int(os.getenv("SERVER_KEEP_ALIVE", 75))
+# Seconds the workers finish the requests in flight for on SIGTERM
+SERVER_DRAIN_TIMEOUT: float = float(os.getenv("SERVER_DRAIN_TIMEOUT", 30))
+# Proxies trusted for the X-Forwarded-* headers
+SERVER_FORWARDED_ALLOW_IPS: str = os.getenv("SERVER_FORWARDED_ALLOW_IPS", "127.0.0.1")
+
 # URL for tests
 TEST_DB_URL: str = os.getenv("TEST_DB_URL", "test-db")
 TEST_DATABASE_URL: str = f"postgresql+asyncpg://test:test@{TEST_DB_URL}:5432/test"
@@ -32,6 +121,26 @@ REDIS_HOST: str = os.getenv("REDIS_HOST", "redis-cache")
 REDIS_PORT: int = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB: int = int(os.getenv("REDIS_DB", 0))
 CACHE_EXPIRE_IN_SECONDS: int = int(os.getenv("CACHE_EXPIRE_IN_SECONDS", 600))
+# Seconds unknown ids are cached for
+CACHE_MISS_EXPIRE_IN_SECONDS: int = int(os.getenv("CACHE_MISS_EXPIRE_IN_SECONDS", 30))
+# Preload the catalog into the cache on startup
+CACHE_WARMUP: bool = bool(int(os.getenv("CACHE_WARMUP", 0)))
+# Catalog queries run at once by the cache warm-up
+CACHE_WARMUP_CONCURRENCY: int = int(os.getenv("CACHE_WARMUP_CONCURRENCY", 8))
+
+# Redis connections each process may hold, callers queue for them past that
+REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+# Seconds a caller waits for a free connection before the call fails
+REDIS_POOL_TIMEOUT: float = float(os.getenv("REDIS_POOL_TIMEOUT", 0.5))
+# Seconds of idleness after which a connection is checked before reuse
+REDIS_HEALTH_CHECK_INTERVAL: int = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30))
+# Seconds a Redis call or connection attempt may take before it fails
+REDIS_SOCKET_TIMEOUT: float = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.25))
+REDIS_CONNECT_TIMEOUT: float = float(os.getenv("REDIS_CONNECT_TIMEOUT", 0.5))
+# Consecutive cache failures after which requests skip the cache
+CACHE_BREAKER_THRESHOLD: int = int(os.getenv("CACHE_BREAKER_THRESHOLD", 5))
+# Seconds without the cache before a call probes it again
+CACHE_BREAKER_RESET_TIMEOUT: float = float(os.getenv("CACHE_BREAKER_RESET_TIMEOUT", 5))
 
 REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
 
@@ -41,3 +150,20 @@ RABBITMQ_USER: str = os.getenv("RABBITMQ_USER", "admin")
 RABBITMQ_PASS: str = os.getenv("RABBITMQ_PASS", "mypass")
 
 RABBITMQ_URL = f"amqp://{RABBITMQ_USER}:{RABBITMQ_PASS}@{RABBITMQ_HOST}:5672"
+
+# Celery results are kept in Redis, so every process sees the task states
+CELERY_RESULT_BACKEND: str = os.getenv(
+    "CELERY_RESULT_BACKEND", f"redis://{REDIS_HOST}:{REDIS_PORT}/1"
+)
+
+# Excel export
+# How long an export task is reused for the same catalog version
+EXPORT_CLAIM_TTL: int = int(os.getenv("EXPORT_CLAIM_TTL", 86400))
+# Seconds after which an export task still not done is presumed lost
+EXPORT_TASK_TIMEOUT: int = int(os.getenv("EXPORT_TASK_TIMEOUT", 3600))
+# Seconds of write silence before the export is rebuilt, 0 disables prebuilding
+EXPORT_PREBUILD_DELAY: float = float(os.getenv("EXPORT_PREBUILD_DELAY", 0))
+# Rows fetched from the server-side cursor per round trip by the CSV/NDJSON dumps
+EXPORT_STREAM_BATCH_SIZE: int = int(os.getenv("EXPORT_STREAM_BATCH_SIZE", 1000))
+# Seconds between keep-alive comments of the export event stream
+EXPORT_EVENTS_KEEPALIVE: float = float(os.getenv("EXPORT_EVENTS_KEEPALIVE", 15))
@@ -1,9 +1,20 @@
+import asyncio
+import logging
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Iterable
 
+from aioredis import BlockingConnectionPool
 from aioredis.client import Redis
+from aioredis.exceptions import RedisError
 
 from src.core import config
 
+logger = logging.getLogger(__name__)
+
+# Failures of the cache server, as opposed to bugs of the callers
+CACHE_ERRORS = (RedisError, OSError, asyncio.TimeoutError)
+
 
 class AbstractCache(ABC):
     def __init__(self, cache_instance):
@@ -22,14 +33,57 @@ class AbstractCache(ABC):
     ):
         pass
 
+    @abstractmethod
+    async def get_many(self, keys: list[str]) -> list:
+        """Gets the values of the keys in one round trip, None for misses."""
+        pass
+
+    @abstractmethod
+    async def set_many(
+        self,
+        items: dict[str, bytes | str],
+        expire: int = config.CACHE_EXPIRE_IN_SECONDS,
+    ):
+        """Sets all the keys in one round trip."""
+        pass
+
+    @abstractmethod
+    async def add(
+        self,
+        key: str,
+        value: bytes | str,
+        expire: int = config.CACHE_EXPIRE_IN_SECONDS,
+    ) -> bool:
+        """Sets the key only if it does not exist yet."""
+        pass
+
     @abstractmethod
     async def remove(self, key: str):
         pass
 
+    @abstractmethod
+    async def remove_many(self, keys: Iterable[str]):
+        """Removes all the given keys at once."""
+        pass
+
+    @abstractmethod
+    async def remove_matching(self, pattern: str):
+        """Removes the keys matching a glob-style pattern."""
+        pass
+
+    @abstractmethod
+    async def count_matching(self, pattern: str) -> int:
+        """Counts the keys matching a glob-style pattern."""
+        pass
+
     @abstractmethod
     async def close(self):
         pass
 
+    def stats(self) -> dict:
+        """Reports the state of the cache for the metrics."""
+        return {}
+
 
 class RedisCache(AbstractCache):
     async def get(self, key: str):
@@ -44,16 +98,289 @@ class RedisCache(AbstractCache):
     ):
         await self.cache.set(name=key, value=value, ex=expire)  # type: ignore
 
+    async def get_many(self, keys: list[str]) -> list:
+        if not keys:
+            return []
+        return await self.cache.mget(keys)  # type: ignore
+
+    async def set_many(
+        self,
+        items: dict[str, bytes | str],
+        expire: int = config.CACHE_EXPIRE_IN_SECONDS,
+    ):
+        # MSET cannot set expiry, the SETs are pipelined instead
+        async with self.cache.pipeline(transaction=False) as pipe:  # type: ignore
+            for key, value in items.items():
+                pipe.set(name=key, value=value, ex=expire)
+            await pipe.execute()
+
+    async def add(
+        self,
+        key: str,
+        value: bytes | str,
+        expire: int = config.CACHE_EXPIRE_IN_SECONDS,
+    ) -> bool:
+        added = await self.cache.set(  # type: ignore
+            name=key, value=value, ex=expire, nx=True
+        )
+        return bool(added)
+
     async def remove(self, key: str):
         await self.cache.delete(key)  # type: ignore
 
+    async def remove_many(self, keys: Iterable[str]):
+        keys = list(keys)
+        if keys:
+            await self.cache.delete(*keys)  # type: ignore
+
+    async def remove_matching(self, pattern: str):
+        batch = []
+        async for key in self.cache.scan_iter(match=pattern, count=1000):  # type: ignore
+            batch.append(key)
+            if len(batch) == 1000:
+                await self.cache.delete(*batch)  # type: ignore
+                batch.clear()
+        if batch:
+            await self.cache.delete(*batch)  # type: ignore
+
+    async def count_matching(self, pattern: str) -> int:
+        count = 0
+        async for _ in self.cache.scan_iter(match=pattern, count=1000):  # type: ignore
+            count += 1
+        return count
+
+    async def close(self):
+        await self.cache.close()  # type: ignore
+        await self.cache.connection_pool.disconnect()  # type: ignore
+
+    def stats(self) -> dict:
+        pool = self.cache.connection_pool  # type: ignore
+        if not isinstance(pool, BlockingConnectionPool):
+            return {}
+        # The queue holds the idle connections and None for the unopened ones
+        idle = sum(connection is not None for connection in pool.pool._queue)
+        return {
+            "max_connections": pool.max_connections,
+            "in_use": len(pool._connections) - idle,
+            "idle": idle,
+        }
+
+
+def create_redis_pool() -> BlockingConnectionPool:
+    """Bounded pool of Redis connections: past REDIS_MAX_CONNECTIONS,
+    calls wait for a connection to be released and fail after
+    REDIS_POOL_TIMEOUT, which the circuit breaker counts as a failure."""
+    return BlockingConnectionPool.from_url(
+        config.REDIS_URL,
+        max_connections=config.REDIS_MAX_CONNECTIONS,
+        timeout=config.REDIS_POOL_TIMEOUT,
+        socket_timeout=config.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=config.REDIS_CONNECT_TIMEOUT,
+        health_check_interval=config.REDIS_HEALTH_CHECK_INTERVAL,
+    )
+
+
+class CircuitBreaker:
+    """Stops calling a failing server for a while.
+
+    Closed, calls go through and `threshold` consecutive failures open the
+    breaker. Open, calls are skipped until `reset_timeout` seconds have
+    passed, then a single probe call goes through (half-open): it closes
+    the breaker if it succeeds and opens it again otherwise.
+    """
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probing = False
+        self.trips = 0
+
+    def is_open(self) -> bool:
+        """True while calls are skipped, probes included."""
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self.probing or time.monotonic() - self.opened_at < self.reset_timeout:
+            return False
+        self.probing = True
+        return True
+
+    def succeeded(self) -> bool:
+        """Records a successful call, True if it closed the breaker."""
+        self.failures = 0
+        # Calls started before the breaker opened say nothing about now
+        if self.opened_at is None or not self.probing:
+            return False
+        self.opened_at = None
+        self.probing = False
+        logger.warning("Cache is back, circuit breaker closed")
+        return True
+
+    def failed(self) -> None:
+        self.failures += 1
+        if self.probing:
+            self.opened_at = time.monotonic()
+            self.probing = False
+        elif self.opened_at is None and self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+            self.trips += 1
+            logger.warning(
+                "Cache failed %s times in a row, circuit breaker opened", self.failures
+            )
+
+    def stats(self) -> dict:
+        if self.opened_at is None:
+            state = "closed"
+        elif self.probing:
+            state = "half-open"
+        else:
+            state = "open"
+        return {"state": state, "failures": self.failures, "trips": self.trips}
+
+
+# Returned by CircuitBreakerCache.call for the skipped and failed calls
+SKIPPED = object()
+
+
+class CircuitBreakerCache(AbstractCache):
+    """Wraps a cache so that its failures become cache misses.
+
+    Once the breaker opens, reads miss, writes are dropped and requests
+    are served from the database alone, without waiting on the cache.
+    The removals skipped or failed meanwhile are replayed when the cache
+    is back, so that it serves nothing stale; past `max_pending` of them
+    the whole cache is cleared instead.
+    """
+
+    def __init__(
+        self,
+        cache_instance: AbstractCache,
+        breaker: CircuitBreaker,
+        max_pending: int = 10000,
+    ):
+        super().__init__(cache_instance)
+        self.breaker = breaker
+        self.max_pending = max_pending
+        self.pending_keys: set[str] = set()
+        self.pending_patterns: set[str] = set()
+        self.pending_overflowed = False
+
+    async def call(self, method: str, *args, **kwargs):
+        if not self.breaker.allow():
+            return SKIPPED
+        try:
+            result = await getattr(self.cache, method)(*args, **kwargs)
+        except CACHE_ERRORS as e:
+            logger.debug("Cache %s failed: %r", method, e)
+            self.breaker.failed()
+            return SKIPPED
+        if self.breaker.succeeded():
+            await self.replay_removals()
+        return result
+
+    async def get(self, key: str):
+        item = await self.call("get", key)
+        return None if item is SKIPPED else item
+
+    async def set(
+        self,
+        key: str,
+        value: bytes | str,
+        expire: int = config.CACHE_EXPIRE_IN_SECONDS,
+    ):
+        await self.call("set", key, value, expire=expire)
+
+    async def get_many(self, keys: list[str]) -> list:
+        items = await self.call("get_many", keys)
+        return [None] * len(keys) if items is SKIPPED else items
+
+    async def set_many(
+        self,
+        items: dict[str, bytes | str],
+        expire: int = config.CACHE_EXPIRE_IN_SECONDS,
+    ):
+        await self.call("set_many", items, expire=expire)
+
+    async def add(
+        self,
+        key: str,
+        value: bytes | str,
+        expire: int = config.CACHE_EXPIRE_IN_SECONDS,
+    ) -> bool:
+        # Nothing to compete with while there is no cache
+        added = await self.call("add", key, value, expire=expire)
+        return True if added is SKIPPED else added
+
+    async def remove(self, key: str):
+        await self.remove_many([key])
+
+    async def remove_many(self, keys: Iterable[str]):
+        keys = list(keys)
+        if await self.call("remove_many", keys) is SKIPPED:
+            self.pending_keys.update(keys)
+            self.check_pending()
+
+    async def remove_matching(self, pattern: str):
+        if await self.call("remove_matching", pattern) is SKIPPED:
+            self.pending_patterns.add(pattern)
+            self.check_pending()
+
+    async def count_matching(self, pattern: str) -> int:
+        count = await self.call("count_matching", pattern)
+        return 0 if count is SKIPPED else count
+
     async def close(self):
         await self.cache.close()
 
+    def check_pending(self) -> None:
+        if len(self.pending_keys) + len(self.pending_patterns) > self.max_pending:
+            self.pending_keys.clear()
+            self.pending_patterns.clear()
+            self.pending_overflowed = True
+
+    async def replay_removals(self) -> None:
+        keys, patterns = self.pending_keys, self.pending_patterns
+        overflowed = self.pending_overflowed
+        self.pending_keys, self.pending_patterns = set(), set()
+        self.pending_overflowed = False
+        try:
+            if overflowed:
+                await self.cache.remove_matching("*")
+                return
+            await self.cache.remove_many(keys)
+            for pattern in patterns:
+                await self.cache.remove_matching(pattern)
+        except CACHE_ERRORS:
+            # Kept for the next recovery
+            self.pending_keys |= keys
+            self.pending_patterns |= patterns
+            self.pending_overflowed |= overflowed
+            self.breaker.failed()
+
+    def stats(self) -> dict:
+        return (
+            self.cache.stats()
+            | self.breaker.stats()
+            | {
+                "pending_removals": -1
+                if self.pending_overflowed
+                else len(self.pending_keys) + len(self.pending_patterns)
+            }
+        )
+
+
+cache_breaker = CircuitBreaker(
+    threshold=config.CACHE_BREAKER_THRESHOLD,
+    reset_timeout=config.CACHE_BREAKER_RESET_TIMEOUT,
+)
 
-cache: AbstractCache | None = None
+cache: CircuitBreakerCache | None = None
 
 
 async def get_cache() -> AbstractCache:
     """Gets the cache instance for dependency injection."""
-    return RedisCache(cache)
+    return cache  # type: ignore
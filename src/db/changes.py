@@ -0,0 +1,221 @@
+import asyncio
+import json
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+
+import asyncpg
+
+from src.core import config
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "catalog_changes"
+
+# Ids are taken before commit, so a change with a lower id may commit after
+# the last one seen. The changes of the transactions started up to $2
+# seconds before it are read again.
+CHANGES_SINCE_SQL = """
+SELECT id, table_name AS table, operation AS op,
+       row_id::text, menu_id::text, submenu_id::text
+FROM change_log
+WHERE id > coalesce((
+    SELECT min(id) - 1 FROM change_log
+    WHERE id <= $1 AND created_at > (
+        SELECT created_at FROM change_log WHERE id = $1
+    ) - make_interval(secs => $2)
+), $1)
+ORDER BY id
+"""
+PRUNE_SQL = (
+    "DELETE FROM change_log WHERE created_at < now() - make_interval(secs => $1)"
+)
+
+CONNECTION_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.PostgresError,
+    asyncpg.InterfaceError,
+)
+
+
+class RecentIds:
+    """Ids of the last changes delivered, the changes read again from the
+    change log are skipped when they are among them."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.ids: dict[int, None] = {}
+
+    def add(self, id_: int) -> bool:
+        """Remembers the id, returns False when it was already seen."""
+        if id_ in self.ids:
+            return False
+        self.ids[id_] = None
+        if len(self.ids) > self.size:
+            del self.ids[next(iter(self.ids))]
+        return True
+
+
+class ChangeSubscription:
+    """Bounded queue of changes for one consumer.
+
+    A consumer that falls behind is flagged instead of growing the queue,
+    it is expected to catch up from the change log.
+    """
+
+    def __init__(self, size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(size)
+        self.overflowed = False
+
+    def put(self, change: dict) -> None:
+        try:
+            self.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+    def reset(self) -> None:
+        """Drops the queued changes after the consumer has caught up."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.overflowed = False
+
+
+class ChangeFeed:
+    """Listens for catalog changes on a single connection per process
+    and fans them out to the subscribers.
+
+    Changes missed while reconnecting are read back from the change log.
+    The connection is also used to check liveness and prune old changes.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = 1000,
+        check_interval: float = 30,
+        retention: int = 7 * 86400,
+        prune_interval: float = 3600,
+        replay_window: float = 60,
+        recent_ids: int = 10000,
+    ):
+        self.queue_size = queue_size
+        self.check_interval = check_interval
+        self.retention = retention
+        self.prune_interval = prune_interval
+        self.replay_window = replay_window
+        self.dsn: str | None = None
+        self.subscriptions: set[ChangeSubscription] = set()
+        # Highest change id seen, None until the first connection
+        self.last_id: int | None = None
+        self.recent = RecentIds(recent_ids)
+        self.pending: list[dict] | None = None
+        self.listener: asyncio.Task | None = None
+        self.connected = asyncio.Event()
+
+    async def start(self, dsn: str) -> None:
+        self.dsn = dsn
+        self.listener = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.listener:
+            self.listener.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.listener
+
+    async def run(self) -> None:
+        """Keeps a listening connection open, reconnecting with a backoff."""
+        delay = 1
+        while True:
+            try:
+                connection = await asyncpg.connect(
+                    self.dsn, server_settings={"application_name": "change_feed"}
+                )
+            except CONNECTION_ERRORS as e:
+                logger.warning(
+                    "Change feed cannot connect (%s), retry in %ss", e, delay
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+                continue
+
+            delay = 1
+            try:
+                await self.listen(connection)
+            except CONNECTION_ERRORS as e:
+                logger.warning("Change feed connection lost (%s)", e)
+            finally:
+                self.connected.clear()
+                connection.terminate()
+
+    async def listen(self, connection: asyncpg.Connection) -> None:
+        lost = asyncio.Event()
+        connection.add_termination_listener(lambda _: lost.set())
+
+        # Notifications are held back until the missed changes are replayed
+        self.pending = []
+        await connection.add_listener(CHANNEL, self.on_notification)
+        if self.last_id is not None:
+            await self.catch_up(connection)
+        else:
+            self.last_id = await connection.fetchval(
+                "SELECT coalesce(max(id), 0) FROM change_log"
+            )
+        pending, self.pending = self.pending, None
+        for change in pending:
+            self.dispatch(change)
+        self.connected.set()
+
+        loop = asyncio.get_running_loop()
+        pruned_at = loop.time()
+        while not lost.is_set():
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(lost.wait(), self.check_interval)
+                break
+            await connection.execute("SELECT 1", timeout=self.check_interval)
+            if loop.time() - pruned_at >= self.prune_interval:
+                await connection.execute(PRUNE_SQL, self.retention)
+                pruned_at = loop.time()
+
+    async def catch_up(self, connection: asyncpg.Connection) -> None:
+        """Replays the changes logged since the last one seen."""
+        rows = await connection.fetch(
+            CHANGES_SINCE_SQL, self.last_id, self.replay_window
+        )
+        for row in rows:
+            self.dispatch(dict(row))
+
+    def on_notification(self, connection, pid, channel, payload) -> None:
+        change = json.loads(payload)
+        if self.pending is not None:
+            self.pending.append(change)
+        else:
+            self.dispatch(change)
+
+    def dispatch(self, change: dict) -> None:
+        if not self.recent.add(change["id"]):
+            return
+        # Changes are delivered in commit order, which may differ from id order
+        self.last_id = max(self.last_id or 0, change["id"])
+        for subscription in self.subscriptions:
+            subscription.put(change)
+
+    @contextmanager
+    def subscribe(self) -> Iterator[ChangeSubscription]:
+        """Receives the changes while the context is open."""
+        subscription = ChangeSubscription(self.queue_size)
+        self.subscriptions.add(subscription)
+        try:
+            yield subscription
+        finally:
+            self.subscriptions.discard(subscription)
+
+
+change_feed = ChangeFeed(
+    queue_size=config.CHANGE_FEED_QUEUE_SIZE,
+    retention=config.CHANGE_LOG_RETENTION,
+    replay_window=config.CHANGE_FEED_REPLAY_WINDOW,
+    recent_ids=config.CHANGE_FEED_RECENT_IDS,
+)
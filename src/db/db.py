@@ -1,9 +1,14 @@
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Iterable
+from contextvars import ContextVar
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+import asyncpg
+from sqlalchemy import Connection, event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, SessionTransaction, declarative_base, sessionmaker
+from sqlalchemy.pool import ConnectionPoolEntry
 
 from src.core import config
+from src.db.statements import prepared_statements
 
 db_base = declarative_base()
 
@@ -14,13 +19,79 @@ engine = create_async_engine(
     execution_options={"isolation_level": "AUTOCOMMIT"},
 )
 
+# Only the core accessor runs the prepared statements
+if config.PREPARED_STATEMENTS and config.ACCESSOR_BACKEND == "core":
+    prepared_statements.attach(engine)
+
 async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
+# Seconds the current request may take, None outside of requests
+request_timeout: ContextVar[float | None] = ContextVar("request_timeout", default=None)
+# Server pids of the connections the current request has checked out
+request_backends: ContextVar[set[int] | None] = ContextVar(
+    "request_backends", default=None
+)
+
+
+def track_request_backends(engine: AsyncEngine) -> None:
+    """Records in request_backends the connections each request holds."""
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def checkout(dbapi_connection, record: ConnectionPoolEntry, proxy) -> None:
+        backends = request_backends.get()
+        if backends is not None:
+            pid = dbapi_connection.driver_connection.get_server_pid()
+            backends.add(pid)
+            record.info["request_backend"] = (backends, pid)
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def checkin(dbapi_connection, record: ConnectionPoolEntry) -> None:
+        backends, pid = record.info.pop("request_backend", (set(), None))
+        backends.discard(pid)
+
+
+track_request_backends(engine)
+
+
+async def cancel_backends(dsn: str, pids: Iterable[int]) -> None:
+    """Cancels the queries running on the backends, over a connection of
+    its own, as the pool may be exhausted by the very queries to cancel.
+
+    Cancelling the task awaiting a query is not enough: the cancel request
+    asyncpg sends for it is dropped when the connection is torn down.
+    """
+    connection = await asyncpg.connect(dsn)
+    try:
+        await connection.execute(
+            "SELECT pg_cancel_backend(pid) FROM unnest($1::int[]) AS pid", list(pids)
+        )
+    finally:
+        await connection.close()
+
+
+@event.listens_for(Session, "after_begin")
+def set_statement_timeout(
+    session: Session, transaction: SessionTransaction, connection: Connection
+) -> None:
+    """Bounds the queries of the session by the deadline of its request.
+
+    The setting stays on the pooled connection, so it is only sent when
+    it differs from the one of the previous session using the connection.
+    """
+    timeout = session.info.get("statement_timeout", 0)
+    info = connection.connection.info
+    if info.get("statement_timeout", 0) != timeout:
+        connection.exec_driver_sql(f"SET statement_timeout = {int(timeout * 1000)}")
+        info["statement_timeout"] = timeout
+
 
 async def get_session() -> AsyncGenerator:
     """Gets the db-session for dependency injection."""
     try:
         session: AsyncSession = async_session()
+        timeout = request_timeout.get()
+        if timeout:
+            session.info["statement_timeout"] = timeout
         yield session
     finally:
         await session.close()
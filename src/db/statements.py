@@ -0,0 +1,75 @@
+from asyncpg import Connection, PostgresError, Record
+from asyncpg.exceptions import InvalidCachedStatementError, OutdatedSchemaCacheError
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+
+class PreparedStatementRegistry:
+    """Prepares hot queries once per pooled asyncpg connection
+    and executes them by name."""
+
+    info_key = "prepared_statements"
+
+    def __init__(self):
+        self.queries: dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def register(self, name: str, query: str) -> None:
+        """Adds a query to be prepared on every new connection."""
+        self.queries[name] = query
+
+    async def prepare_all(self, connection: Connection) -> dict:
+        """Prepares all registered queries on the given connection.
+
+        Queries that cannot be prepared yet, e.g. before the migrations
+        created their tables, are left to be prepared on first use.
+        """
+        statements = {}
+        for name, query in self.queries.items():
+            try:
+                statements[name] = await connection.prepare(query)
+            except PostgresError:
+                pass
+        return statements
+
+    def attach(self, engine: AsyncEngine) -> None:
+        """Prepares the registered queries whenever the pool opens a connection."""
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def prepare_on_connect(dbapi_connection, connection_record):
+            connection_record.info[self.info_key] = dbapi_connection.run_async(
+                self.prepare_all
+            )
+
+    async def fetch(
+        self, connection: AsyncConnection, name: str, *args
+    ) -> list[Record]:
+        """Executes a prepared query by name, preparing it on a cache miss."""
+        raw_connection = await connection.get_raw_connection()
+        statements = raw_connection.info.setdefault(self.info_key, {})
+        statement = statements.get(name)
+        if statement is not None:
+            self.hits += 1
+            try:
+                return await statement.fetch(*args)
+            except (InvalidCachedStatementError, OutdatedSchemaCacheError):
+                # The schema changed under the statement, prepare it again
+                pass
+        self.misses += 1
+        statement = await raw_connection.driver_connection.prepare(self.queries[name])
+        statements[name] = statement
+        return await statement.fetch(*args)
+
+    def stats(self) -> dict:
+        """Returns prepared-statement cache counters."""
+        total = self.hits + self.misses
+        return {
+            "queries": len(self.queries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+        }
+
+
+prepared_statements = PreparedStatementRegistry()
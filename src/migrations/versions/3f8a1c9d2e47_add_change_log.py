@@ -0,0 +1,116 @@
+"""Add change log
+
+Revision ID: 3f8a1c9d2e47
+Revises: 65b4ac003f1c
+Create Date: 2026-10-19 17:02:41.503218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "3f8a1c9d2e47"
+down_revision = "65b4ac003f1c"
+branch_labels = None
+depends_on = None
+
+TABLES = ("menu", "submenu", "dish")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "change_log",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column("table_name", sa.Text(), nullable=False),
+        sa.Column("operation", sa.Text(), nullable=False),
+        sa.Column("row_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("menu_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("submenu_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_change_log_created_at", "change_log", ["created_at"])
+    # Rows point at the menu and submenu they belong to. The submenu of a
+    # deleted dish may be gone already when the delete cascades from it,
+    # the submenu change itself carries the menu then.
+    op.execute(
+        """
+        CREATE FUNCTION log_catalog_change() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            data jsonb;
+            change change_log%ROWTYPE;
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                INSERT INTO change_log (table_name, operation)
+                VALUES (TG_TABLE_NAME, TG_OP)
+                RETURNING * INTO change;
+            ELSE
+                IF TG_OP = 'DELETE' THEN
+                    data := to_jsonb(OLD);
+                ELSE
+                    data := to_jsonb(NEW);
+                END IF;
+                change.row_id := data ->> 'id';
+                IF TG_TABLE_NAME = 'menu' THEN
+                    change.menu_id := change.row_id;
+                ELSIF TG_TABLE_NAME = 'submenu' THEN
+                    change.menu_id := data ->> 'menu_id';
+                    change.submenu_id := change.row_id;
+                ELSE
+                    change.submenu_id := data ->> 'submenu_id';
+                    SELECT menu_id INTO change.menu_id
+                    FROM submenu WHERE id = change.submenu_id;
+                END IF;
+                INSERT INTO change_log
+                    (table_name, operation, row_id, menu_id, submenu_id)
+                VALUES (
+                    TG_TABLE_NAME, TG_OP,
+                    change.row_id, change.menu_id, change.submenu_id
+                )
+                RETURNING * INTO change;
+            END IF;
+            PERFORM pg_notify('catalog_changes', json_build_object(
+                'id', change.id,
+                'table', change.table_name,
+                'op', change.operation,
+                'row_id', change.row_id,
+                'menu_id', change.menu_id,
+                'submenu_id', change.submenu_id
+            )::text);
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    for table in TABLES:
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_change_log
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION log_catalog_change()
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_change_log_truncate
+            AFTER TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION log_catalog_change()
+            """
+        )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER {table}_change_log_truncate ON {table}")
+        op.execute(f"DROP TRIGGER {table}_change_log ON {table}")
+    op.execute("DROP FUNCTION log_catalog_change()")
+    op.drop_index("ix_change_log_created_at", table_name="change_log")
+    op.drop_table("change_log")
@@ -0,0 +1,55 @@
+"""Add dish covering indexes
+
+Revision ID: 5d1e9b3a7c42
+Revises: 7b2e5d8c4a19
+Create Date: 2026-10-19 20:41:55.208314
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5d1e9b3a7c42"
+down_revision = "7b2e5d8c4a19"
+branch_labels = None
+depends_on = None
+
+# Each index holds every column the dish lists read, so that the price and title
+# range scans of a submenu never visit the table
+INDEXES = {
+    "ix_dish_submenu_id_price": (
+        ["submenu_id", "price"],
+        ["id", "title", "description"],
+    ),
+    "ix_dish_submenu_id_title": (
+        ["submenu_id", "title"],
+        ["id", "description", "price"],
+    ),
+}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, (columns, include) in INDEXES.items():
+            op.create_index(
+                name,
+                "dish",
+                columns,
+                postgresql_include=include,
+                postgresql_concurrently=True,
+            )
+        # Superseded by the leading column of the new indexes
+        op.drop_index("ix_dish_submenu_id", "dish", postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_dish_submenu_id",
+            "dish",
+            ["submenu_id"],
+            postgresql_concurrently=True,
+        )
+        for name in INDEXES:
+            op.drop_index(name, "dish", postgresql_concurrently=True)
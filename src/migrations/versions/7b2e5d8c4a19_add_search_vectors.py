@@ -0,0 +1,58 @@
+"""Add search vectors
+
+Revision ID: 7b2e5d8c4a19
+Revises: 3f8a1c9d2e47
+Create Date: 2026-10-19 19:24:08.116530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "7b2e5d8c4a19"
+down_revision = "3f8a1c9d2e47"
+branch_labels = None
+depends_on = None
+
+TABLES = ("submenu", "dish")
+# The catalog text is Cyrillic, titles rank above descriptions
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column(
+                "search_vector",
+                postgresql.TSVECTOR(),
+                sa.Computed(SEARCH_VECTOR, persisted=True),
+                nullable=True,
+            ),
+        )
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.create_index(
+                f"ix_{table}_search_vector",
+                table,
+                ["search_vector"],
+                postgresql_using="gin",
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.drop_index(
+                f"ix_{table}_search_vector",
+                table_name=table,
+                postgresql_concurrently=True,
+            )
+    for table in TABLES:
+        op.drop_column(table, "search_vector")
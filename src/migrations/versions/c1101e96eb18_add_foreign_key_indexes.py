@@ -0,0 +1,39 @@
+"""Add foreign key indexes
+
+Revision ID: c1101e96eb18
+Revises: 9edc3529b872
+Create Date: 2026-10-19 10:12:41.503218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c1101e96eb18"
+down_revision = "9edc3529b872"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_submenu_menu_id",
+            "submenu",
+            ["menu_id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_dish_submenu_id",
+            "dish",
+            ["submenu_id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_dish_submenu_id", "dish", postgresql_concurrently=True)
+        op.drop_index("ix_submenu_menu_id", "submenu", postgresql_concurrently=True)
@@ -1 +1,2 @@
+from .catalog import *
 from .menu import *
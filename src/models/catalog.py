@@ -0,0 +1,41 @@
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    CheckConstraint,
+    Column,
+    DateTime,
+    Identity,
+    Text,
+    func,
+    true,
+)
+from sqlalchemy.dialects.postgresql import UUID
+
+from src.db import db_base
+
+
+class CatalogVersionModel(db_base):
+    """Single-row counter bumped by triggers on every catalog write."""
+
+    __tablename__ = "catalog_version"
+    __table_args__ = (CheckConstraint("id", name="catalog_version_single_row"),)
+
+    id = Column(Boolean, primary_key=True, server_default=true())
+    version = Column(BigInteger, nullable=False, server_default="0")
+
+
+class ChangeLogModel(db_base):
+    """Catalog row changes recorded by triggers, replayed to change feed
+    clients that reconnect."""
+
+    __tablename__ = "change_log"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    table_name = Column(Text, nullable=False)
+    operation = Column(Text, nullable=False)
+    row_id = Column(UUID(as_uuid=True))
+    menu_id = Column(UUID(as_uuid=True))
+    submenu_id = Column(UUID(as_uuid=True))
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), index=True
+    )
@@ -1,22 +1,30 @@
 import uuid
 from dataclasses import dataclass
 
-from sqlalchemy import Column, Float, ForeignKey, String
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, Float, ForeignKey, Index, String
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred, relationship
 
 from src.db import db_base
 
+# Full-text search document, titles ranking above descriptions
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'B')"
+)
 
-@dataclass
+
+@dataclass(slots=True)
 class Dish:
     id: str
     title: str
     description: str
     price: float
+    # Only set by the queries spanning several submenus
+    submenu_id: str | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class SubMenu:
     id: str
     title: str
@@ -24,7 +32,7 @@ class SubMenu:
     dishes: list[Dish]
 
 
-@dataclass
+@dataclass(slots=True)
 class Menu:
     id: str
     title: str
@@ -56,6 +64,9 @@ class MenuModel(db_base):
 
 class SubMenuModel(db_base):
     __tablename__ = "submenu"
+    __table_args__ = (
+        Index("ix_submenu_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String(60), nullable=False, unique=False)
@@ -64,7 +75,9 @@ class SubMenuModel(db_base):
         UUID,
         ForeignKey("menu.id", ondelete="CASCADE"),
         nullable=False,
+        index=True,
     )
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR)))
     menu = relationship("MenuModel", back_populates="submenus")
     dishes = relationship(
         "DishModel",
@@ -84,6 +97,21 @@ class SubMenuModel(db_base):
 
 class DishModel(db_base):
     __tablename__ = "dish"
+    __table_args__ = (
+        Index("ix_dish_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_dish_submenu_id_price",
+            "submenu_id",
+            "price",
+            postgresql_include=["id", "title", "description"],
+        ),
+        Index(
+            "ix_dish_submenu_id_title",
+            "submenu_id",
+            "title",
+            postgresql_include=["id", "description", "price"],
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String(60), nullable=False, unique=False)
@@ -94,6 +122,7 @@ class DishModel(db_base):
         ForeignKey("submenu.id", ondelete="CASCADE"),
         nullable=False,
     )
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR)))
     submenu = relationship("SubMenuModel", back_populates="dishes")
 
     def to_dataclass(self) -> Dish:
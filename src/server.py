@@ -0,0 +1,96 @@
+"""Production server.
+
+    python -m src.server
+
+Starts SERVER_WORKERS uvicorn workers, one per CPU by default, sharing
+the listening socket. Workers are spawned and import main:app on their
+own, so each one creates its engine, connection pools and caches after
+it starts, none of them are inherited from the parent. On SIGTERM the
+workers stop accepting connections and finish the requests in flight,
+for up to SERVER_DRAIN_TIMEOUT seconds.
+"""
+import asyncio
+import importlib.util
+import logging
+import os
+from socket import socket
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from src.core import config
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def cpu_count() -> int:
+    """CPUs this process may run on, which containers may restrict."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class DrainingServer(uvicorn.Server):
+    """Server whose shutdown waits for the requests in flight for at most
+    `drain_timeout` seconds, then drops the connections still open."""
+
+    def __init__(self, config: uvicorn.Config, drain_timeout: float):
+        super().__init__(config)
+        self.drain_timeout = drain_timeout
+
+    async def shutdown(self, sockets: list[socket] | None = None) -> None:
+        loop = asyncio.get_running_loop()
+        timer = loop.call_later(self.drain_timeout, self.drop_connections)
+        try:
+            await super().shutdown(sockets)
+        finally:
+            timer.cancel()
+
+    def drop_connections(self) -> None:
+        connections = list(self.server_state.connections)
+        if connections:
+            logger.warning("Dropping %s connections after drain", len(connections))
+        for connection in connections:
+            connection.transport.abort()
+
+
+class Supervisor(Multiprocess):
+    """Stops all the workers at once, so that they drain in parallel
+    instead of one after the other."""
+
+    def shutdown(self) -> None:
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+
+
+def build_config() -> uvicorn.Config:
+    return uvicorn.Config(
+        # Imported by the workers, the parent never loads the app
+        "main:app",
+        host=config.SERVER_HOST,
+        port=config.SERVER_PORT,
+        workers=config.SERVER_WORKERS or cpu_count(),
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        lifespan="on",
+        backlog=config.SERVER_BACKLOG,
+        timeout_keep_alive=config.SERVER_KEEP_ALIVE,
+        proxy_headers=True,
+        forwarded_allow_ips=config.SERVER_FORWARDED_ALLOW_IPS,
+    )
+
+
+def run() -> None:
+    server_config = build_config()
+    server = DrainingServer(server_config, drain_timeout=config.SERVER_DRAIN_TIMEOUT)
+    if server_config.workers == 1:
+        server.run()
+        return
+    sock = server_config.bind_socket()
+    Supervisor(server_config, target=server.run, sockets=[sock]).run()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import sys
+from bisect import bisect_left
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+
+from src.core import config
+from src.models import Menu
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True, frozen=True)
+class Suggestion:
+    type: str
+    id: str
+    title: str
+    menu_id: str
+    submenu_id: str | None
+
+
+def normalize(text: str) -> str:
+    """Case-folds the text, treating ё as е, with single spaces."""
+    return " ".join(text.casefold().replace("ё", "е").split())
+
+
+def title_keys(title: str) -> list[str]:
+    """Gets the keys a title is found by: the title from each word on."""
+    words = normalize(title).split(" ")
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+class PrefixIndex:
+    """In-process prefix index over the dish and submenu titles.
+
+    Keys are kept in a sorted list searched with bisect, the suggestion at
+    the same position is shared by all the keys of a title. The index is
+    built on first use, patched by the write paths of this process and
+    rebuilt in the background once older than `max_age`, which bounds how
+    long writes made by other processes stay unseen.
+    """
+
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        self.keys: list[str] = []
+        self.suggestions: list[Suggestion] = []
+        self.built_at: float | None = None
+        self.building: asyncio.Task | None = None
+        # Set by writes the build in progress may have missed
+        self.changed = False
+
+    async def search(
+        self,
+        prefix: str,
+        limit: int,
+        load: Callable[[], Awaitable[list[Menu]]],
+    ) -> list[dict]:
+        """Gets the suggestions whose title has a word starting with the prefix."""
+        await self.refresh(load)
+        prefix = normalize(prefix)
+        found: dict[tuple[str, str], Suggestion] = {}
+        position = bisect_left(self.keys, prefix)
+        while (
+            position < len(self.keys)
+            and self.keys[position].startswith(prefix)
+            and len(found) < limit
+        ):
+            suggestion = self.suggestions[position]
+            found.setdefault((suggestion.type, suggestion.id), suggestion)
+            position += 1
+        return [asdict(suggestion) for suggestion in found.values()]
+
+    async def refresh(self, load: Callable[[], Awaitable[list[Menu]]]) -> None:
+        loop = asyncio.get_running_loop()
+        if self.built_at is not None and loop.time() - self.built_at < self.max_age:
+            return
+        if self.building is None:
+            self.building = asyncio.create_task(self.build(load))
+        # Only the first build is waited for, later ones serve the old index
+        if self.built_at is None:
+            await asyncio.shield(self.building)
+
+    async def build(self, load: Callable[[], Awaitable[list[Menu]]]) -> None:
+        try:
+            self.changed = False
+            started_at = asyncio.get_running_loop().time()
+            menus = await load()
+            pairs = []
+            for menu in menus:
+                for submenu in menu.submenus:
+                    suggestions = [
+                        Suggestion("submenu", submenu.id, submenu.title, menu.id, None)
+                    ]
+                    suggestions.extend(
+                        Suggestion("dish", dish.id, dish.title, menu.id, submenu.id)
+                        for dish in submenu.dishes
+                    )
+                    for suggestion in suggestions:
+                        for key in title_keys(suggestion.title):
+                            pairs.append((key, suggestion))
+            pairs.sort(key=lambda pair: pair[0])
+            self.keys = [key for key, _ in pairs]
+            self.suggestions = [suggestion for _, suggestion in pairs]
+            self.built_at = started_at
+            if self.changed:
+                self.expire()
+        except Exception:
+            logger.exception("Failed to build the autocomplete index")
+        finally:
+            self.building = None
+
+    def add(self, suggestion: Suggestion) -> None:
+        """Adds a created submenu or dish."""
+        self.changed = True
+        if self.built_at is None:
+            return
+        for key in title_keys(suggestion.title):
+            position = bisect_left(self.keys, key)
+            self.keys.insert(position, key)
+            self.suggestions.insert(position, suggestion)
+
+    def rename(self, type_: str, id_: str, title: str) -> None:
+        """Updates the title of a submenu or dish."""
+        self.changed = True
+        current = self.find(type_, id_)
+        if current is not None:
+            self.remove(type_, id_)
+            self.add(Suggestion(type_, id_, title, current.menu_id, current.submenu_id))
+
+    def remove(self, type_: str, id_: str) -> None:
+        """Removes a deleted menu, submenu or dish with everything under it."""
+        self.changed = True
+        kept = [
+            (key, suggestion)
+            for key, suggestion in zip(self.keys, self.suggestions)
+            if not (
+                (suggestion.type == type_ and suggestion.id == id_)
+                or (type_ == "menu" and suggestion.menu_id == id_)
+                or (type_ == "submenu" and suggestion.submenu_id == id_)
+            )
+        ]
+        self.keys = [key for key, _ in kept]
+        self.suggestions = [suggestion for _, suggestion in kept]
+
+    def find(self, type_: str, id_: str) -> Suggestion | None:
+        for suggestion in self.suggestions:
+            if suggestion.type == type_ and suggestion.id == id_:
+                return suggestion
+        return None
+
+    def clear(self) -> None:
+        """Drops the index, it is built again on next use."""
+        self.keys = []
+        self.suggestions = []
+        self.built_at = None
+
+    def expire(self) -> None:
+        """Rebuilds the index on next use, after bulk writes."""
+        self.changed = True
+        if self.built_at is not None:
+            self.built_at -= self.max_age
+
+    def stats(self) -> dict:
+        """Reports the size of the index and its approximate memory footprint."""
+        unique = {id(suggestion): suggestion for suggestion in self.suggestions}
+        size = sys.getsizeof(self.keys) + sys.getsizeof(self.suggestions)
+        size += sum(sys.getsizeof(key) for key in self.keys)
+        for suggestion in unique.values():
+            size += sys.getsizeof(suggestion)
+            size += sum(
+                sys.getsizeof(getattr(suggestion, field))
+                for field in ("id", "title", "menu_id", "submenu_id")
+            )
+        return {"suggestions": len(unique), "keys": len(self.keys), "bytes": size}
+
+
+autocomplete = PrefixIndex(config.AUTOCOMPLETE_MAX_AGE)
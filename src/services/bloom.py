@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+import logging
+import math
+from collections.abc import Callable
+from contextlib import suppress
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.accessors import ACCESSOR_BACKENDS
+from src.core import config
+from src.db.changes import ChangeFeed, change_feed
+
+logger = logging.getLogger(__name__)
+
+ID_TYPES = ("menu", "submenu", "dish")
+
+
+class BloomFilter:
+    """Set of strings answering "definitely absent" or "maybe present"."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 64)
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, item: str) -> list[int]:
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.lower().encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(item)
+        )
+
+
+class IdFilters:
+    """Per-process Bloom filters of the menu, submenu and dish ids,
+    letting lookups of unknown ids be answered without any I/O.
+
+    The filters are built from the database and then kept up to date
+    from the change feed, so rows inserted by other processes or bypassing
+    the API are added too. Until the filters are built every id may exist.
+    """
+
+    def __init__(self, feed: ChangeFeed, error_rate: float, min_capacity: int):
+        self.feed = feed
+        self.error_rate = error_rate
+        self.min_capacity = min_capacity
+        self.filters: dict[str, BloomFilter] = {}
+        self.session_factory: Callable[[], AsyncSession] | None = None
+        self.listener: asyncio.Task | None = None
+        self.ready = asyncio.Event()
+
+    async def start(self, session_factory: Callable[[], AsyncSession]) -> None:
+        self.session_factory = session_factory
+        self.listener = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.listener:
+            self.listener.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.listener
+        self.filters = {}
+        self.ready.clear()
+
+    async def run(self) -> None:
+        # Subscribed before reading the ids, so that no insert is missed
+        with self.feed.subscribe() as subscription:
+            await self.rebuild()
+            while True:
+                if subscription.overflowed:
+                    # Inserts may have been missed, every id may exist again
+                    self.filters = {}
+                    subscription.reset()
+                    await self.rebuild()
+                    continue
+                self.apply(await subscription.get())
+
+    def apply(self, change: dict) -> None:
+        if change["op"] == "INSERT" and change["table"] in self.filters:
+            self.add(change["table"], change["row_id"])
+
+    async def rebuild(self) -> None:
+        """Builds the filters from the ids stored in the database."""
+        delay = 1
+        while True:
+            try:
+                accessor = ACCESSOR_BACKENDS[config.ACCESSOR_BACKEND](
+                    self.session_factory()  # type: ignore
+                )
+                filters = {}
+                for type_ in ID_TYPES:
+                    ids = await accessor.get_ids(type_)
+                    filters[type_] = BloomFilter(
+                        max(2 * len(ids), self.min_capacity), self.error_rate
+                    )
+                    for id_ in ids:
+                        filters[type_].add(id_)
+                break
+            except Exception:
+                logger.exception("Failed to build the id filters, retry in %ss", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+        self.filters = filters
+        self.ready.set()
+
+    def add(self, type_: str, id_: str) -> None:
+        if type_ in self.filters:
+            self.filters[type_].add(str(id_))
+
+    def might_exist(self, type_: str, id_: str) -> bool:
+        """False only for ids that are definitely not in the database."""
+        id_filter = self.filters.get(type_)
+        return id_filter is None or str(id_) in id_filter
+
+
+id_filters = IdFilters(
+    change_feed,
+    error_rate=config.ID_FILTER_ERROR_RATE,
+    min_capacity=config.ID_FILTER_MIN_CAPACITY,
+)
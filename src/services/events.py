@@ -0,0 +1,103 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+
+import aioredis
+from aioredis.client import Redis
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(data: dict, event: str | None = None, id_: str | None = None) -> str:
+    """Formats a server-sent event."""
+    lines = []
+    if id_ is not None:
+        lines.append(f"id: {id_}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class TaskEventHub:
+    """Fans task state changes out to the clients waiting for them.
+
+    The Celery result backend publishes every state it stores on the key of
+    the task, a single pattern subscription per process relays the states
+    to local subscribers.
+    """
+
+    prefix = "celery-task-meta-"
+
+    def __init__(self):
+        self.redis: Redis | None = None
+        self.subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self.listener: asyncio.Task | None = None
+
+    async def start(self, url: str) -> None:
+        self.redis = aioredis.from_url(url)
+        self.listener = asyncio.create_task(self.listen())
+
+    async def stop(self) -> None:
+        if self.listener:
+            self.listener.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.listener
+        if self.redis:
+            await self.redis.close()
+
+    async def listen(self) -> None:
+        """Relays published states, subscribing again after connection errors."""
+        delay = 1
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:  # type: ignore
+                    await pubsub.psubscribe(f"{self.prefix}*")
+                    delay = 1
+                    # States published while disconnected are only stored
+                    await self.resync()
+                    async for message in pubsub.listen():
+                        if message["type"] == "pmessage":
+                            channel = message["channel"].decode()
+                            task_id = channel.removeprefix(self.prefix)
+                            self.dispatch(task_id, json.loads(message["data"]))
+            except (aioredis.ConnectionError, OSError):
+                logger.warning("Task event subscription lost, retrying in %ss", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    async def resync(self) -> None:
+        """Sends the stored state of every awaited task to its subscribers."""
+        for task_id in list(self.subscribers):
+            meta = await self.get_state(task_id)
+            if meta:
+                self.dispatch(task_id, meta)
+
+    def dispatch(self, task_id: str, meta: dict) -> None:
+        for queue in self.subscribers.get(task_id, ()):
+            queue.put_nowait(meta)
+
+    @contextmanager
+    def subscribe(self, task_id: str) -> Iterator[asyncio.Queue]:
+        """Receives the states of the task while the context is open."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self.subscribers[task_id].add(queue)
+        try:
+            yield queue
+        finally:
+            self.subscribers[task_id].discard(queue)
+            if not self.subscribers[task_id]:
+                del self.subscribers[task_id]
+
+    async def get_state(self, task_id: str) -> dict | None:
+        """Gets the state stored by the result backend."""
+        if self.redis is None:
+            return None
+        meta = await self.redis.get(f"{self.prefix}{task_id}")
+        return json.loads(meta) if meta else None
+
+
+task_events = TaskEventHub()
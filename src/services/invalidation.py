@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from contextlib import suppress
+
+import aioredis
+
+from src.accessors import MenuCacheAccessor
+from src.core import config
+from src.db.cache import AbstractCache
+from src.db.changes import ChangeFeed, ChangeSubscription, change_feed
+
+logger = logging.getLogger(__name__)
+
+
+class CacheInvalidator:
+    """Deletes the cached catalog entries made stale by any write to the
+    catalog tables, including the ones bypassing the API.
+
+    Changes arriving within a short window are deleted in one batch.
+    A subscription that fell behind drops the whole catalog instead.
+    """
+
+    def __init__(self, feed: ChangeFeed, window: float, batch_size: int):
+        self.feed = feed
+        self.window = window
+        self.batch_size = batch_size
+        self.cache_accessor: MenuCacheAccessor | None = None
+        self.listener: asyncio.Task | None = None
+
+    async def start(self, cache: AbstractCache) -> None:
+        self.cache_accessor = MenuCacheAccessor(cache)
+        self.listener = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.listener:
+            self.listener.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.listener
+
+    async def run(self) -> None:
+        with self.feed.subscribe() as subscription:
+            while True:
+                if subscription.overflowed:
+                    subscription.reset()
+                    keys = None
+                else:
+                    keys = await self.collect(subscription)
+                await self.invalidate(keys)
+
+    async def collect(self, subscription: ChangeSubscription) -> set[str] | None:
+        """Gathers the keys of the changes within the window,
+        None if the whole catalog is stale."""
+        change = await subscription.get()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window
+        keys: set[str] = set()
+        while True:
+            change_keys = MenuCacheAccessor.change_keys(change)
+            if change_keys is None:
+                return None
+            keys |= change_keys
+            if len(keys) >= self.batch_size or subscription.overflowed:
+                return keys
+            try:
+                change = await asyncio.wait_for(
+                    subscription.get(), timeout=max(deadline - loop.time(), 0)
+                )
+            except asyncio.TimeoutError:
+                return keys
+
+    async def invalidate(self, keys: set[str] | None) -> None:
+        """Deletes the keys, retrying with a backoff while Redis is down."""
+        delay = 1
+        while True:
+            try:
+                if keys is None:
+                    await self.cache_accessor.delete_all()  # type: ignore
+                else:
+                    await self.cache_accessor.delete_keys(keys)  # type: ignore
+                return
+            except (aioredis.RedisError, OSError) as e:
+                logger.warning("Cache invalidation failed (%s), retry in %ss", e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+
+cache_invalidator = CacheInvalidator(
+    change_feed,
+    window=config.CACHE_INVALIDATION_WINDOW,
+    batch_size=config.CACHE_INVALIDATION_BATCH,
+)
@@ -1,13 +1,19 @@
+import asyncio
+import csv
+import functools
+import io
 import json
-from dataclasses import asdict
+import logging
+import os
+import time
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from typing import TYPE_CHECKING, Any
 
-import aiofiles  # type: ignore
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from celery import Celery
-from celery.result import AsyncResult
-from src.accessors import MenuAccessor, MenuCacheAccessor
+from src.accessors import ACCESSOR_BACKENDS, MenuCacheAccessor
 from src.api.v1.schemas import (
     DishCreate,
     DishUpdate,
@@ -17,12 +23,58 @@ from src.api.v1.schemas import (
     SubMenuUpdate,
 )
 from src.core import config
-from src.db import get_session
+from src.db import async_session, get_session
 from src.db.cache import AbstractCache, get_cache
+from src.db.changes import RecentIds, change_feed
 from src.models import Dish, Menu, SubMenu
+from src.services.autocomplete import Suggestion, autocomplete
 from src.services.base import ServiceBase
-
-celery_app = Celery("tasks", broker=config.RABBITMQ_URL, backend="rpc://")
+from src.services.bloom import id_filters
+from src.services.events import format_sse, task_events
+
+if TYPE_CHECKING:
+    from celery import Celery
+    from celery.result import AsyncResult
+
+logger = logging.getLogger(__name__)
+
+
+@functools.cache
+def get_celery_app() -> "Celery":
+    """Creates the Celery client on first use: only the Excel routes need
+    it, and importing Celery slows down the start of every worker."""
+    from celery import Celery
+
+    return Celery(
+        "tasks", broker=config.RABBITMQ_URL, backend=config.CELERY_RESULT_BACKEND
+    )
+
+
+# Celery task states and the export states pushed to clients
+EXPORT_STATES = {
+    "PENDING": "queued",
+    "RECEIVED": "queued",
+    "STARTED": "started",
+    "PROGRESS": "progress",
+    "RETRY": "queued",
+    "SUCCESS": "ready",
+    "FAILURE": "failed",
+    "REVOKED": "failed",
+}
+EXPORT_FINAL_STATES = ("ready", "failed")
+
+CATALOG_EXPORT_FIELDS = (
+    "menu_id",
+    "menu_title",
+    "menu_description",
+    "submenu_id",
+    "submenu_title",
+    "submenu_description",
+    "dish_id",
+    "dish_title",
+    "dish_description",
+    "dish_price",
+)
 
 
 class MenuService(ServiceBase):
@@ -33,32 +85,46 @@ class MenuService(ServiceBase):
         )
         if new_menu:
             answer = await self.make_menu_answer(new_menu)
+            id_filters.add("menu", answer["id"])
             await self.cache_accessor.set_item(type_="menu", item=answer)
             await self.cache_accessor.delete_list("menus")
+            export_prebuilder.schedule()
             return answer
         return None
 
     async def delete_menu(self, menu_id: str) -> bool:
         """Deletes menu by given id."""
         result = await self.accessor.delete_menu_by_id(id_=menu_id)
+        autocomplete.remove("menu", menu_id)
         await self.cache_accessor.delete(type_="menu", id_=menu_id)
         await self.cache_accessor.delete_list("menus")
+        await self.cache_accessor.delete_list(f"submenus:{menu_id}")
+        export_prebuilder.schedule()
         return result
 
-    async def get_menu(self, menu_id: str) -> dict | None:
+    async def get_menu(
+        self, menu_id: str, fields: Sequence[str] | None = None
+    ) -> dict | None:
         """Gets a menu for a given id."""
+        if not id_filters.might_exist("menu", menu_id):
+            return None
+        if fields is not None:
+            return await self.get_item_fields("menu", menu_id, fields)
         cached_menu = await self.cache_accessor.get_item(type_="menu", id_=menu_id)
-        if cached_menu:
-            return cached_menu
+        if cached_menu is not None:
+            return cached_menu or None
         menu = await self.accessor.get_menu_by_id(id_=menu_id)
         if menu:
             answer = await self.make_menu_answer(menu)
             await self.cache_accessor.set_item(type_="menu", item=answer)
             return answer
+        await self.cache_accessor.set_missing(type_="menu", id_=menu_id)
         return None
 
-    async def get_menu_list(self) -> list[dict]:
+    async def get_menu_list(self, fields: Sequence[str] | None = None) -> list[dict]:
         """Gets a menu list."""
+        if fields is not None:
+            return await self.get_fields("menu", "menus", fields)
         cached_menus = await self.cache_accessor.get_list("menus")
         if cached_menus:
             return cached_menus
@@ -77,8 +143,11 @@ class MenuService(ServiceBase):
         )
         if menu:
             answer = await self.make_menu_answer(menu)
+            # Drops the answers cached with some of the fields only
+            await self.cache_accessor.delete(type_="menu", id_=menu_id)
             await self.cache_accessor.set_item(type_="menu", item=answer)
             await self.cache_accessor.delete_list("menus")
+            export_prebuilder.schedule()
             return answer
         return None
 
@@ -91,51 +160,82 @@ class MenuService(ServiceBase):
         )
         if new_submenu:
             answer = await self.make_submenu_answer(new_submenu)
+            id_filters.add("submenu", answer["id"])
+            autocomplete.add(
+                Suggestion("submenu", str(answer["id"]), answer["title"], menu_id, None)
+            )
             await self.cache_accessor.set_item(type_="submenu", item=answer)
-            await self.cache_accessor.delete_list("submenus")
+            await self.cache_accessor.delete_list(f"submenus:{menu_id}")
             await self.cache_accessor.delete_list("menus")
             await self.cache_accessor.delete(type_="menu", id_=menu_id)
+            export_prebuilder.schedule()
             return answer
         return None
 
     async def delete_submenu(self, menu_id: str, submenu_id: str) -> bool:
         """Deletes submenu by given id."""
         result = await self.accessor.delete_submenu_by_id(id_=submenu_id)
+        autocomplete.remove("submenu", submenu_id)
         await self.cache_accessor.delete(type_="submenu", id_=submenu_id)
-        await self.cache_accessor.delete_list("submenus")
+        await self.cache_accessor.delete_list(f"submenus:{menu_id}")
+        await self.cache_accessor.delete_list(f"dishes:{submenu_id}")
         await self.cache_accessor.delete_list("menus")
         await self.cache_accessor.delete(type_="menu", id_=menu_id)
 
+        export_prebuilder.schedule()
         return result
 
-    async def get_submenu(self, submenu_id: str) -> dict | None:
+    async def get_submenu(
+        self, submenu_id: str, fields: Sequence[str] | None = None
+    ) -> dict | None:
         """Gets a submenu for a given id."""
+        if not id_filters.might_exist("submenu", submenu_id):
+            return None
+        if fields is not None:
+            return await self.get_item_fields("submenu", submenu_id, fields)
         cached_submenu = await self.cache_accessor.get_item(
             type_="submenu", id_=submenu_id
         )
-        if cached_submenu:
-            return cached_submenu
+        if cached_submenu is not None:
+            return cached_submenu or None
         submenu = await self.accessor.get_submenu_by_id(id_=submenu_id)
         if submenu:
             answer = await self.make_submenu_answer(submenu)
             await self.cache_accessor.set_item(type_="submenu", item=answer)
             return answer
+        await self.cache_accessor.set_missing(type_="submenu", id_=submenu_id)
         return None
 
-    async def get_submenus(self, menu_id: str) -> list[dict]:
+    async def get_submenus_by_ids(self, ids: list[str]) -> tuple[list[dict], list[str]]:
+        """Gets the submenus with the given ids, with one cache and at most
+        one database round trip. Returns the found ones in the order of
+        the ids, and the ids that do not exist."""
+        return await self.get_items_by_ids(
+            "submenu", ids, self.accessor.get_submenus_by_ids, self.make_submenu_answer
+        )
+
+    async def get_submenus(
+        self, menu_id: str, fields: Sequence[str] | None = None
+    ) -> list[dict]:
         """Gets a submenu list."""
-        cached_submenus = await self.cache_accessor.get_list("submenus")
+        if fields is not None:
+            return await self.get_fields(
+                "submenu", f"submenus:{menu_id}", fields, parent_id=menu_id
+            )
+        cached_submenus = await self.cache_accessor.get_list(f"submenus:{menu_id}")
         if cached_submenus:
             return cached_submenus
         submenus = await self.accessor.get_submenus(menu_id=menu_id)
         submenus_list = [
             await self.make_submenu_answer(submenu) for submenu in submenus
         ]
-        await self.cache_accessor.set_list(key="submenus", items=submenus_list)
+        await self.cache_accessor.set_list(
+            key=f"submenus:{menu_id}", items=submenus_list
+        )
         return submenus_list
 
     async def update_submenu(
-        self, submenu_id: str, new_data: SubMenuUpdate
+        self, menu_id: str, submenu_id: str, new_data: SubMenuUpdate
     ) -> dict | None:
         """Updates a submenu for a given id."""
         submenu = await self.accessor.update_submenu(
@@ -145,8 +245,11 @@ class MenuService(ServiceBase):
         )
         if submenu:
             answer = await self.make_submenu_answer(submenu)
+            autocomplete.rename("submenu", submenu_id, answer["title"])
+            await self.cache_accessor.delete(type_="submenu", id_=submenu_id)
             await self.cache_accessor.set_item(type_="submenu", item=answer)
-            await self.cache_accessor.delete_list("submenus")
+            await self.cache_accessor.delete_list(f"submenus:{menu_id}")
+            export_prebuilder.schedule()
             return answer
         return None
 
@@ -163,51 +266,177 @@ class MenuService(ServiceBase):
 
         if new_dish:
             answer = await self.make_dish_answer(new_dish)
+            id_filters.add("dish", answer["id"])
+            autocomplete.add(
+                Suggestion(
+                    "dish", str(answer["id"]), answer["title"], menu_id, submenu_id
+                )
+            )
             await self.cache_accessor.set_item(type_="dish", item=answer)
-            await self.cache_accessor.delete_list("submenus")
+            await self.cache_accessor.delete_list(f"submenus:{menu_id}")
             await self.cache_accessor.delete_list("menus")
-            await self.cache_accessor.delete_list("dishes")
+            await self.cache_accessor.delete_list(f"dishes:{submenu_id}")
             await self.cache_accessor.delete(type_="menu", id_=menu_id)
             await self.cache_accessor.delete(type_="submenu", id_=submenu_id)
+            export_prebuilder.schedule()
             return answer
         return None
 
     async def delete_dish(self, menu_id: str, submenu_id: str, dish_id: str) -> bool:
         """Deletes dish by given id."""
         result = await self.accessor.delete_dish_by_id(dish_id=dish_id)
-        await self.cache_accessor.delete_list("submenus")
+        autocomplete.remove("dish", dish_id)
+        await self.cache_accessor.delete_list(f"submenus:{menu_id}")
         await self.cache_accessor.delete_list("menus")
-        await self.cache_accessor.delete_list("dishes")
+        await self.cache_accessor.delete_list(f"dishes:{submenu_id}")
         await self.cache_accessor.delete(type_="menu", id_=menu_id)
         await self.cache_accessor.delete(type_="submenu", id_=submenu_id)
         await self.cache_accessor.delete(type_="dish", id_=dish_id)
 
+        export_prebuilder.schedule()
         return result
 
-    async def get_dish(self, dish_id: str) -> dict | None:
+    async def get_dish(
+        self, dish_id: str, fields: Sequence[str] | None = None
+    ) -> dict | None:
         """Gets a dish for a given id."""
+        if not id_filters.might_exist("dish", dish_id):
+            return None
+        if fields is not None:
+            return await self.get_item_fields("dish", dish_id, fields)
         cached_dish = await self.cache_accessor.get_item(type_="dish", id_=dish_id)
-        if cached_dish:
-            return cached_dish
+        if cached_dish is not None:
+            return cached_dish or None
         dish = await self.accessor.get_dish_by_id(dish_id=dish_id)
 
         if dish:
             answer = await self.make_dish_answer(dish)
             await self.cache_accessor.set_item(type_="dish", item=answer)
             return answer
+        await self.cache_accessor.set_missing(type_="dish", id_=dish_id)
         return None
 
-    async def get_dishes(self, submenu_id: str) -> list[dict]:
-        """Gets a dish list"""
-        cached_dishes = await self.cache_accessor.get_list("dishes")
+    async def get_dishes_by_ids(self, ids: list[str]) -> tuple[list[dict], list[str]]:
+        """Gets the dishes with the given ids, like get_submenus_by_ids."""
+        return await self.get_items_by_ids(
+            "dish", ids, self.accessor.get_dishes_by_ids, self.make_dish_answer
+        )
+
+    async def get_items_by_ids(
+        self,
+        type_: str,
+        ids: list[str],
+        load: Callable[[list[str]], Awaitable[list]],
+        make_answer: Callable[[Any], Awaitable[dict]],
+    ) -> tuple[list[dict], list[str]]:
+        ids = list(dict.fromkeys(ids))
+        candidates = [id_ for id_ in ids if id_filters.might_exist(type_, id_)]
+        cached = await self.cache_accessor.get_items(type_, candidates)
+        found = {id_: item for id_, item in zip(candidates, cached) if item is not None}
+        misses = [id_ for id_ in candidates if id_ not in found]
+        if misses:
+            answers = [await make_answer(item) for item in await load(misses)]
+            await self.cache_accessor.set_items(type_, answers)
+            found.update((str(answer["id"]), answer) for answer in answers)
+        # Empty items are cached for the ids known not to exist
+        return (
+            [found[id_] for id_ in ids if found.get(id_)],
+            [id_ for id_ in ids if not found.get(id_)],
+        )
+
+    async def get_dishes(
+        self,
+        submenu_id: str,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        sort: str | None = None,
+        fields: Sequence[str] | None = None,
+    ) -> list[dict]:
+        """Gets a dish list, optionally within a price range and sorted.
+
+        Only the whole list is cached, the filtered ones are index-only
+        scans and are not worth the keys the invalidation would miss."""
+        if (min_price, max_price, sort) != (None, None, None):
+            dishes = await self.accessor.get_dishes(
+                submenu_id=submenu_id,
+                min_price=min_price,
+                max_price=max_price,
+                sort=sort,
+            )
+            return self.pick_fields(
+                [await self.make_dish_answer(dish) for dish in dishes], fields
+            )
+        if fields is not None:
+            return await self.get_fields(
+                "dish", f"dishes:{submenu_id}", fields, parent_id=submenu_id
+            )
+        cached_dishes = await self.cache_accessor.get_list(f"dishes:{submenu_id}")
         if cached_dishes:
             return cached_dishes
         dishes = await self.accessor.get_dishes(submenu_id=submenu_id)
         dishes_list = [await self.make_dish_answer(dish) for dish in dishes]
-        await self.cache_accessor.set_list("dishes", dishes_list)
+        await self.cache_accessor.set_list(f"dishes:{submenu_id}", dishes_list)
         return dishes_list
 
-    async def update_dish(self, dish_id: str, new_data: DishUpdate) -> dict | None:
+    async def get_menu_dishes(
+        self,
+        menu_id: str,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        sort: str | None = None,
+        fields: Sequence[str] | None = None,
+    ) -> list[dict]:
+        """Gets the dishes of all the submenus of a menu, like get_dishes."""
+        dishes = await self.accessor.get_menu_dishes(
+            menu_id=menu_id, min_price=min_price, max_price=max_price, sort=sort
+        )
+        return self.pick_fields(
+            [
+                await self.make_dish_answer(dish) | {"submenu_id": dish.submenu_id}
+                for dish in dishes
+            ],
+            fields,
+        )
+
+    async def get_fields(
+        self,
+        type_: str,
+        key: str,
+        fields: Sequence[str],
+        id_: str | None = None,
+        parent_id: str | None = None,
+    ) -> list[dict]:
+        """Gets only the given fields of the items, selecting no other
+        columns and cached apart from the whole answers."""
+        cached = await self.cache_accessor.get_fields(key, fields)
+        if cached is not None:
+            return cached
+        items = await self.accessor.get_fields(
+            type_, fields, id_=id_, parent_id=parent_id
+        )
+        for item in items:
+            if "price" in item:
+                item["price"] = str(item["price"])
+        if items:
+            await self.cache_accessor.set_fields(key, fields, items)
+        return items
+
+    async def get_item_fields(
+        self, type_: str, id_: str, fields: Sequence[str]
+    ) -> dict | None:
+        items = await self.get_fields(type_, f"{type_}:{id_}", fields, id_=id_)
+        return items[0] if items else None
+
+    @staticmethod
+    def pick_fields(items: list[dict], fields: Sequence[str] | None) -> list[dict]:
+        """Keeps only the given fields of the answers, all of them for None."""
+        if fields is None:
+            return items
+        return [{field: item[field] for field in fields} for item in items]
+
+    async def update_dish(
+        self, submenu_id: str, dish_id: str, new_data: DishUpdate
+    ) -> dict | None:
         """Updates a dish for a given id."""
         dish = await self.accessor.update_dish(
             dish_id=dish_id,
@@ -218,13 +447,70 @@ class MenuService(ServiceBase):
 
         if dish:
             answer = await self.make_dish_answer(dish)
+            autocomplete.rename("dish", dish_id, answer["title"])
+            await self.cache_accessor.delete(type_="dish", id_=dish_id)
             await self.cache_accessor.set_item(type_="dish", item=answer)
-            await self.cache_accessor.delete_list("dishes")
+            await self.cache_accessor.delete_list(f"dishes:{submenu_id}")
+            export_prebuilder.schedule()
             return answer
         return None
 
+    async def warm_menus(self) -> list[str]:
+        """Caches the menu list and every menu in it, returns their ids."""
+        menus = await self.accessor.get_menus()
+        menus_list = [await self.make_menu_answer(menu) for menu in menus]
+        await self.cache_accessor.set_list("menus", menus_list)
+        for answer in menus_list:
+            await self.cache_accessor.set_item(type_="menu", item=answer)
+        return [str(answer["id"]) for answer in menus_list]
+
+    async def warm_submenus(self, menu_id: str) -> list[str]:
+        """Caches the submenus of the menu, returns their ids."""
+        submenus = await self.accessor.get_submenus(menu_id=menu_id)
+        submenus_list = [
+            await self.make_submenu_answer(submenu) for submenu in submenus
+        ]
+        await self.cache_accessor.set_list(f"submenus:{menu_id}", submenus_list)
+        for answer in submenus_list:
+            await self.cache_accessor.set_item(type_="submenu", item=answer)
+        return [str(answer["id"]) for answer in submenus_list]
+
+    async def warm_dishes(self, submenu_id: str) -> int:
+        """Caches the dishes of the submenu, returns their count."""
+        dishes = await self.accessor.get_dishes(submenu_id=submenu_id)
+        dishes_list = [await self.make_dish_answer(dish) for dish in dishes]
+        await self.cache_accessor.set_list(f"dishes:{submenu_id}", dishes_list)
+        for answer in dishes_list:
+            await self.cache_accessor.set_item(type_="dish", item=answer)
+        return len(dishes_list)
+
+    async def search(self, query: str, limit: int, offset: int) -> list[dict]:
+        """Searches the dish and submenu titles and descriptions.
+
+        Results are cached per catalog version, so a write is never hidden
+        by a cached search.
+        """
+        query = " ".join(query.split())
+        version = await self.accessor.get_catalog_version()
+        cached = await self.cache_accessor.get_search(version, query, limit, offset)
+        if cached is not None:
+            return cached
+        results = await self.accessor.search_catalog(query, limit, offset)
+        await self.cache_accessor.set_search(
+            version, query, limit, offset, results=results
+        )
+        return results
+
+    async def suggest(self, prefix: str, limit: int) -> list[dict]:
+        """Suggests dishes and submenus whose title has a word starting
+        with the prefix, from the in-process index."""
+        return await autocomplete.search(prefix, limit, load=self.accessor.get_menus)
+
     async def generate_menus(self) -> None:
         """Reads test menus from file and populates the database with them."""
+        # Only used for seeding, not worth importing on start
+        import aiofiles  # type: ignore
+
         async with aiofiles.open("src/data/menu.json", mode="r") as f:
             content = await f.read()
 
@@ -236,22 +522,195 @@ class MenuService(ServiceBase):
 
         dishes = [dish for submenu in submenus for dish in submenu["dishes"]]
         await self.accessor.dish_multiple_create(dishes)
+        autocomplete.expire()
+        export_prebuilder.schedule()
 
     async def make_xl_file(self) -> str:
-        """Sets the task to create an Excel file"""
-        menus = await self.accessor.get_menus()
-        menus_data = json.dumps([asdict(menu) for menu in menus])
-        result = celery_app.send_task(
-            "tasks.create_xlsx_file", kwargs={"data": menus_data}
+        """Sets the task to create an Excel file.
+
+        Exports are keyed by the catalog version: while the version stays
+        the same, the task already started for it is returned, unless it
+        failed, its file has been removed or it is presumed lost. The
+        worker reads the catalog from the database itself.
+        """
+        version = await self.accessor.get_catalog_version()
+        claim = await self.cache_accessor.get_export(version)
+        if claim:
+            if await self.is_export_usable(claim):
+                return claim["task_id"]
+            await self.cache_accessor.release_export(version, claim["task_id"])
+
+        task_id = str(uuid.uuid4())
+        if not await self.cache_accessor.claim_export(version, task_id):
+            # A concurrent request has just started the export
+            claim = await self.cache_accessor.get_export(version)
+            return claim["task_id"] if claim else task_id
+        get_celery_app().send_task(
+            "tasks.create_xlsx_file", task_id=task_id, kwargs={"version": version}
+        )
+        return task_id
+
+    async def is_export_usable(self, claim: dict) -> bool:
+        """Tells whether the claimed export task made its file or may still."""
+        if os.path.exists(self.get_xl_file_path(claim["task_id"])):
+            return True
+        meta = await task_events.get_state(claim["task_id"])
+        if meta and EXPORT_STATES.get(meta["status"]) in EXPORT_FINAL_STATES:
+            # Failed, or done and its file evicted since
+            return False
+        return time.time() - claim["claimed_at"] < config.EXPORT_TASK_TIMEOUT
+
+    async def export_catalog_csv(self) -> AsyncIterator[str]:
+        """Streams the flattened catalog as CSV, one chunk per fetched batch."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CATALOG_EXPORT_FIELDS)
+        yield buffer.getvalue()
+        async for rows in self.accessor.stream_catalog():
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(self.make_export_row(row) for row in rows)
+            yield buffer.getvalue()
+
+    async def export_catalog_ndjson(self) -> AsyncIterator[str]:
+        """Streams the flattened catalog as newline-delimited JSON."""
+        async for rows in self.accessor.stream_catalog():
+            yield "".join(
+                json.dumps(
+                    dict(zip(CATALOG_EXPORT_FIELDS, self.make_export_row(row))),
+                    ensure_ascii=False,
+                )
+                + "\n"
+                for row in rows
+            )
+
+    @staticmethod
+    def make_export_row(row: Sequence) -> tuple:
+        """Converts a flattened catalog row to the dump format"""
+        return (
+            str(row[0]),
+            row[1],
+            row[2],
+            str(row[3]) if row[3] else None,
+            row[4],
+            row[5],
+            str(row[6]) if row[6] else None,
+            row[7],
+            row[8],
+            f"{row[9]:.2f}" if row[9] is not None else None,
         )
-        return result.id
 
     @staticmethod
-    async def get_xl_file_status(task_id: str) -> AsyncResult:
+    def get_xl_file_path(task_id: str) -> str:
+        """Gets the path of the Excel file made by the task."""
+        return os.path.join(config.BASE_DIR.parent, "data", f"{task_id}.xlsx")
+
+    @staticmethod
+    async def get_xl_file_status(task_id: str) -> "AsyncResult":
         """Gets status of task by id"""
+        celery_app = get_celery_app()
         result = celery_app.AsyncResult(id=task_id, app=celery_app)
         return result
 
+    async def get_xl_file_events(self, task_id: str) -> AsyncIterator[str]:
+        """Streams the export task states as server-sent events
+        until the file is ready or the task has failed."""
+        with task_events.subscribe(task_id) as queue:
+            meta = await task_events.get_state(task_id)
+            event = self.make_export_event(task_id, meta)
+            yield format_sse(event, event=event["state"])
+            while event["state"] not in EXPORT_FINAL_STATES:
+                try:
+                    meta = await asyncio.wait_for(
+                        queue.get(), timeout=config.EXPORT_EVENTS_KEEPALIVE
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                event = self.make_export_event(task_id, meta)
+                yield format_sse(event, event=event["state"])
+
+    async def get_change_events(
+        self, last_event_id: int | None = None, follow: bool = True
+    ) -> AsyncIterator[str]:
+        """Streams catalog changes as server-sent events.
+
+        Changes after last_event_id are replayed from the change log first,
+        a reset event asks the client to reload everything once they have
+        been pruned. A client falling behind catches up from the log too.
+        Changes committed late may be sent again to a resuming client.
+        """
+        with change_feed.subscribe() as subscription:
+            last_id = change_feed.last_id or 0
+            seen = RecentIds(config.CHANGE_FEED_RECENT_IDS)
+            if last_event_id is not None:
+                first_id = await self.accessor.get_first_change_id()
+                if last_event_id < first_id - 1:
+                    yield format_sse({}, event="reset")
+                else:
+                    last_id = last_event_id
+                    seen.add(last_event_id)
+                    async for change in self.read_changes(last_event_id):
+                        if seen.add(change["id"]):
+                            last_id = max(last_id, change["id"])
+                            yield self.make_change_event(change)
+            if not follow:
+                return
+
+            while True:
+                if subscription.overflowed:
+                    subscription.reset()
+                    async for change in self.read_changes(last_id):
+                        if seen.add(change["id"]):
+                            last_id = max(last_id, change["id"])
+                            yield self.make_change_event(change)
+                    continue
+                try:
+                    change = await asyncio.wait_for(
+                        subscription.get(), timeout=config.CHANGE_FEED_KEEPALIVE
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if not seen.add(change["id"]):
+                    continue
+                last_id = max(last_id, change["id"])
+                yield self.make_change_event(change)
+
+    async def read_changes(self, after_id: int) -> AsyncIterator[dict]:
+        """Reads the change log following the given change page by page,
+        with the changes that may have committed after it."""
+        after_id = await self.accessor.get_replay_start(
+            after_id, config.CHANGE_FEED_REPLAY_WINDOW
+        )
+        while True:
+            changes = await self.accessor.get_changes(
+                after_id=after_id, limit=config.CHANGE_FEED_PAGE_SIZE
+            )
+            for change in changes:
+                yield change
+            if len(changes) < config.CHANGE_FEED_PAGE_SIZE:
+                return
+            after_id = changes[-1]["id"]
+
+    @staticmethod
+    def make_change_event(change: dict) -> str:
+        """Converts a change to a server-sent event"""
+        return format_sse(change, event="change", id_=str(change["id"]))
+
+    def make_export_event(self, task_id: str, meta: dict | None) -> dict:
+        """Converts the stored task state to the desired format"""
+        status = meta["status"] if meta else "PENDING"
+        # The file may come from a task whose state has already expired
+        if os.path.exists(self.get_xl_file_path(task_id)):
+            status = "SUCCESS"
+        event = {"task_id": task_id, "state": EXPORT_STATES.get(status, "queued")}
+        if event["state"] == "progress":
+            event["progress"] = meta["result"]  # type: ignore
+        elif event["state"] == "ready":
+            event["link"] = f"{config.BASE_URL}/api/v1/menus/download/{task_id}"
+        return event
+
     @staticmethod
     async def make_dish_answer(dish: Dish) -> dict:
         """Converts an object to the desired format"""
@@ -286,11 +745,48 @@ class MenuService(ServiceBase):
         }
 
 
+class ExportPrebuilder:
+    """Rebuilds the Excel export once catalog writes settle down,
+    so that downloads of the current version are instant."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.timer: asyncio.TimerHandle | None = None
+        self.tasks: set[asyncio.Task] = set()
+
+    def schedule(self) -> None:
+        """Restarts the countdown to the next rebuild."""
+        if self.delay <= 0:
+            return
+        if self.timer:
+            self.timer.cancel()
+        self.timer = asyncio.get_running_loop().call_later(self.delay, self.start)
+
+    def start(self) -> None:
+        self.timer = None
+        task = asyncio.create_task(self.build())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def build(self) -> None:
+        try:
+            service = MenuService(
+                accessor=ACCESSOR_BACKENDS[config.ACCESSOR_BACKEND](async_session()),
+                cache_accessor=MenuCacheAccessor(await get_cache()),
+            )
+            await service.make_xl_file()
+        except Exception:
+            logger.exception("Failed to prebuild the Excel export")
+
+
+export_prebuilder = ExportPrebuilder(config.EXPORT_PREBUILD_DELAY)
+
+
 async def get_menu_service(
     session: AsyncSession = Depends(get_session),
     cache: AbstractCache = Depends(get_cache),
 ) -> MenuService:
     """Gets the menu-service instance for dependency injection."""
-    accessor = MenuAccessor(session)
+    accessor = ACCESSOR_BACKENDS[config.ACCESSOR_BACKEND](session)
     cache_accessor = MenuCacheAccessor(cache)
     return MenuService(accessor=accessor, cache_accessor=cache_accessor)
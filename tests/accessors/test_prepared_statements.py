@@ -0,0 +1,12 @@
+from src.db.statements import PreparedStatementRegistry
+
+
+async def test_unpreparable_queries_are_skipped(asyncpg_pool):
+    registry = PreparedStatementRegistry()
+    registry.register("menu", "SELECT id FROM menu WHERE id = $1")
+    registry.register("missing", "SELECT id FROM not_migrated_yet WHERE id = $1")
+    async with asyncpg_pool.acquire() as connection:
+        statements = await registry.prepare_all(connection)
+        assert set(statements) == {"menu"}
+        # The connection stays usable
+        assert await connection.fetchval("SELECT 1") == 1
@@ -0,0 +1,228 @@
+import json
+import uuid
+
+import pytest
+from sqlalchemy import event
+
+from src.accessors import MenuAccessor, MenuCoreAccessor
+from src.db.statements import prepared_statements
+from tests.conftest import test_async_session as session_maker
+from tests.conftest import test_engine as engine
+
+MENUS = 2000
+SUBMENUS_PER_MENU = 5
+DISHES_PER_SUBMENU = 10
+
+# Foreign-key lookups Postgres runs for ON DELETE CASCADE
+CASCADE_LOOKUPS = {
+    "cascade_submenus": "SELECT 1 FROM submenu WHERE menu_id = $1",
+    "cascade_dishes": "SELECT 1 FROM dish WHERE submenu_id = $1",
+}
+
+
+def seq_scans(plan: dict) -> list[str]:
+    """Returns the relations read with a sequential scan anywhere in the plan."""
+    relations = []
+    if plan.get("Node Type") == "Seq Scan":
+        relations.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        relations.extend(seq_scans(child))
+    return relations
+
+
+def index_scans(plan: dict) -> list[str]:
+    """Returns the indexes used anywhere in the plan."""
+    indexes = [plan["Index Name"]] if "Index Name" in plan else []
+    for child in plan.get("Plans", []):
+        indexes.extend(index_scans(child))
+    return indexes
+
+
+@pytest.fixture
+async def large_catalog(asyncpg_pool) -> dict:
+    """Seeds a catalog big enough for the planner to prefer indexes."""
+    menus, submenus, dishes = [], [], []
+    for m in range(MENUS):
+        menu_id = uuid.uuid4()
+        menus.append((menu_id, f"Menu {m}", "Menu description"))
+        for s in range(SUBMENUS_PER_MENU):
+            submenu_id = uuid.uuid4()
+            submenus.append(
+                (submenu_id, f"Submenu {s}", "Submenu description", menu_id)
+            )
+            for d in range(DISHES_PER_SUBMENU):
+                dishes.append(
+                    (
+                        uuid.uuid4(),
+                        f"Dish {d}",
+                        "Dish description",
+                        10.5 + d,
+                        submenu_id,
+                    )
+                )
+
+    async with asyncpg_pool.acquire() as connection:
+        await connection.copy_records_to_table(
+            "menu", records=menus, columns=["id", "title", "description"]
+        )
+        await connection.copy_records_to_table(
+            "submenu",
+            records=submenus,
+            columns=["id", "title", "description", "menu_id"],
+        )
+        await connection.copy_records_to_table(
+            "dish",
+            records=dishes,
+            columns=["id", "title", "description", "price", "submenu_id"],
+        )
+        # Vacuumed for the visibility map that index-only scans rely on
+        await connection.execute("VACUUM ANALYZE menu, submenu, dish")
+
+    return {
+        "menu_id": str(menus[-1][0]),
+        "submenu_id": str(submenus[-1][0]),
+        "dish_id": str(dishes[-1][0]),
+    }
+
+
+async def explain(asyncpg_pool, query: str, *args) -> dict:
+    async with asyncpg_pool.acquire() as connection:
+        result = await connection.fetchval(f"EXPLAIN (FORMAT JSON) {query}", *args)
+    return json.loads(result)[0]["Plan"]
+
+
+class TestQueryPlans:
+    @pytest.mark.parametrize("accessor_class", [MenuAccessor, MenuCoreAccessor])
+    async def test_accessor_queries_use_indexes(
+        self, accessor_class, large_catalog, monkeypatch
+    ):
+        monkeypatch.setattr(MenuCoreAccessor, "use_prepared", False)
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                captured.append((statement, parameters))
+
+        lookups = [
+            ("get_menu_by_id", large_catalog["menu_id"]),
+            ("get_submenu_by_id", large_catalog["submenu_id"]),
+            ("get_submenus", large_catalog["menu_id"]),
+            ("get_dish_by_id", large_catalog["dish_id"]),
+            ("get_dishes", large_catalog["submenu_id"]),
+            ("get_submenus_by_ids", [large_catalog["submenu_id"]]),
+            ("get_dishes_by_ids", [large_catalog["dish_id"]]),
+        ]
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            plans = []
+            for method, id_ in lookups:
+                accessor = accessor_class(session_maker())
+                captured.clear()
+                await getattr(accessor, method)(id_)
+                assert captured, f"{method} issued no SELECT"
+                async with engine.connect() as connection:
+                    for statement, parameters in captured:
+                        result = await connection.exec_driver_sql(
+                            f"EXPLAIN (FORMAT JSON) {statement}", parameters
+                        )
+                        plans.append((method, result.scalar()[0]["Plan"]))
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+        for method, plan in plans:
+            assert seq_scans(plan) == [], f"{method} falls back to a sequential scan"
+
+    async def test_prepared_queries_use_indexes(self, asyncpg_pool, large_catalog):
+        args = {
+            "menu_by_id": large_catalog["menu_id"],
+            "submenu_by_id": large_catalog["submenu_id"],
+            "submenus_by_menu_id": large_catalog["menu_id"],
+            "dish_by_id": large_catalog["dish_id"],
+            "dishes_by_submenu_id": large_catalog["submenu_id"],
+        }
+        assert set(args) == set(prepared_statements.queries)
+
+        for name, query in prepared_statements.queries.items():
+            plan = await explain(asyncpg_pool, query, args[name])
+            assert seq_scans(plan) == [], f"{name} falls back to a sequential scan"
+
+    async def test_cascade_lookups_use_indexes(self, asyncpg_pool, large_catalog):
+        args = {
+            "cascade_submenus": large_catalog["menu_id"],
+            "cascade_dishes": large_catalog["submenu_id"],
+        }
+        for name, query in CASCADE_LOOKUPS.items():
+            plan = await explain(asyncpg_pool, query, uuid.UUID(args[name]))
+            assert seq_scans(plan) == [], f"{name} falls back to a sequential scan"
+
+    @pytest.mark.parametrize("accessor_class", [MenuAccessor, MenuCoreAccessor])
+    async def test_search_uses_gin_index(self, accessor_class, large_catalog):
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if "websearch_to_tsquery" in statement:
+                captured.append((statement, parameters))
+
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            await accessor_class(session_maker()).search_catalog("борщ")
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+        [(statement, parameters)] = captured
+        async with engine.connect() as connection:
+            result = await connection.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}", parameters
+            )
+        plan = result.scalar()[0]["Plan"]
+        # Submenus are few enough here for the planner to read them whole
+        assert "dish" not in seq_scans(plan)
+        assert "ix_dish_search_vector" in index_scans(plan)
+
+    @pytest.mark.parametrize("accessor_class", [MenuAccessor, MenuCoreAccessor])
+    @pytest.mark.parametrize(
+        "filters, prices, index",
+        [
+            (
+                {"min_price": 12, "max_price": 14.5, "sort": "price"},
+                [12.5, 13.5, 14.5],
+                "ix_dish_submenu_id_price",
+            ),
+            ({"max_price": 11}, [10.5], "ix_dish_submenu_id_price"),
+            (
+                {"sort": "title"},
+                [10.5 + d for d in range(DISHES_PER_SUBMENU)],
+                "ix_dish_submenu_id_title",
+            ),
+        ],
+    )
+    async def test_dish_filters_are_index_only_scans(
+        self, accessor_class, filters, prices, index, large_catalog
+    ):
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                captured.append((statement, parameters))
+
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            dishes = await accessor_class(session_maker()).get_dishes(
+                large_catalog["submenu_id"], **filters
+            )
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+        assert sorted(dish.price for dish in dishes) == prices
+        if "sort" in filters:
+            assert [dish.price for dish in dishes] == prices
+        [(statement, parameters)] = captured
+        async with engine.connect() as connection:
+            result = await connection.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}", parameters
+            )
+        plan = result.scalar()[0]["Plan"]
+        while plan.get("Plans"):
+            [plan] = plan["Plans"]
+        assert plan["Node Type"] == "Index Only Scan"
+        assert plan["Index Name"] == index
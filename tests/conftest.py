@@ -1,5 +1,6 @@
 import asyncio
-from collections.abc import AsyncGenerator
+import fnmatch
+from collections.abc import AsyncGenerator, Iterable
 from typing import Any
 
 import asyncpg
@@ -11,11 +12,15 @@ from sqlalchemy.sql import text
 
 from main import app
 from src.core import config
-from src.db import get_session
+from src.db import get_session, track_request_backends
 from src.db.cache import AbstractCache, get_cache
+from src.db.changes import ChangeFeed
+from src.services.autocomplete import autocomplete
 
 
 class TestCache(AbstractCache):
+    __test__ = False
+
     async def get(self, key: str):
         return self.cache.get(key)
 
@@ -27,17 +32,50 @@ class TestCache(AbstractCache):
     ):
         self.cache[key] = value
 
+    async def get_many(self, keys: list[str]) -> list:
+        return [self.cache.get(key) for key in keys]
+
+    async def set_many(
+        self,
+        items: dict[str, bytes | str],
+        expire: int = config.CACHE_EXPIRE_IN_SECONDS,
+    ):
+        self.cache.update(items)
+
+    async def add(
+        self,
+        key: str,
+        value: bytes | str,
+        expire: int = config.CACHE_EXPIRE_IN_SECONDS,
+    ) -> bool:
+        if key in self.cache:
+            return False
+        self.cache[key] = value
+        return True
+
     async def remove(self, key: str):
         try:
             self.cache.pop(key)
         except KeyError:
             pass
 
+    async def remove_many(self, keys: Iterable[str]):
+        for key in keys:
+            self.cache.pop(key, None)
+
+    async def remove_matching(self, pattern: str):
+        for key in fnmatch.filter(list(self.cache), pattern):
+            self.cache.pop(key)
+
+    async def count_matching(self, pattern: str) -> int:
+        return len(fnmatch.filter(list(self.cache), pattern))
+
     async def close(self):
         pass
 
 
 test_engine = create_async_engine(config.TEST_DATABASE_URL, future=True, echo=True)
+track_request_backends(test_engine)
 
 # create session for the interaction with database
 test_async_session = sessionmaker(
@@ -48,6 +86,7 @@ CLEAN_TABLES = [
     "menu",
     "submenu",
     "dish",
+    "change_log",
 ]
 
 
@@ -72,10 +111,18 @@ async def clean_tables(async_session_test):
         async with session.begin():
             for table_for_cleaning in CLEAN_TABLES:
                 await session.execute(
-                    text(f"""TRUNCATE TABLE {table_for_cleaning} CASCADE;""")
+                    text(
+                        f"""TRUNCATE TABLE {table_for_cleaning} RESTART IDENTITY CASCADE;"""
+                    )
                 )
 
 
+@pytest.fixture(autouse=True)
+def clear_autocomplete():
+    """Drop the prefix index built from the data of other tests"""
+    autocomplete.clear()
+
+
 async def _get_test_db():
     try:
         yield test_async_session()
@@ -108,6 +155,15 @@ async def asyncpg_pool():
     await pool.close()
 
 
+@pytest.fixture
+async def change_feed():
+    feed = ChangeFeed(queue_size=10)
+    await feed.start("".join(config.TEST_DATABASE_URL.split("+asyncpg")))
+    await asyncio.wait_for(feed.connected.wait(), timeout=5)
+    yield feed
+    await feed.stop()
+
+
 @pytest.fixture
 async def create_menu_in_database(asyncpg_pool):
     async def create_menu_in_database(id_: str, title: str, description: str):
@@ -0,0 +1,190 @@
+import asyncio
+import json
+
+import pytest
+
+
+def parse_events(text: str) -> list[tuple[str, str | None, dict]]:
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], fields.get("id"), json.loads(fields["data"])))
+    return events
+
+
+@pytest.fixture
+async def last_change_id(asyncpg_pool) -> int:
+    async with asyncpg_pool.acquire() as connection:
+        return await connection.fetchval("SELECT coalesce(max(id), 0) FROM change_log")
+
+
+class TestChangeRoutes:
+    async def test_changes_replay(
+        self,
+        client,
+        last_change_id,
+        menu_data,
+        submenu_data,
+        create_menu_in_database,
+        create_submenu_in_database,
+    ):
+        await create_menu_in_database(**menu_data)
+        await create_submenu_in_database(**submenu_data)
+
+        resp = await client.get(
+            "/api/v1/menus/changes",
+            params={"since": last_change_id, "follow": False},
+        )
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        events = parse_events(resp.text)
+        assert [
+            (event, change["table"], change["op"]) for event, _, change in events
+        ] == [
+            ("change", "menu", "INSERT"),
+            ("change", "submenu", "INSERT"),
+        ]
+        _, id_, change = events[1]
+        assert id_ == str(change["id"])
+        assert change["menu_id"] == menu_data["id_"]
+        assert change["submenu_id"] == submenu_data["id_"]
+
+    async def test_changes_resume_from_last_event_id(
+        self, client, last_change_id, menu_data, create_menu_in_database
+    ):
+        await create_menu_in_database(**menu_data)
+        await client.delete(f"/api/v1/menus/{menu_data['id_']}")
+
+        resp = await client.get(
+            "/api/v1/menus/changes",
+            params={"follow": False},
+            headers={"Last-Event-ID": str(last_change_id + 1)},
+        )
+        [(_, _, change)] = parse_events(resp.text)
+        assert (change["table"], change["op"]) == ("menu", "DELETE")
+
+    async def test_changes_reset_when_pruned(
+        self, client, asyncpg_pool, last_change_id, menu_data, create_menu_in_database
+    ):
+        await create_menu_in_database(**menu_data)
+        async with asyncpg_pool.acquire() as connection:
+            await connection.execute(
+                "DELETE FROM change_log WHERE id <= $1", last_change_id
+            )
+
+        resp = await client.get(
+            "/api/v1/menus/changes",
+            params={"since": last_change_id - 1, "follow": False},
+        )
+        [(event, _, _)] = parse_events(resp.text)
+        assert event == "reset"
+
+    async def test_changes_reset_when_all_pruned(
+        self, client, asyncpg_pool, menu_data, create_menu_in_database
+    ):
+        await create_menu_in_database(**menu_data)
+        await client.delete(f"/api/v1/menus/{menu_data['id_']}")
+        async with asyncpg_pool.acquire() as connection:
+            await connection.execute("DELETE FROM change_log")
+
+        resp = await client.get(
+            "/api/v1/menus/changes", params={"since": 1, "follow": False}
+        )
+        [(event, _, _)] = parse_events(resp.text)
+        assert event == "reset"
+
+        resp = await client.get(
+            "/api/v1/menus/changes", params={"since": 2, "follow": False}
+        )
+        assert resp.text == ""
+
+    async def test_changes_resume_replays_late_commits(
+        self, client, asyncpg_pool, menu_data, create_menu_in_database
+    ):
+        async with asyncpg_pool.acquire() as connection:
+            late = connection.transaction()
+            await late.start()
+            # Takes the first id but commits after the next change
+            await connection.execute(
+                "INSERT INTO menu VALUES (gen_random_uuid(), 'Late', '')"
+            )
+            await create_menu_in_database(**menu_data)
+            resp = await client.get(
+                "/api/v1/menus/changes", params={"since": 0, "follow": False}
+            )
+            [(_, last_event_id, change)] = parse_events(resp.text)
+            assert change["row_id"] == menu_data["id_"]
+            await late.commit()
+
+        resp = await client.get(
+            "/api/v1/menus/changes",
+            params={"follow": False},
+            headers={"Last-Event-ID": last_event_id},
+        )
+        [(_, id_, change)] = parse_events(resp.text)
+        assert int(id_) < int(last_event_id)
+        assert change["row_id"] != menu_data["id_"]
+
+
+class TestChangeFeed:
+    async def test_feed_delivers_changes(
+        self, change_feed, menu_data, create_menu_in_database
+    ):
+        with change_feed.subscribe() as subscription:
+            await create_menu_in_database(**menu_data)
+            change = await asyncio.wait_for(subscription.get(), timeout=5)
+        assert (change["table"], change["op"]) == ("menu", "INSERT")
+        assert change["row_id"] == menu_data["id_"]
+
+    async def test_feed_flags_slow_subscribers(self, change_feed, asyncpg_pool):
+        with change_feed.subscribe() as subscription:
+            async with asyncpg_pool.acquire() as connection:
+                for number in range(change_feed.queue_size + 1):
+                    await connection.execute(
+                        "INSERT INTO menu (id, title, description) "
+                        "VALUES (gen_random_uuid(), $1, '')",
+                        f"Menu {number}",
+                    )
+            while not subscription.overflowed:
+                await asyncio.sleep(0.01)
+            assert subscription.queue.full()
+
+    async def test_feed_catches_up_after_reconnect(
+        self, change_feed, asyncpg_pool, menu_data, create_menu_in_database
+    ):
+        with change_feed.subscribe() as subscription:
+            async with asyncpg_pool.acquire() as connection:
+                await connection.execute(
+                    "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                    "WHERE application_name = 'change_feed'"
+                )
+            # Logged while the listener is reconnecting
+            await create_menu_in_database(**menu_data)
+            change = await asyncio.wait_for(subscription.get(), timeout=5)
+        assert change["row_id"] == menu_data["id_"]
+
+    async def test_feed_catches_up_late_commits(
+        self, change_feed, asyncpg_pool, menu_data, create_menu_in_database
+    ):
+        with change_feed.subscribe() as subscription:
+            async with asyncpg_pool.acquire() as connection:
+                late = connection.transaction()
+                await late.start()
+                await connection.execute(
+                    "INSERT INTO menu VALUES (gen_random_uuid(), 'Late', '')"
+                )
+                await create_menu_in_database(**menu_data)
+                change = await asyncio.wait_for(subscription.get(), timeout=5)
+                assert change["row_id"] == menu_data["id_"]
+
+                # Committed while the listener is reconnecting
+                change_feed.connected.clear()
+                await connection.execute(
+                    "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                    "WHERE application_name = 'change_feed'"
+                )
+                await late.commit()
+            change = await asyncio.wait_for(subscription.get(), timeout=5)
+            assert change["id"] < change_feed.last_id
+            await asyncio.wait_for(change_feed.connected.wait(), timeout=5)
+        assert subscription.queue.empty()
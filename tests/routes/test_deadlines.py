@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from src.api.deadlines import QUERY_CANCELED, RequestDeadlineMiddleware
+from tests import conftest
+
+SLEEP_QUERY = "SELECT pg_sleep(5) AS deadline_test"
+
+
+@pytest.fixture
+def cancelled() -> asyncio.Event:
+    return asyncio.Event()
+
+
+@pytest.fixture
+def app(cancelled) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/slow")
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    @app.get("/api/slow-route")
+    async def slow_route():
+        await asyncio.sleep(0.2)
+        return {"status": True}
+
+    @app.get("/api/query")
+    async def query():
+        async with conftest.test_async_session() as session:
+            session.info["statement_timeout"] = 0.05
+            await session.execute(text(SLEEP_QUERY))
+
+    app.add_middleware(
+        RequestDeadlineMiddleware,
+        routes=app.router.routes,
+        read_timeout=0.1,
+        write_timeout=0.1,
+        route_timeouts={"slow_route": 1, "query": 5, "long_query": 5},
+        dsn=conftest.config.TEST_DATABASE_URL.replace("+asyncpg", ""),
+    )
+    return app
+
+
+@pytest.fixture
+async def client(app):
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        yield client
+
+
+async def running_queries(asyncpg_pool) -> int:
+    async with asyncpg_pool.acquire() as connection:
+        return await connection.fetchval(
+            "SELECT count(*) FROM pg_stat_activity "
+            "WHERE state = 'active' AND query = $1",
+            SLEEP_QUERY,
+        )
+
+
+class TestRequestDeadlines:
+    async def test_deadline_cancels_request(self, client, cancelled):
+        resp = await client.get("/api/slow")
+        assert resp.status_code == 504
+        assert cancelled.is_set()
+
+    async def test_route_deadline(self, client):
+        assert (await client.get("/api/slow-route")).status_code == 200
+
+    async def test_statement_timeout(self, client):
+        assert (await client.get("/api/query")).status_code == 504
+
+    async def test_disconnect_cancels_query(self, app, asyncpg_pool):
+        messages = [
+            {"type": "http.request", "body": b"", "more_body": False},
+        ]
+        disconnect = asyncio.Event()
+        sent = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        async def long_query():
+            async with conftest.test_async_session() as session:
+                await session.execute(text(SLEEP_QUERY))
+
+        app.router.add_api_route("/api/long", long_query)
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/api/long",
+            "raw_path": b"/api/long",
+            "query_string": b"",
+            "headers": [],
+            "http_version": "1.1",
+            "scheme": "http",
+            "server": ("test", 80),
+            "client": ("test", 1),
+            "root_path": "",
+        }
+        request = asyncio.create_task(app(scope, receive, send))
+        for _ in range(100):
+            if await running_queries(asyncpg_pool):
+                break
+            await asyncio.sleep(0.02)
+        assert await running_queries(asyncpg_pool) == 1
+
+        disconnect.set()
+        await asyncio.wait_for(request, timeout=2)
+        assert sent == []
+        for _ in range(100):
+            if not await running_queries(asyncpg_pool):
+                break
+            await asyncio.sleep(0.02)
+        assert await running_queries(asyncpg_pool) == 0
+
+
+async def test_statement_timeout_is_reset():
+    async with conftest.test_async_session() as session:
+        session.info["statement_timeout"] = 0.05
+        with pytest.raises(DBAPIError) as error:
+            await session.execute(text("SELECT pg_sleep(0.5)"))
+        assert error.value.orig.sqlstate == QUERY_CANCELED
+
+    # The pooled connection gets its timeout back for the next session
+    async with conftest.test_async_session() as session:
+        await session.execute(text("SELECT pg_sleep(0.1)"))
@@ -0,0 +1,176 @@
+import asyncio
+import csv
+import io
+import json
+import os
+
+import pytest
+
+from src.services import MenuService
+from src.services.events import task_events
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def export_file(tmp_path, monkeypatch) -> str:
+    def get_xl_file_path(task_id: str) -> str:
+        return os.path.join(tmp_path, f"{task_id}.xlsx")
+
+    monkeypatch.setattr(MenuService, "get_xl_file_path", staticmethod(get_xl_file_path))
+    with open(get_xl_file_path("export"), "wb") as file:
+        file.write(CONTENT)
+    return "/api/v1/menus/download/export"
+
+
+def parse_events(text: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class TestDownloadRoutes:
+    async def test_download_404(self, client, export_file):
+        resp = await client.get("/api/v1/menus/download/missing")
+        assert resp.status_code == 404
+        assert resp.json()["detail"] == "file not found"
+
+    async def test_download(self, client, export_file):
+        resp = await client.get(export_file)
+        assert resp.status_code == 200
+        assert resp.content == CONTENT
+        assert resp.headers["accept-ranges"] == "bytes"
+        assert resp.headers["etag"]
+
+    async def test_download_not_modified(self, client, export_file):
+        etag = (await client.get(export_file)).headers["etag"]
+        resp = await client.get(export_file, headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.content == b""
+        assert resp.headers["etag"] == etag
+
+    async def test_download_range(self, client, export_file):
+        resp = await client.get(export_file, headers={"Range": "bytes=100-199"})
+        assert resp.status_code == 206
+        assert resp.content == CONTENT[100:200]
+        assert resp.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+
+    async def test_download_suffix_range(self, client, export_file):
+        resp = await client.get(export_file, headers={"Range": "bytes=-24"})
+        assert resp.status_code == 206
+        assert resp.content == CONTENT[-24:]
+
+    async def test_download_range_not_satisfiable(self, client, export_file):
+        resp = await client.get(export_file, headers={"Range": "bytes=5000-"})
+        assert resp.status_code == 416
+        assert resp.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+    async def test_download_if_range(self, client, export_file):
+        etag = (await client.get(export_file)).headers["etag"]
+        resp = await client.get(
+            export_file, headers={"Range": "bytes=0-9", "If-Range": etag}
+        )
+        assert resp.status_code == 206
+        assert resp.content == CONTENT[:10]
+
+    async def test_download_weak_if_range(self, client, export_file):
+        etag = (await client.get(export_file)).headers["etag"]
+        resp = await client.get(
+            export_file, headers={"Range": "bytes=0-9", "If-Range": f"W/{etag}"}
+        )
+        assert resp.status_code == 200
+        assert resp.content == CONTENT
+
+    async def test_download_stale_if_range(self, client, export_file):
+        resp = await client.get(
+            export_file, headers={"Range": "bytes=0-9", "If-Range": '"stale"'}
+        )
+        assert resp.status_code == 200
+        assert resp.content == CONTENT
+
+
+class TestCatalogStreamRoutes:
+    @pytest.fixture
+    async def catalog(
+        self,
+        menu_data,
+        submenu_data,
+        dish_data,
+        create_menu_in_database,
+        create_submenu_in_database,
+        create_dish_in_database,
+    ):
+        await create_menu_in_database(**menu_data)
+        await create_submenu_in_database(**submenu_data)
+        await create_dish_in_database(**dish_data)
+
+    async def test_export_csv(
+        self, client, catalog, menu_data, submenu_data, dish_data
+    ):
+        resp = await client.get("/api/v1/menus/export.csv")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(resp.text)))
+        assert len(rows) == 1
+        assert rows[0]["menu_id"] == menu_data["id_"]
+        assert rows[0]["submenu_title"] == submenu_data["title"]
+        assert rows[0]["dish_id"] == dish_data["id_"]
+        assert rows[0]["dish_price"] == f"{float(dish_data['price']):.2f}"
+
+    async def test_export_csv_empty(self, client):
+        resp = await client.get("/api/v1/menus/export.csv")
+        assert resp.status_code == 200
+        assert list(csv.DictReader(io.StringIO(resp.text))) == []
+
+    async def test_export_ndjson(
+        self, client, catalog, menu_data, submenu_data, dish_data
+    ):
+        resp = await client.get("/api/v1/menus/export.ndjson")
+        assert resp.status_code == 200
+        rows = [json.loads(line) for line in resp.text.splitlines()]
+        assert len(rows) == 1
+        assert rows[0]["menu_title"] == menu_data["title"]
+        assert rows[0]["submenu_id"] == submenu_data["id_"]
+        assert rows[0]["dish_title"] == dish_data["title"]
+
+    async def test_export_ndjson_menu_without_submenus(
+        self, client, menu_data, create_menu_in_database
+    ):
+        await create_menu_in_database(**menu_data)
+        resp = await client.get("/api/v1/menus/export.ndjson")
+        rows = [json.loads(line) for line in resp.text.splitlines()]
+        assert rows[0]["menu_id"] == menu_data["id_"]
+        assert rows[0]["submenu_id"] is None
+        assert rows[0]["dish_price"] is None
+
+
+class TestExportEventRoutes:
+    async def test_events_ready(self, client, export_file):
+        resp = await client.get("/api/v1/menus/get-xl-file/export/events")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        [(state, event)] = parse_events(resp.text)
+        assert state == "ready"
+        assert event["link"].endswith("/api/v1/menus/download/export")
+
+    async def test_events_follow_task_states(self, client, export_file, monkeypatch):
+        async def get_state(task_id):
+            return {"status": "STARTED", "result": None}
+
+        async def publish():
+            while "task" not in task_events.subscribers:
+                await asyncio.sleep(0.01)
+            task_events.dispatch("task", {"status": "PROGRESS", "result": {"rows": 5}})
+            task_events.dispatch("task", {"status": "FAILURE", "result": {}})
+
+        monkeypatch.setattr(task_events, "get_state", get_state)
+        publisher = asyncio.create_task(publish())
+        resp = await client.get("/api/v1/menus/get-xl-file/task/events")
+        await publisher
+
+        events = parse_events(resp.text)
+        assert [state for state, _ in events] == ["started", "progress", "failed"]
+        assert events[1][1]["progress"] == {"rows": 5}
+        assert "task" not in task_events.subscribers
@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from src.api.concurrency import AdaptiveLimit, LoadShedMiddleware
+from src.db.cache import CircuitBreaker
+
+SHARES = {"read": 1, "write": 0.5, "bulk": 0.25, "degraded": 0.5}
+
+
+@pytest.fixture
+def limit() -> AdaptiveLimit:
+    return AdaptiveLimit(initial=4, min_limit=1, max_limit=8, tolerance=2)
+
+
+@pytest.fixture
+def release() -> asyncio.Event:
+    return asyncio.Event()
+
+
+@pytest.fixture
+def breaker() -> CircuitBreaker:
+    return CircuitBreaker(threshold=1, reset_timeout=60)
+
+
+@pytest.fixture
+async def client(limit, release, breaker):
+    app = FastAPI()
+
+    @app.get("/api/items")
+    async def read():
+        await release.wait()
+        return {"status": True}
+
+    @app.post("/api/items")
+    async def write():
+        await release.wait()
+        return {"status": True}
+
+    @app.get("/api/changes")
+    async def changes():
+        await release.wait()
+        return {"status": True}
+
+    app.add_middleware(
+        LoadShedMiddleware,
+        limit=limit,
+        shares=SHARES,
+        retry_after=3,
+        degraded=breaker.is_open,
+    )
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        yield client
+
+
+async def wait_in_flight(limit: AdaptiveLimit, count: int) -> None:
+    async def admitted():
+        while limit.in_flight < count:
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(admitted(), timeout=5)
+
+
+class TestLoadShedMiddleware:
+    async def test_sheds_over_the_limit(self, client, limit, release):
+        held = [asyncio.create_task(client.get("/api/items")) for _ in range(4)]
+        await wait_in_flight(limit, 4)
+
+        resp = await client.get("/api/items")
+        assert resp.status_code == 503
+        assert resp.headers["retry-after"] == "3"
+        assert limit.stats()["shed"] == 1
+
+        release.set()
+        assert [(await task).status_code for task in held] == [200] * 4
+        assert limit.in_flight == 0
+
+    async def test_writes_are_shed_before_reads(self, client, limit, release):
+        held = [asyncio.create_task(client.get("/api/items")) for _ in range(2)]
+        await wait_in_flight(limit, 2)
+
+        assert (await client.post("/api/items")).status_code == 503
+        read = asyncio.create_task(client.get("/api/items"))
+        await wait_in_flight(limit, 3)
+
+        release.set()
+        assert (await read).status_code == 200
+        await asyncio.gather(*held)
+
+    async def test_reads_are_shed_without_cache(self, client, limit, release, breaker):
+        breaker.failed()
+        held = [asyncio.create_task(client.get("/api/items")) for _ in range(2)]
+        await wait_in_flight(limit, 2)
+
+        assert (await client.get("/api/items")).status_code == 503
+        release.set()
+        await asyncio.gather(*held)
+
+    async def test_streams_are_not_limited(self, client, limit, release):
+        held = [asyncio.create_task(client.get("/api/changes")) for _ in range(6)]
+        await asyncio.sleep(0.05)
+        assert limit.in_flight == 0
+        release.set()
+        assert [(await task).status_code for task in held] == [200] * 6
+
+
+class TestAdaptiveLimit:
+    async def test_slow_requests_lower_the_limit(self, limit):
+        for _ in range(4):
+            assert limit.acquire(1)
+        for _ in range(3):
+            limit.release(0.01)
+        before = limit.limit
+        limit.release(0.5)
+        assert limit.limit == pytest.approx(before * 0.9)
+
+        # Cut once per round, not once per slow request
+        limit.acquire(1)
+        limit.release(0.5)
+        assert limit.limit == pytest.approx(before * 0.9)
+
+    async def test_failures_lower_the_limit(self, limit):
+        limit.acquire(1)
+        limit.release(0.01, failed=True)
+        assert limit.limit < 4
+
+    async def test_busy_limit_grows(self, limit):
+        for _ in range(100):
+            for _ in range(4):
+                limit.acquire(1)
+            for _ in range(4):
+                limit.release(0.01)
+        assert limit.limit == 8
+
+    async def test_idle_limit_does_not_grow(self, limit):
+        for _ in range(100):
+            limit.acquire(1)
+            limit.release(0.01)
+        assert limit.limit == 4
@@ -1,4 +1,7 @@
 import json
+import uuid
+
+import pytest
 
 
 class TestMenuRoutes:
@@ -526,3 +529,185 @@ class TestCascadeDelete:
             f"/api/v1/menus/{menu_data['id_']}/submenus/{submenu_data['id_']}",
         )
         assert resp.status_code == 404
+
+
+class TestBatchGetRoutes:
+    async def test_batch_get_dishes(
+        self,
+        client,
+        menu_data,
+        submenu_data,
+        dish_data,
+        create_menu_in_database,
+        create_submenu_in_database,
+        create_dish_in_database,
+    ):
+        await create_menu_in_database(**menu_data)
+        await create_submenu_in_database(**submenu_data)
+        await create_dish_in_database(**dish_data)
+        missing_id = menu_data["id_"]
+
+        resp = await client.post(
+            "/api/v1/menus/dishes:batchGet",
+            data=json.dumps({"ids": [missing_id, dish_data["id_"], dish_data["id_"]]}),
+        )
+        resp_data = resp.json()
+        assert resp.status_code == 200
+        assert [dish["id"] for dish in resp_data["items"]] == [dish_data["id_"]]
+        assert resp_data["items"][0]["price"] == str(dish_data["price"])
+        assert resp_data["missing"] == [missing_id]
+
+    async def test_batch_get_submenus(
+        self,
+        client,
+        menu_data,
+        submenu_data,
+        dish_data,
+        create_menu_in_database,
+        create_submenu_in_database,
+        create_dish_in_database,
+    ):
+        await create_menu_in_database(**menu_data)
+        await create_submenu_in_database(**submenu_data)
+        await create_dish_in_database(**dish_data)
+
+        resp = await client.post(
+            "/api/v1/menus/submenus:batchGet",
+            data=json.dumps({"ids": [submenu_data["id_"]]}),
+        )
+        [submenu] = resp.json()["items"]
+        assert submenu["id"] == submenu_data["id_"]
+        assert submenu["dishes_count"] == 1
+
+    async def test_batch_get_invalid_ids(self, client):
+        resp = await client.post(
+            "/api/v1/menus/dishes:batchGet", data=json.dumps({"ids": ["not-an-id"]})
+        )
+        assert resp.status_code == 422
+
+
+class TestDishFilterRoutes:
+    @pytest.fixture
+    async def dishes(
+        self,
+        menu_data,
+        submenu_data,
+        dish_data,
+        create_menu_in_database,
+        create_submenu_in_database,
+        create_dish_in_database,
+    ) -> list[dict]:
+        await create_menu_in_database(**menu_data)
+        await create_submenu_in_database(**submenu_data)
+        dishes = [
+            dish_data,
+            dish_data | {"id_": str(uuid.uuid4()), "title": "Borscht", "price": 9.99},
+            dish_data | {"id_": str(uuid.uuid4()), "title": "Pelmeni", "price": 30},
+        ]
+        for dish in dishes:
+            await create_dish_in_database(**dish)
+        return dishes
+
+    @pytest.mark.parametrize(
+        "params, titles",
+        [
+            ({"sort": "price"}, ["Borscht", "Test dish", "Pelmeni"]),
+            ({"sort": "title"}, ["Borscht", "Pelmeni", "Test dish"]),
+            ({"min_price": 9.99, "sort": "price"}, ["Borscht", "Test dish", "Pelmeni"]),
+            ({"min_price": 10, "max_price": 30}, ["Test dish", "Pelmeni"]),
+            ({"max_price": 9.99}, ["Borscht"]),
+        ],
+    )
+    async def test_filter_dishes(self, client, dishes, menu_data, params, titles):
+        resp = await client.get(
+            f"/api/v1/menus/{menu_data['id_']}/submenus/"
+            f"{dishes[0]['submenu_id']}/dishes",
+            params=params,
+        )
+        assert resp.status_code == 200
+        found = [dish["title"] for dish in resp.json()]
+        if "sort" not in params:
+            found, titles = sorted(found), sorted(titles)
+        assert found == titles
+
+    async def test_menu_dishes(self, client, dishes, menu_data):
+        resp = await client.get(
+            f"/api/v1/menus/{menu_data['id_']}/dishes",
+            params={"max_price": 20, "sort": "price"},
+        )
+        assert resp.status_code == 200
+        assert [(dish["title"], dish["submenu_id"]) for dish in resp.json()] == [
+            ("Borscht", dishes[0]["submenu_id"]),
+            ("Test dish", dishes[0]["submenu_id"]),
+        ]
+
+    async def test_invalid_sort(self, client, menu_data):
+        resp = await client.get(
+            f"/api/v1/menus/{menu_data['id_']}/dishes", params={"sort": "id"}
+        )
+        assert resp.status_code == 422
+
+
+class TestSparseFieldsRoutes:
+    @pytest.fixture(autouse=True)
+    async def catalog(
+        self,
+        menu_data,
+        submenu_data,
+        dish_data,
+        create_menu_in_database,
+        create_submenu_in_database,
+        create_dish_in_database,
+    ):
+        await create_menu_in_database(**menu_data)
+        await create_submenu_in_database(**submenu_data)
+        await create_dish_in_database(**dish_data)
+
+    async def test_menu_list_fields(self, client, menu_data):
+        resp = await client.get("/api/v1/menus/", params={"fields": "title"})
+        assert resp.status_code == 200
+        assert resp.json() == [{"id": menu_data["id_"], "title": menu_data["title"]}]
+
+    async def test_submenu_fields(self, client, menu_data, submenu_data):
+        resp = await client.get(
+            f"/api/v1/menus/{menu_data['id_']}/submenus/{submenu_data['id_']}",
+            params={"fields": "dishes_count, title"},
+        )
+        assert resp.status_code == 200
+        assert resp.json() == {
+            "id": submenu_data["id_"],
+            "title": submenu_data["title"],
+            "dishes_count": 1,
+        }
+
+    async def test_menu_dishes_fields(self, client, menu_data, submenu_data):
+        resp = await client.get(
+            f"/api/v1/menus/{menu_data['id_']}/dishes",
+            params={"fields": "submenu_id", "sort": "price"},
+        )
+        assert resp.status_code == 200
+        assert [dish["submenu_id"] for dish in resp.json()] == [submenu_data["id_"]]
+        assert set(resp.json()[0]) == {"id", "submenu_id"}
+
+    async def test_all_fields(self, client, menu_data):
+        resp = await client.get(
+            f"/api/v1/menus/{menu_data['id_']}",
+            params={"fields": "title,description,submenus_count,dishes_count"},
+        )
+        assert resp.json()["submenus_count"] == 1
+        assert set(resp.json()) == {
+            "id",
+            "title",
+            "description",
+            "submenus_count",
+            "dishes_count",
+        }
+
+    async def test_unknown_fields(self, client, menu_data, submenu_data, dish_data):
+        resp = await client.get(
+            f"/api/v1/menus/{menu_data['id_']}/submenus/{submenu_data['id_']}"
+            f"/dishes/{dish_data['id_']}",
+            params={"fields": "title,dishes_count"},
+        )
+        assert resp.status_code == 422
+        assert resp.json()["detail"] == "unknown fields: dishes_count"
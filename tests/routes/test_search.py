@@ -0,0 +1,113 @@
+import pytest
+
+from src.accessors import MenuAccessor, MenuCacheAccessor
+from src.services import MenuService
+from tests import conftest
+from tests.conftest import TestCache
+
+
+@pytest.fixture
+async def catalog(
+    menu_data,
+    submenu_data,
+    dish_data,
+    create_menu_in_database,
+    create_submenu_in_database,
+    create_dish_in_database,
+):
+    await create_menu_in_database(**menu_data)
+    await create_submenu_in_database(
+        **{**submenu_data, "title": "Супы", "description": "Горячие супы"}
+    )
+    await create_dish_in_database(
+        **{**dish_data, "title": "Борщ", "description": "Со сметаной и зеленью"}
+    )
+
+
+class TestSearchRoutes:
+    async def test_search_dish(self, client, catalog, menu_data, dish_data):
+        resp = await client.get("/api/v1/menus/search", params={"q": "борщ"})
+        assert resp.status_code == 200
+        [hit] = resp.json()["items"]
+        assert hit["type"] == "dish"
+        assert hit["id"] == dish_data["id_"]
+        assert hit["menu_id"] == menu_data["id_"]
+        assert hit["price"] == str(dish_data["price"])
+
+    async def test_search_stems_words(self, client, catalog, dish_data):
+        resp = await client.get("/api/v1/menus/search", params={"q": "зелень"})
+        assert [hit["id"] for hit in resp.json()["items"]] == [dish_data["id_"]]
+
+    async def test_search_ranks_titles_first(self, client, catalog, submenu_data):
+        resp = await client.get("/api/v1/menus/search", params={"q": "суп"})
+        [hit] = resp.json()["items"]
+        assert (hit["type"], hit["id"]) == ("submenu", submenu_data["id_"])
+        assert hit["submenu_id"] is None
+
+    async def test_search_pagination(self, client, catalog, submenu_data):
+        params = {"q": "борщ OR суп", "limit": 1}
+        first = (await client.get("/api/v1/menus/search", params=params)).json()
+        params["offset"] = 1
+        second = (await client.get("/api/v1/menus/search", params=params)).json()
+        assert len(first["items"]) == len(second["items"]) == 1
+        assert first["items"][0]["id"] != second["items"][0]["id"]
+
+    async def test_search_requires_query(self, client):
+        resp = await client.get("/api/v1/menus/search", params={"q": ""})
+        assert resp.status_code == 422
+
+
+class TestSearchCache:
+    async def test_cached_until_catalog_changes(
+        self, catalog, submenu_data, create_dish_in_database
+    ):
+        cache = TestCache(dict())
+        service = MenuService(
+            accessor=MenuAccessor(conftest.test_async_session()),
+            cache_accessor=MenuCacheAccessor(cache),
+        )
+        assert len(await service.search("Борщ", limit=10, offset=0)) == 1
+        assert len(await service.search("  борщ ", limit=10, offset=0)) == 1
+        assert len([key for key in cache.cache if key.startswith("search:")]) == 1
+
+        await create_dish_in_database(
+            id_="4468bbfd-e02e-4936-9e27-402520dcecf3",
+            title="Борщ зелёный",
+            description="",
+            price=10,
+            submenu_id=submenu_data["id_"],
+        )
+        assert len(await service.search("борщ", limit=10, offset=0)) == 2
+
+
+class TestAutocompleteRoutes:
+    async def test_autocomplete(self, client, catalog, menu_data, dish_data):
+        resp = await client.get("/api/v1/menus/autocomplete", params={"q": "БОР"})
+        assert resp.status_code == 200
+        [hit] = resp.json()["items"]
+        assert (hit["type"], hit["id"]) == ("dish", dish_data["id_"])
+        assert hit["menu_id"] == menu_data["id_"]
+
+    async def test_autocomplete_follows_writes(
+        self, client, catalog, menu_data, submenu_data
+    ):
+        await client.get("/api/v1/menus/autocomplete", params={"q": "суп"})
+        base = f"/api/v1/menus/{menu_data['id_']}/submenus/{submenu_data['id_']}"
+        resp = await client.post(
+            f"{base}/dishes",
+            json={"title": "Солянка", "description": "", "price": "12.50"},
+        )
+        dish_id = resp.json()["id"]
+
+        resp = await client.get("/api/v1/menus/autocomplete", params={"q": "соля"})
+        assert [hit["id"] for hit in resp.json()["items"]] == [dish_id]
+
+        await client.delete(base)
+        resp = await client.get("/api/v1/menus/autocomplete", params={"q": "соля"})
+        assert resp.json()["items"] == []
+
+    async def test_footprint_reported(self, client, catalog):
+        await client.get("/api/v1/menus/autocomplete", params={"q": "б"})
+        stats = (await client.get("/metrics")).json()["autocomplete"]
+        assert stats["suggestions"] == 2
+        assert stats["bytes"] > 0
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from src.models import Dish, Menu, SubMenu
+from src.services.autocomplete import PrefixIndex, Suggestion, normalize
+
+
+def make_catalog() -> list[Menu]:
+    return [
+        Menu(
+            "m1",
+            "Меню",
+            "",
+            [
+                SubMenu(
+                    "s1",
+                    "Горячие супы",
+                    "",
+                    [
+                        Dish("d1", "Борщ", "", 10.0),
+                        Dish("d2", "Щи из квашеной капусты", "", 8.0),
+                    ],
+                ),
+                SubMenu("s2", "Салаты", "", [Dish("d3", "Салат с ёжиками", "", 5.0)]),
+            ],
+        )
+    ]
+
+
+@pytest.fixture
+async def index() -> PrefixIndex:
+    index = PrefixIndex(max_age=300)
+    await index.refresh(lambda: asyncio.sleep(0, make_catalog()))
+    return index
+
+
+async def suggest(index: PrefixIndex, prefix: str) -> list[str]:
+    results = await index.search(prefix, 10, load=None)  # type: ignore
+    return [result["id"] for result in results]
+
+
+class TestPrefixIndex:
+    def test_normalize(self):
+        assert normalize("  Салат  с ЁЖИКАМИ ") == "салат с ежиками"
+
+    async def test_prefix_of_any_word(self, index):
+        assert await suggest(index, "бо") == ["d1"]
+        assert await suggest(index, "КАП") == ["d2"]
+        assert await suggest(index, "супы") == ["s1"]
+        assert await suggest(index, "ежик") == ["d3"]
+        assert await suggest(index, "сала") == ["d3", "s2"]
+        assert await suggest(index, "пицца") == []
+
+    async def test_limit(self, index):
+        results = await index.search("с", 2, load=None)  # type: ignore
+        assert len(results) == 2
+
+    async def test_write_paths(self, index):
+        index.add(Suggestion("dish", "d4", "Солянка", "m1", "s1"))
+        assert await suggest(index, "соля") == ["d4"]
+
+        index.rename("dish", "d4", "Рассольник")
+        assert await suggest(index, "соля") == []
+        assert await suggest(index, "расс") == ["d4"]
+
+        index.remove("submenu", "s1")
+        assert await suggest(index, "расс") == []
+        assert await suggest(index, "бор") == []
+        assert await suggest(index, "сал") == ["d3", "s2"]
+
+        index.remove("menu", "m1")
+        assert index.keys == []
+
+    async def test_stats(self, index):
+        stats = index.stats()
+        assert stats["suggestions"] == 5
+        assert stats["keys"] == 11
+        assert stats["bytes"] > 0
+
+    async def test_rebuilt_in_background_when_old(self, index):
+        catalog = make_catalog()
+        catalog[0].submenus[0].dishes.append(Dish("d5", "Уха", "", 9.0))
+        index.expire()
+
+        # The old index is served while the new one is built
+        assert await index.search("уха", 10, lambda: asyncio.sleep(0, catalog)) == []
+        await asyncio.sleep(0.01)
+        assert await suggest(index, "уха") == ["d5"]
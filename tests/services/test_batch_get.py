@@ -0,0 +1,56 @@
+import uuid
+
+import pytest
+
+from src.accessors import MenuAccessor, MenuCacheAccessor
+from src.services import MenuService
+from tests import conftest
+from tests.conftest import TestCache
+
+
+class CountingAccessor(MenuAccessor):
+    def __init__(self, session):
+        super().__init__(session)
+        self.loaded: list[list[str]] = []
+
+    async def get_dishes_by_ids(self, ids):
+        self.loaded.append(ids)
+        return await super().get_dishes_by_ids(ids)
+
+
+@pytest.fixture
+def service() -> MenuService:
+    return MenuService(
+        accessor=CountingAccessor(conftest.test_async_session()),
+        cache_accessor=MenuCacheAccessor(TestCache(dict())),
+    )
+
+
+class TestBatchGet:
+    async def test_misses_loaded_once_and_cached(
+        self,
+        service,
+        menu_data,
+        submenu_data,
+        dish_data,
+        create_menu_in_database,
+        create_submenu_in_database,
+        create_dish_in_database,
+    ):
+        await create_menu_in_database(**menu_data)
+        await create_submenu_in_database(**submenu_data)
+        await create_dish_in_database(**dish_data)
+        cached = await service.get_dish(dish_data["id_"])
+        await service.cache_accessor.delete(type_="dish", id_=dish_data["id_"])
+        other_id = str(uuid.uuid4())
+        await service.cache_accessor.set_item(
+            type_="dish", item={**cached, "id": other_id}
+        )
+
+        items, missing = await service.get_dishes_by_ids([other_id, dish_data["id_"]])
+        assert [item["id"] for item in items] == [other_id, dish_data["id_"]]
+        assert missing == []
+        assert service.accessor.loaded == [[dish_data["id_"]]]
+
+        await service.get_dishes_by_ids([dish_data["id_"]])
+        assert len(service.accessor.loaded) == 1
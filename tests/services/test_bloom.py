@@ -0,0 +1,69 @@
+import asyncio
+import uuid
+
+import pytest
+
+from src.services.bloom import BloomFilter, IdFilters, id_filters
+from tests import conftest
+
+
+class TestBloomFilter:
+    def test_no_false_negatives(self):
+        ids = [str(uuid.uuid4()) for _ in range(1000)]
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for id_ in ids:
+            bloom.add(id_)
+        assert all(id_ in bloom for id_ in ids)
+        assert ids[0].upper() in bloom
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for _ in range(1000):
+            bloom.add(str(uuid.uuid4()))
+        false_positives = sum(str(uuid.uuid4()) in bloom for _ in range(10000))
+        assert false_positives < 300
+
+
+class TestIdFilters:
+    @pytest.fixture
+    async def filters(self, change_feed, menu_data, create_menu_in_database):
+        await create_menu_in_database(**menu_data)
+        filters = IdFilters(change_feed, error_rate=0.01, min_capacity=100)
+        await filters.start(conftest.test_async_session)
+        await asyncio.wait_for(filters.ready.wait(), timeout=5)
+        yield filters
+        await filters.stop()
+
+    async def test_built_from_database(self, filters, menu_data):
+        assert filters.might_exist("menu", menu_data["id_"])
+        assert not filters.might_exist("menu", str(uuid.uuid4()))
+
+    async def test_inserts_bypassing_api_are_added(
+        self, filters, submenu_data, create_submenu_in_database
+    ):
+        assert not filters.might_exist("submenu", submenu_data["id_"])
+        await create_submenu_in_database(**submenu_data)
+
+        async def added():
+            while not filters.might_exist("submenu", submenu_data["id_"]):
+                await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(added(), timeout=5)
+
+    async def test_unknown_ids_are_not_found(
+        self, client, filters, monkeypatch, menu_data
+    ):
+        monkeypatch.setattr(id_filters, "filters", filters.filters)
+
+        resp = await client.get(f"/api/v1/menus/{uuid.uuid4()}")
+        assert resp.status_code == 404
+        resp = await client.get(f"/api/v1/menus/{menu_data['id_']}")
+        assert resp.status_code == 200
+
+    async def test_created_ids_are_added(self, client, filters, monkeypatch):
+        monkeypatch.setattr(id_filters, "filters", filters.filters)
+
+        resp = await client.post(
+            "/api/v1/menus/", json={"title": "Menu", "description": "Menu"}
+        )
+        assert id_filters.might_exist("menu", resp.json()["id"])
@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+from aioredis.exceptions import ConnectionError
+
+from src.accessors import MenuAccessor, MenuCacheAccessor
+from src.db.cache import CircuitBreaker, CircuitBreakerCache
+from src.services import MenuService
+from tests import conftest
+from tests.conftest import TestCache
+
+
+class FlakyCache(TestCache):
+    """Stand-in cache failing like an unreachable Redis while down."""
+
+    def __init__(self, cache_instance):
+        super().__init__(cache_instance)
+        self.down = False
+        self.calls = 0
+
+    async def get(self, key: str):
+        self.check()
+        return await super().get(key)
+
+    async def set(self, key: str, value, expire: int = 0):
+        self.check()
+        await super().set(key, value)
+
+    async def get_many(self, keys: list[str]) -> list:
+        self.check()
+        return await super().get_many(keys)
+
+    async def remove_many(self, keys):
+        self.check()
+        await super().remove_many(keys)
+
+    async def remove_matching(self, pattern: str):
+        self.check()
+        await super().remove_matching(pattern)
+
+    def check(self) -> None:
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("Error 111 connecting to redis-cache:6379.")
+
+
+@pytest.fixture
+def flaky() -> FlakyCache:
+    return FlakyCache(dict())
+
+
+@pytest.fixture
+def breaker() -> CircuitBreaker:
+    return CircuitBreaker(threshold=3, reset_timeout=0.05)
+
+
+@pytest.fixture
+def cache(flaky, breaker) -> CircuitBreakerCache:
+    return CircuitBreakerCache(flaky, breaker, max_pending=3)
+
+
+@pytest.fixture
+def service(cache) -> MenuService:
+    return MenuService(
+        accessor=MenuAccessor(conftest.test_async_session()),
+        cache_accessor=MenuCacheAccessor(cache),
+    )
+
+
+class TestCircuitBreakerCache:
+    async def test_failures_open_the_breaker(self, cache, flaky, breaker):
+        flaky.down = True
+        for _ in range(3):
+            assert await cache.get("key") is None
+        assert breaker.stats() == {"state": "open", "failures": 3, "trips": 1}
+
+        # Skipped without waiting on the cache
+        assert await cache.get_many(["a", "b"]) == [None, None]
+        assert flaky.calls == 3
+
+    async def test_served_from_database_while_down(
+        self, service, flaky, breaker, menu_data, create_menu_in_database
+    ):
+        await create_menu_in_database(**menu_data)
+        flaky.down = True
+        for _ in range(5):
+            menu = await service.get_menu(menu_data["id_"])
+            assert menu["title"] == menu_data["title"]
+        assert breaker.is_open()
+        assert flaky.cache == {}
+
+    async def test_probe_closes_and_replays_removals(self, cache, flaky, breaker):
+        await cache.set("menu:1", "stale")
+        flaky.down = True
+        for _ in range(3):
+            await cache.remove("menu:1")
+        assert cache.stats()["pending_removals"] == 1
+
+        flaky.down = False
+        assert await cache.get("menu:1") is None  # skipped, not probed yet
+        await asyncio.sleep(0.05)
+        assert await cache.get("menu:2") is None  # the probe
+        assert breaker.stats()["state"] == "closed"
+        assert flaky.cache == {}
+        assert cache.stats()["pending_removals"] == 0
+
+    async def test_failed_probe_reopens(self, cache, flaky, breaker):
+        flaky.down = True
+        for _ in range(3):
+            await cache.get("key")
+        await asyncio.sleep(0.05)
+        calls = flaky.calls
+        await cache.get("key")
+        assert flaky.calls == calls + 1
+        assert breaker.stats()["state"] == "open"
+
+        await cache.get("key")
+        assert flaky.calls == calls + 1
+
+    async def test_too_many_removals_clear_the_cache(self, cache, flaky):
+        await cache.set("menu:1", "stale")
+        await cache.set("export:1", "task")
+        flaky.down = True
+        await cache.remove_many(["a", "b", "c", "d"])
+        for _ in range(2):
+            await cache.get("key")
+        assert cache.stats()["pending_removals"] == -1
+
+        flaky.down = False
+        await asyncio.sleep(0.05)
+        await cache.get("key")
+        assert flaky.cache == {}
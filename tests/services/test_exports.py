@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+import pytest
+
+from src.accessors import MenuAccessor, MenuCacheAccessor
+from src.core import config
+from src.services import MenuService
+from src.services import menus as menu_services
+from src.services.events import task_events
+from src.services.menus import ExportPrebuilder
+from tests import conftest
+from tests.conftest import TestCache
+
+
+class FakeCelery:
+    def __init__(self):
+        self.sent: list[str] = []
+
+    def send_task(self, name: str, task_id: str, kwargs: dict) -> None:
+        self.sent.append(task_id)
+
+
+@pytest.fixture
+def celery(monkeypatch) -> FakeCelery:
+    celery = FakeCelery()
+    monkeypatch.setattr(menu_services, "get_celery_app", lambda: celery)
+    return celery
+
+
+@pytest.fixture
+def states(monkeypatch) -> dict:
+    states: dict = {}
+
+    async def get_state(task_id: str) -> dict | None:
+        return states.get(task_id)
+
+    monkeypatch.setattr(task_events, "get_state", get_state)
+    return states
+
+
+@pytest.fixture
+def cache() -> TestCache:
+    return TestCache(dict())
+
+
+def make_service(cache: TestCache) -> MenuService:
+    return MenuService(
+        accessor=MenuAccessor(conftest.test_async_session()),
+        cache_accessor=MenuCacheAccessor(cache),
+    )
+
+
+@pytest.fixture
+def service(cache) -> MenuService:
+    return make_service(cache)
+
+
+class TestExportClaims:
+    async def test_export_is_reused_for_the_version(self, cache, celery, states):
+        task_ids = await asyncio.gather(
+            *(make_service(cache).make_xl_file() for _ in range(3))
+        )
+        assert len(set(task_ids)) == 1
+        assert celery.sent == [task_ids[0]]
+
+    async def test_failed_export_is_restarted(self, service, celery, states):
+        task_id = await service.make_xl_file()
+        states[task_id] = {"status": "FAILURE"}
+        new_task_id = await service.make_xl_file()
+        assert new_task_id != task_id
+        assert celery.sent == [task_id, new_task_id]
+        assert await service.make_xl_file() == new_task_id
+
+    async def test_evicted_export_is_restarted(self, service, celery, states):
+        task_id = await service.make_xl_file()
+        states[task_id] = {"status": "SUCCESS"}
+        assert await service.make_xl_file() != task_id
+
+    async def test_lost_export_is_restarted(self, service, celery, states, monkeypatch):
+        task_id = await service.make_xl_file()
+        states[task_id] = {"status": "STARTED"}
+        assert await service.make_xl_file() == task_id
+
+        later = time.time() + config.EXPORT_TASK_TIMEOUT + 1
+        monkeypatch.setattr(time, "time", lambda: later)
+        assert await service.make_xl_file() != task_id
+
+
+class TestExportPrebuilder:
+    async def test_rebuilds_once_writes_settle(self, monkeypatch):
+        built = []
+
+        async def make_xl_file(self):
+            built.append(True)
+
+        monkeypatch.setattr(MenuService, "make_xl_file", make_xl_file)
+        prebuilder = ExportPrebuilder(delay=0.05)
+        for _ in range(3):
+            prebuilder.schedule()
+            await asyncio.sleep(0.02)
+        assert built == []
+        await asyncio.sleep(0.1)
+        assert built == [True]
+
+    async def test_disabled(self, monkeypatch):
+        prebuilder = ExportPrebuilder(delay=0)
+        prebuilder.schedule()
+        assert prebuilder.timer is None
@@ -0,0 +1,106 @@
+import pytest
+from sqlalchemy import event
+
+from src.accessors import MenuAccessor, MenuCacheAccessor, MenuCoreAccessor
+from src.api.v1.schemas import MenuUpdate
+from src.services import MenuService
+from tests import conftest
+from tests.conftest import TestCache
+
+
+@pytest.fixture
+async def catalog(
+    menu_data,
+    submenu_data,
+    dish_data,
+    create_menu_in_database,
+    create_submenu_in_database,
+    create_dish_in_database,
+):
+    await create_menu_in_database(**menu_data)
+    await create_submenu_in_database(**submenu_data)
+    await create_dish_in_database(**dish_data)
+
+
+@pytest.fixture
+def cache() -> TestCache:
+    return TestCache(dict())
+
+
+@pytest.fixture(params=[MenuAccessor, MenuCoreAccessor])
+def service(request, cache) -> MenuService:
+    return MenuService(
+        accessor=request.param(conftest.test_async_session()),
+        cache_accessor=MenuCacheAccessor(cache),
+    )
+
+
+@pytest.fixture
+def statements() -> list[str]:
+    captured: list[str] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement)
+
+    engine = conftest.test_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", capture)
+    yield captured
+    event.remove(engine, "before_cursor_execute", capture)
+
+
+class TestSparseFields:
+    async def test_counts_are_not_computed_unless_requested(
+        self, service, catalog, statements, menu_data
+    ):
+        menus = await service.get_menu_list(fields=("id", "title"))
+        assert menus == [{"id": menu_data["id_"], "title": menu_data["title"]}]
+        [statement] = statements
+        assert "submenu" not in statement and "description" not in statement
+
+        statements.clear()
+        menu = await service.get_menu(menu_data["id_"], fields=("id", "dishes_count"))
+        assert menu == {"id": menu_data["id_"], "dishes_count": 1}
+        [statement] = statements
+        assert "count" in statement
+
+    async def test_field_sets_are_cached_apart(
+        self, service, cache, catalog, statements, menu_data, dish_data
+    ):
+        submenu_id = dish_data["submenu_id"]
+        dishes = await service.get_dishes(submenu_id, fields=("id", "price"))
+        assert dishes == [{"id": dish_data["id_"], "price": str(dish_data["price"])}]
+        assert f"dishes:{submenu_id}|id,price" in cache.cache
+
+        statements.clear()
+        assert await service.get_dishes(submenu_id, fields=("id", "price")) == dishes
+        assert statements == []
+        full = await service.get_dishes(submenu_id)
+        assert full[0]["title"] == dish_data["title"]
+
+    async def test_update_drops_field_sets(self, service, cache, catalog, menu_data):
+        menu_id = menu_data["id_"]
+        await service.get_menu(menu_id, fields=("id", "title"))
+        await service.get_menu_list(fields=("id", "title"))
+        await service.update_menu(
+            menu_id, MenuUpdate(title="New title", description="New description")
+        )
+        assert await service.get_menu(menu_id, fields=("id", "title")) == {
+            "id": menu_id,
+            "title": "New title",
+        }
+        assert "menus|id,title" not in cache.cache
+
+
+def test_field_keys():
+    keys = MenuCacheAccessor.field_keys(["dish:1", "export:1"])
+    assert keys == [
+        "dish:1",
+        "dish:1|id",
+        "dish:1|id,title",
+        "dish:1|id,description",
+        "dish:1|id,price",
+        "dish:1|id,title,description",
+        "dish:1|id,title,price",
+        "dish:1|id,description,price",
+        "export:1",
+    ]
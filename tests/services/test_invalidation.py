@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from src.services.invalidation import CacheInvalidator
+from tests.conftest import TestCache
+
+OTHER_ID = "4468bbfd-e02e-4936-9e24-402520dcecf2"
+
+
+@pytest.fixture
+async def catalog(
+    menu_data,
+    submenu_data,
+    dish_data,
+    create_menu_in_database,
+    create_submenu_in_database,
+    create_dish_in_database,
+):
+    await create_menu_in_database(**menu_data)
+    await create_submenu_in_database(**submenu_data)
+    await create_dish_in_database(**dish_data)
+
+
+@pytest.fixture
+def cache(catalog, menu_data, submenu_data, dish_data) -> TestCache:
+    menu_id, submenu_id = menu_data["id_"], submenu_data["id_"]
+    keys = [
+        "menus",
+        f"menu:{menu_id}",
+        f"submenus:{menu_id}",
+        f"submenu:{submenu_id}",
+        f"dishes:{submenu_id}",
+        f"dish:{dish_data['id_']}",
+        f"menu:{OTHER_ID}",
+        "export:1",
+    ]
+    return TestCache({key: "[]" for key in keys})
+
+
+@pytest.fixture
+async def invalidator(change_feed, cache):
+    invalidator = CacheInvalidator(change_feed, window=0.01, batch_size=100)
+    await invalidator.start(cache)
+    while not change_feed.subscriptions:
+        await asyncio.sleep(0.01)
+    yield invalidator
+    await invalidator.stop()
+
+
+async def wait_removed(cache: TestCache, key: str) -> None:
+    async def removed():
+        while key in cache.cache:
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(removed(), timeout=5)
+
+
+class TestCacheInvalidator:
+    async def test_write_bypassing_api(
+        self, invalidator, cache, asyncpg_pool, dish_data
+    ):
+        async with asyncpg_pool.acquire() as connection:
+            await connection.execute(
+                "UPDATE dish SET price = 20 WHERE id = $1", dish_data["id_"]
+            )
+        await wait_removed(cache, f"dish:{dish_data['id_']}")
+        assert sorted(cache.cache) == ["export:1", f"menu:{OTHER_ID}"]
+
+    async def test_cascade_delete(
+        self, invalidator, cache, delete_menu_from_database, menu_data, dish_data
+    ):
+        await delete_menu_from_database(menu_data["id_"])
+        await wait_removed(cache, f"dish:{dish_data['id_']}")
+        assert sorted(cache.cache) == ["export:1", f"menu:{OTHER_ID}"]
+
+    async def test_truncate_drops_catalog(self, invalidator, cache, asyncpg_pool):
+        async with asyncpg_pool.acquire() as connection:
+            await connection.execute("TRUNCATE dish")
+        await wait_removed(cache, f"menu:{OTHER_ID}")
+        assert list(cache.cache) == ["export:1"]
@@ -0,0 +1,44 @@
+import pytest
+
+from src.accessors import MISSING, MenuAccessor, MenuCacheAccessor
+from src.services import MenuService
+from tests import conftest
+from tests.conftest import TestCache
+
+
+@pytest.fixture
+def cache() -> TestCache:
+    return TestCache(dict())
+
+
+@pytest.fixture
+def service(cache) -> MenuService:
+    return MenuService(
+        accessor=MenuAccessor(conftest.test_async_session()),
+        cache_accessor=MenuCacheAccessor(cache),
+    )
+
+
+class TestNegativeCache:
+    async def test_missing_items_are_cached(
+        self, service, cache, menu_data, create_menu_in_database
+    ):
+        assert await service.get_menu(menu_data["id_"]) is None
+        assert cache.cache[f"menu:{menu_data['id_']}"] == MISSING
+
+        # Served from the cache until the entry expires or is invalidated
+        await create_menu_in_database(**menu_data)
+        assert await service.get_menu(menu_data["id_"]) is None
+        await service.cache_accessor.delete(type_="menu", id_=menu_data["id_"])
+        assert (await service.get_menu(menu_data["id_"]))["id"] == menu_data["id_"]
+
+    async def test_missing_does_not_replace_item(self, service):
+        await service.cache_accessor.set_item(type_="dish", item={"id": "dish"})
+        await service.cache_accessor.set_missing(type_="dish", id_="dish")
+        assert await service.get_dish("dish") == {"id": "dish"}
+
+    async def test_created_item_replaces_missing(self, service):
+        await service.cache_accessor.set_missing(type_="submenu", id_="submenu")
+        assert await service.get_submenu("submenu") is None
+        await service.cache_accessor.set_item(type_="submenu", item={"id": "submenu"})
+        assert await service.get_submenu("submenu") == {"id": "submenu"}
@@ -0,0 +1,40 @@
+import pytest
+from aioredis import Redis
+from aioredis.exceptions import ConnectionError
+
+from src.db.cache import (
+    CircuitBreaker,
+    CircuitBreakerCache,
+    RedisCache,
+    create_redis_pool,
+)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr("src.core.config.REDIS_MAX_CONNECTIONS", 2)
+    monkeypatch.setattr("src.core.config.REDIS_POOL_TIMEOUT", 0.05)
+    return create_redis_pool()
+
+
+class TestRedisPool:
+    async def test_connections_are_bounded(self, pool):
+        # Taken without connecting, as by two calls in flight
+        pool.pool.get_nowait()
+        pool.pool.get_nowait()
+        with pytest.raises(ConnectionError):
+            await pool.get_connection("GET")
+
+    async def test_pool_stats(self, pool):
+        cache = CircuitBreakerCache(
+            RedisCache(Redis(connection_pool=pool)),
+            CircuitBreaker(threshold=1, reset_timeout=1),
+        )
+        pool.pool.get_nowait()
+        connection = pool.make_connection()
+        assert cache.stats()["in_use"] == 1
+
+        await pool.release(connection)
+        stats = cache.stats()
+        assert (stats["max_connections"], stats["in_use"], stats["idle"]) == (2, 0, 1)
+        assert stats["state"] == "closed"
@@ -0,0 +1,83 @@
+import pytest
+
+from src.accessors import MenuCacheAccessor
+from src.cache import CacheWarmer
+from tests import conftest
+from tests.conftest import TestCache
+
+
+@pytest.fixture
+async def catalog(
+    menu_data,
+    submenu_data,
+    dish_data,
+    create_menu_in_database,
+    create_submenu_in_database,
+    create_dish_in_database,
+):
+    await create_menu_in_database(**menu_data)
+    await create_submenu_in_database(**submenu_data)
+    await create_dish_in_database(**dish_data)
+
+
+class TestCacheWarmer:
+    async def test_warm(self, catalog, menu_data, submenu_data, dish_data):
+        cache = TestCache(dict())
+        warmer = CacheWarmer(
+            cache, concurrency=2, session_factory=conftest.test_async_session
+        )
+
+        assert await warmer.warm() == {"menu": 1, "submenu": 1, "dish": 1}
+        menu_id, submenu_id = menu_data["id_"], submenu_data["id_"]
+        assert sorted(cache.cache) == sorted(
+            [
+                "menus",
+                f"menu:{menu_id}",
+                f"submenus:{menu_id}",
+                f"submenu:{submenu_id}",
+                f"dishes:{submenu_id}",
+                f"dish:{dish_data['id_']}",
+            ]
+        )
+
+    async def test_warm_counts(self, catalog, submenu_data):
+        cache = TestCache(dict())
+        await CacheWarmer(cache, 2, session_factory=conftest.test_async_session).warm()
+        cache_accessor = MenuCacheAccessor(cache)
+
+        [menu] = await cache_accessor.get_list("menus")
+        assert menu["submenus_count"] == 1
+        assert menu["dishes_count"] == 1
+        submenu = await cache_accessor.get_item("submenu", submenu_data["id_"])
+        assert submenu["dishes_count"] == 1
+
+
+class TestCacheMaintenance:
+    async def test_count_and_flush_by_type(self):
+        cache = TestCache(
+            {
+                "menus": "[]",
+                "menu:1": "{}",
+                "submenus:1": "[]",
+                "submenu:2": "{}",
+                "dishes:2": "[]",
+                "dish:3": "{}",
+                "export:1": "task",
+            }
+        )
+        cache_accessor = MenuCacheAccessor(cache)
+        assert await cache_accessor.count_keys() == {
+            "menu": 2,
+            "submenu": 2,
+            "dish": 2,
+            "search": 0,
+        }
+
+        await cache_accessor.delete_type("submenu")
+        assert sorted(cache.cache) == [
+            "dish:3",
+            "dishes:2",
+            "export:1",
+            "menu:1",
+            "menus",
+        ]
@@ -0,0 +1,18 @@
+import subprocess
+import sys
+
+from benchmarks.startup import LAZY_MODULES
+
+
+def test_optional_subsystems_load_lazily():
+    loaded = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, main; print(' '.join(sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    assert not {name.split(".")[0] for name in loaded} & set(LAZY_MODULES)
@@ -0,0 +1,62 @@
+import asyncio
+import socket
+
+import httpx
+import pytest
+import uvicorn
+from fastapi import FastAPI
+
+from src.server import DrainingServer, build_config
+
+
+@pytest.fixture
+def app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/slow/{seconds}")
+    async def slow(seconds: float):
+        await asyncio.sleep(seconds)
+        return {"status": True}
+
+    return app
+
+
+async def serve(app: FastAPI, drain_timeout: float):
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = DrainingServer(
+        uvicorn.Config(app, lifespan="off", log_level="warning"),
+        drain_timeout=drain_timeout,
+    )
+    server.install_signal_handlers = lambda: None  # type: ignore
+    task = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task, f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+class TestDrainingServer:
+    async def test_requests_in_flight_are_finished(self, app):
+        server, task, url = await serve(app, drain_timeout=5)
+        async with httpx.AsyncClient() as client:
+            request = asyncio.create_task(client.get(f"{url}/slow/0.3"))
+            await asyncio.sleep(0.1)
+            server.should_exit = True
+            assert (await request).status_code == 200
+        await asyncio.wait_for(task, timeout=5)
+
+    async def test_connections_are_dropped_after_drain(self, app):
+        server, task, url = await serve(app, drain_timeout=0.2)
+        async with httpx.AsyncClient() as client:
+            request = asyncio.create_task(client.get(f"{url}/slow/1"))
+            await asyncio.sleep(0.1)
+            server.should_exit = True
+            with pytest.raises(httpx.RemoteProtocolError):
+                await request
+        await asyncio.wait_for(task, timeout=5)
+
+
+def test_one_worker_per_cpu(monkeypatch):
+    monkeypatch.setattr("src.core.config.SERVER_WORKERS", 0)
+    monkeypatch.setattr("src.server.cpu_count", lambda: 6)
+    assert build_config().workers == 6
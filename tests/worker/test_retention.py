@@ -0,0 +1,58 @@
+import os
+import time
+
+import pytest
+
+from src.celery.tasks import ExportRetention
+
+
+@pytest.fixture
+def export_dir(tmp_path):
+    def make(name: str, size: int, age: float) -> str:
+        path = os.path.join(tmp_path, name)
+        with open(path, "wb") as file:
+            file.write(b"x" * size)
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    make.directory = str(tmp_path)
+    return make
+
+
+def remaining(directory: str) -> set[str]:
+    return set(os.listdir(directory))
+
+
+class TestExportRetention:
+    def test_expired_exports_are_removed(self, export_dir):
+        expired = export_dir("old.xlsx", 10, age=100)
+        export_dir("new.xlsx", 10, age=1)
+        export_dir("notes.txt", 10, age=100)
+        retention = ExportRetention(export_dir.directory, max_age=50, max_bytes=1000)
+        assert retention.evict() == [expired]
+        assert remaining(export_dir.directory) == {"new.xlsx", "notes.txt"}
+
+    def test_oldest_exports_go_over_budget(self, export_dir):
+        export_dir("a.xlsx", 40, age=30)
+        export_dir("b.xlsx", 40, age=20)
+        export_dir("c.xlsx", 40, age=10)
+        retention = ExportRetention(export_dir.directory, max_age=100, max_bytes=90)
+        retention.evict()
+        assert remaining(export_dir.directory) == {"b.xlsx", "c.xlsx"}
+
+    def test_partial_exports_are_kept_until_expired(self, export_dir):
+        export_dir("running.xlsx.partial", 100, age=30)
+        export_dir("done.xlsx", 10, age=10)
+        retention = ExportRetention(export_dir.directory, max_age=100, max_bytes=50)
+        retention.evict()
+        assert remaining(export_dir.directory) == {"running.xlsx.partial"}
+
+        retention.max_age = 20
+        retention.evict()
+        assert remaining(export_dir.directory) == set()
+
+    def test_kept_export_is_not_removed(self, export_dir):
+        kept = export_dir("kept.xlsx", 100, age=100)
+        retention = ExportRetention(export_dir.directory, max_age=50, max_bytes=10)
+        assert retention.evict(keep=kept) == []
@@ -0,0 +1,67 @@
+import pytest
+from openpyxl import load_workbook
+
+from src.celery import tasks
+
+
+def make_menu(title: str, submenus: int, dishes: int) -> dict:
+    return {
+        "title": title,
+        "description": f"{title} description",
+        "submenus": [
+            {
+                "title": f"{title} submenu {s}",
+                "description": "Submenu",
+                "dishes": [
+                    {"title": f"Dish {d}", "description": "Dish", "price": 10.5 + d}
+                    for d in range(dishes)
+                ],
+            }
+            for s in range(submenus)
+        ],
+    }
+
+
+@pytest.fixture(autouse=True)
+def shards(monkeypatch):
+    # One menu per shard
+    monkeypatch.setattr(tasks, "EXPORT_PROCESSES", 2)
+    monkeypatch.setattr(tasks, "EXPORT_SHARDS_PER_PROCESS", 2)
+
+
+def export(menus: list[dict], path: str):
+    tasks.write_sharded_workbook(
+        tasks.plan_catalog_shards(menus), [menu["title"] for menu in menus], path
+    )
+    return load_workbook(path)
+
+
+class TestShardedExport:
+    def test_sheet_per_menu(self, tmp_path):
+        menus = [make_menu(f"Menu {m}", submenus=2, dishes=2) for m in range(3)]
+        wb = export(menus, str(tmp_path / "export.xlsx"))
+        assert wb.sheetnames == ["1. Menu 0", "2. Menu 1", "3. Menu 2"]
+        ws = wb["2. Menu 1"]
+        assert [cell.value for cell in ws[1]][:3] == [2, "Menu 1", "Menu 1 description"]
+        assert ws.max_row == 1 + 2 * (1 + 2)
+
+    def test_styles_of_shards_without_every_level(self, tmp_path):
+        menus = [
+            make_menu("Empty", submenus=0, dishes=0),
+            make_menu("No dishes", submenus=1, dishes=0),
+            make_menu("Full", submenus=1, dishes=1),
+        ]
+        wb = export(menus, str(tmp_path / "export.xlsx"))
+        ws = wb["3. Full"]
+        assert [
+            ws.cell(row, column).style for row, column in ((1, 1), (2, 2), (3, 3))
+        ] == [
+            "menu",
+            "submenu",
+            "dish",
+        ]
+        assert ws.cell(3, 6).value == "10.50"
+
+    def test_empty_catalog(self, tmp_path):
+        wb = export([], str(tmp_path / "export.xlsx"))
+        assert wb.sheetnames == [tasks.SHEET_TITLE]